@@ -1,5 +1,6 @@
 from os.path import join, dirname
 from src.journal_pipeline import JournalPipeline
+from src.api.request_coalescer import RequestCoalescer
 import argparse
 from datetime import datetime
 
@@ -11,8 +12,9 @@ logger = Logger()
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("-tf", "--timeframe", type=str, default=DAILY_TIMEFRAME,
-                        help="Timeframe range to be used for the journal. Supported timeframes:\n"
+    parser.add_argument("-tf", "--timeframe", type=str, nargs="+", default=[DAILY_TIMEFRAME],
+                        help="Timeframe range(s) to be used for the journal. Several timeframes (eg. daily weekly"
+                             " monthly) can be generated at once, sharing their requests. Supported timeframes:\n"
                              f"{'\n'.join(' - '+tf for tf in SUPPORTED_TIMEFRAMES)}")
     parser.add_argument("-dt", "--start_date", type=str,
                         default=datetime.strftime(datetime.now(), "%Y-%m-%d"),
@@ -22,6 +24,11 @@ def main():
                         help="The configuration file type to load the app's configuration details from."
                              " Supported timeframes:\n"
                              f"{'\n'.join(' - '+config for config in SUPPORTED_CONFIG_TYPES)}")
+    parser.add_argument("-r", "--resume", action="store_true",
+                        help="Resume a previously interrupted run, only requesting the pages it hadn't fetched yet.")
+    parser.add_argument("-p", "--plan", action="store_true",
+                        help="Dry run. Reports how many requests the run would send and how long they'd take under"
+                             " the configured rate limits, without fetching any data.")
 
     args = parser.parse_args()
     logger.info(args)
@@ -30,21 +37,34 @@ def main():
         logger.warning(f"Unsupported config type provided. Setting to default config type '{TOML_CONFIG_TYPE}' instead.")
         args.config_type = TOML_CONFIG_TYPE
 
-    args.timeframe = args.timeframe.lower()
-    if args.timeframe.lower() not in SUPPORTED_TIMEFRAMES:
-        logger.warning(f"Unsupported timeframe provided. Setting to default config type '{DAILY_TIMEFRAME}' instead.")
-        args.timeframe = DAILY_TIMEFRAME
+    timeframes = []
+    for timeframe in args.timeframe:
+        timeframe = timeframe.lower()
+        if timeframe not in SUPPORTED_TIMEFRAMES:
+            logger.warning(f"Unsupported timeframe provided. Setting to default config type '{DAILY_TIMEFRAME}' instead.")
+            timeframe = DAILY_TIMEFRAME
+        if timeframe not in timeframes:
+            timeframes.append(timeframe)
 
     config_file = '.'.join([CONFIG_FILE_NAME, args.config_type])
     config_file_path = join(dirname(__file__), config_file)
 
-    pipeline = JournalPipeline(
-        config_file_path,
-        args.start_date,
-        args.timeframe,
-        args.config_type
-    )
+    # overlapping timeframes share every request they have in common
+    request_coalescer = RequestCoalescer() if len(timeframes) > 1 else None
+    pipelines = [
+        JournalPipeline(
+            config_file_path,
+            args.start_date,
+            timeframe,
+            args.config_type,
+            request_coalescer=request_coalescer,
+            resume=args.resume,
+        ) for timeframe in timeframes
+    ]
 
-    pipeline.run()
+    if args.plan:
+        JournalPipeline.plan_all(pipelines)
+    else:
+        JournalPipeline.run_all(pipelines)
 
 if __name__ == "__main__":    main()
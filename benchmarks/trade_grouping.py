@@ -0,0 +1,115 @@
+# compares the position matcher against the former iterrows based trade grouping.
+# Run from the project's root: python -m benchmarks.trade_grouping [--sizes 10000 100000 1000000] [--legacy-max N]
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+# imported through data_helpers, which sets up the kpi functions module
+from src.data.data_helpers import build_trade_group_identifiers
+from src.utils.df_vars import (COL_NAME_SYMBOL, COL_NAME_ACTION, COL_NAME_SIDE, COL_NAME_QUANTITY,
+                               COL_NAME_CLOSED_SIZE, NEW_ORDER_ACTION_LABEL, STOP_LOSS_ACTION_LABEL,
+                               TAKE_PROFIT_ACTION_LABEL)
+
+SYMBOLS = [f"SYMBOL{index}USDT" for index in range(50)]
+
+def build_executions(size, seed=0):
+    # interleaved trades over several symbols: scaled in entries, partial take profits and a closing stop loss
+    rnd = random.Random(seed)
+    rows = []
+    open_trades = []
+    while len(rows) < size:
+        if not open_trades or (len(open_trades) < 20 and rnd.random() < 0.5):
+            symbol, side = rnd.choice(SYMBOLS), rnd.choice(["Long", "Short"])
+            if any(trade[0] == symbol and trade[1] == side for trade in open_trades):
+                continue
+            quantity = float(rnd.randint(1, 4))
+            open_trades.append([symbol, side, quantity])
+            rows.append((symbol, NEW_ORDER_ACTION_LABEL, side, quantity, 0.0))
+            continue
+
+        trade = rnd.choice(open_trades)
+        symbol, side, remaining = trade
+        closing_side = "Short" if side == "Long" else "Long"
+        if remaining > 1.0 and rnd.random() < 0.5:
+            trade[2] -= 1.0
+            rows.append((symbol, TAKE_PROFIT_ACTION_LABEL, closing_side, 1.0, 1.0))
+        else:
+            open_trades.remove(trade)
+            rows.append((symbol, STOP_LOSS_ACTION_LABEL, closing_side, remaining, remaining))
+
+    return pd.DataFrame(rows[:size], columns=[COL_NAME_SYMBOL, COL_NAME_ACTION, COL_NAME_SIDE, COL_NAME_QUANTITY,
+                                              COL_NAME_CLOSED_SIZE])
+
+def legacy_build_trade_group_identifiers(df):
+    # the former implementation, kept as the reference to compare against
+    trade_group = 0
+    invalid_group = -1
+
+    open_positions = {}
+    trade_groups = []
+    for _, row in df.iterrows():
+        symbol = row[COL_NAME_SYMBOL]
+        action = row[COL_NAME_ACTION]
+        side = row[COL_NAME_SIDE]
+        quantity = row[COL_NAME_QUANTITY]
+
+        open_pos_on_symbol = open_positions.get(symbol)
+        if open_pos_on_symbol is None:
+            open_positions[symbol] = {}
+            open_pos_on_symbol = open_positions[symbol]
+
+        if action == 'New Order':
+            if side not in open_pos_on_symbol.keys():
+                trade_group += 1
+                trade_groups += [trade_group]
+                open_positions[symbol] |= {side: {"group": trade_group, "remaining_quantity": quantity}}
+                continue
+
+            open_pos_on_symbol[side]['remaining_quantity'] += quantity
+            trade_groups += [open_pos_on_symbol[side]['group']]
+            continue
+
+        elif action in ['Take Profit', 'Stop Loss']:
+            side_to_deduct = "Short" if side == "Long" else "Long" if side == "Short" else "Invalid"
+            if side_to_deduct in open_pos_on_symbol.keys():
+                open_pos_on_symbol[side_to_deduct]['remaining_quantity'] -= float(row[COL_NAME_CLOSED_SIZE])
+                trade_groups += [open_pos_on_symbol[side_to_deduct]['group']]
+                if open_pos_on_symbol[side_to_deduct]['remaining_quantity'] == 0.0:
+                    open_pos_on_symbol.pop(side_to_deduct)
+                continue
+        trade_groups += [invalid_group]
+
+    df['Trade Group'] = trade_groups
+    return df
+
+def time_grouping(grouping_func, df):
+    start = time.perf_counter()
+    grouped_df = grouping_func(df.copy())
+    return time.perf_counter() - start, grouped_df['Trade Group'].to_numpy()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=None,
+                        help="Largest size the (slow) former implementation is run on. Defaults to the largest size.")
+    args = parser.parse_args()
+    legacy_max = args.legacy_max if args.legacy_max is not None else max(args.sizes)
+
+    print(f"{'executions':>12} {'legacy (s)':>12} {'matcher (s)':>12} {'speed-up':>10}")
+    for size in args.sizes:
+        df = build_executions(size)
+        matcher_time, matcher_groups = time_grouping(build_trade_group_identifiers, df)
+        if size > legacy_max:
+            print(f"{size:>12} {'-':>12} {matcher_time:>12.3f} {'-':>10}")
+            continue
+
+        legacy_time, legacy_groups = time_grouping(legacy_build_trade_group_identifiers, df)
+        if not np.array_equal(legacy_groups, matcher_groups):
+            raise AssertionError(f"Trade groups differ from the former implementation on {size} executions")
+        print(f"{size:>12} {legacy_time:>12.3f} {matcher_time:>12.3f} {legacy_time / matcher_time:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import math
+from typing import *
+from urllib.parse import urlparse
+
+from src.api.request_coalescer import RequestCoalescer
+from src.utils.config_vars import DEFAULT_RATE_LIMIT_PARAMS
+
+class RequestBudget:
+    # expected cost of a run, per endpoint: the requests it will send (from the pages each planned window is
+    # expected to hold) and the pages it will read back from the response cache instead
+    def __init__(self, rate_limit_params: Dict = None):
+        # user provided values take precedence over the defaults
+        self.rate_limit_params = DEFAULT_RATE_LIMIT_PARAMS | (rate_limit_params or {})
+        self.endpoints = {}
+        # windows already accounted for, per request key (endpoint and any non time param). As in a coalesced run,
+        # windows planned by several timeframes only cost the parts none of the others accounted for
+        self.windows = {}
+        # first pages requested while planning, to estimate the density of windows without page stats
+        self.probes = 0
+
+    @staticmethod
+    def get_endpoint_key(url: str):
+        return urlparse(url).path or url
+
+    @staticmethod
+    def split_params(params: Dict):
+        time_params = {"startTime", "endTime"}
+        return (params.get("startTime"), params.get("endTime"),
+                {key: value for key, value in params.items() if key not in time_params})
+
+    def get_gaps(self, url: str, params: Dict):
+        # the (start_time, end_time) parts of a window that would actually be requested, the rest is served by the
+        # windows already accounted for (see RequestCoalescer.fetch)
+        start_time, end_time, other_params = self.split_params(params)
+        windows = self.windows.get(RequestCoalescer.build_key(url, other_params), [])
+        return RequestCoalescer.get_gaps(start_time, end_time, [
+            window for window in windows if window[0] < end_time and window[1] > start_time])
+
+    def add_window(self, url: str, params: Dict, expected_pages: float = None, cached_pages: int = 0,
+                   fully_cached: bool = False):
+        # windows are expected to be gaps (see get_gaps), a window that's already accounted for costs nothing
+        start_time, end_time, other_params = self.split_params(params)
+        if not self.get_gaps(url, params):
+            return
+        self.windows.setdefault(RequestCoalescer.build_key(url, other_params), []).append(
+            [start_time, end_time, None])
+
+        endpoint_budget = self.endpoints.setdefault(self.get_endpoint_key(url),
+                                                    {"windows": 0, "requests": 0, "cached_pages": 0})
+        endpoint_budget["windows"] += 1
+        endpoint_budget["cached_pages"] += cached_pages
+        if not fully_cached:
+            # windows of unknown density are assumed to fit a single page, every window takes at least one request
+            endpoint_budget["requests"] += max(1, math.ceil((expected_pages or 1) - cached_pages))
+
+    def get_request_count(self):
+        return sum(endpoint_budget.get("requests") for endpoint_budget in self.endpoints.values())
+
+    def get_expected_duration(self):
+        # seconds. Endpoints are paced separately (and concurrently), each by its own token bucket which
+        # starts full, so the slowest endpoint sets the duration
+        requests_per_second = self.rate_limit_params.get("requests_per_second")
+        return max([max(0, endpoint_budget.get("requests") - requests_per_second) / requests_per_second
+                    for endpoint_budget in self.endpoints.values()], default=0.0)
+
+    def get_cache_hit_ratio(self):
+        cached_pages = sum(endpoint_budget.get("cached_pages") for endpoint_budget in self.endpoints.values())
+        pages = cached_pages + self.get_request_count()
+        if not pages:
+            return 0.0
+        return cached_pages / pages
@@ -0,0 +1,82 @@
+import asyncio
+from typing import *
+
+from src.logging.logger import Logger
+
+logger = Logger()
+
+class RequestCoalescer:
+    # shares fetched (start_time, end_time) windows, in epoch ms, between every caller in the process (eg. the daily,
+    # weekly and monthly journals of the same period). A requested window is served by the pieces already fetched
+    # (or in flight) that overlap it, and only the uncovered gaps get fetched, as new pieces the next callers can
+    # share in turn
+    def __init__(self):
+        # pieces per request key (endpoint, params), as [start_time, end_time, future] entries
+        self.pieces = {}
+        self.stats = {"requested": 0, "fetched": 0, "shared": 0}
+
+    @staticmethod
+    def build_key(endpoint: str, params: Dict = None):
+        return endpoint, tuple(sorted((params or {}).items()))
+
+    @staticmethod
+    def get_gaps(start_time: int, end_time: int, pieces: List[List]):
+        gaps = []
+        cursor = start_time
+        for piece_start, piece_end, _ in sorted(pieces, key=lambda piece: piece[0]):
+            if piece_start > cursor:
+                gaps += [(cursor, min(piece_start, end_time))]
+            cursor = max(cursor, piece_end)
+            if cursor >= end_time:
+                break
+        if cursor < end_time:
+            gaps += [(cursor, end_time)]
+        return gaps
+
+    def __register(self, key, start_time: int, end_time: int,
+                   fetch_window: Callable[[int, int], Awaitable[List[Dict]]]):
+        piece = [start_time, end_time, asyncio.ensure_future(fetch_window(start_time, end_time))]
+        self.pieces.setdefault(key, []).append(piece)
+
+        def forget_failed(future):
+            # a failed piece must not be served to later callers, they'll request it again
+            if future.cancelled() or future.exception() is not None:
+                self.pieces[key].remove(piece)
+
+        piece[2].add_done_callback(forget_failed)
+        return piece
+
+    async def fetch(self, key, start_time: int, end_time: int, time_col: str,
+                    fetch_window: Callable[[int, int], Awaitable[List[Dict]]]):
+        # fetch_window fetches the records of a single (start_time, end_time) window
+        self.stats["requested"] += 1
+        # pieces are looked up and registered before awaiting anything, so concurrent callers always see each other's
+        overlapping_pieces = [piece for piece in self.pieces.get(key, [])
+                              if piece[0] < end_time and piece[1] > start_time]
+        new_pieces = [self.__register(key, gap_start, gap_end, fetch_window)
+                      for gap_start, gap_end in self.get_gaps(start_time, end_time, overlapping_pieces)]
+        self.stats["shared"] += len(overlapping_pieces)
+        self.stats["fetched"] += len(new_pieces)
+        if overlapping_pieces:
+            logger.debug(f"Window ({start_time}, {end_time}) of '{key[0]}' served by {len(overlapping_pieces)}"
+                         f" shared piece(s) and {len(new_pieces)} new one(s)")
+
+        pieces = sorted(overlapping_pieces + new_pieces, key=lambda piece: piece[0])
+        # shielded so a caller giving up doesn't cancel a piece other callers are waiting on
+        results = await asyncio.gather(*[asyncio.shield(piece[2]) for piece in pieces])
+
+        records = []
+        for (piece_start, piece_end, _), piece_records in zip(pieces, results):
+            if start_time <= piece_start and piece_end <= end_time:
+                records += piece_records
+            else:
+                # a shared piece reaching past the requested window
+                records += [record for record in piece_records
+                            if record.get(time_col) and start_time <= int(record[time_col]) < end_time]
+        return records
+
+    def get_saved_ratio(self):
+        pieces = self.stats["fetched"] + self.stats["shared"]
+        if not pieces:
+            return 0.0
+        return self.stats["shared"] / pieces
@@ -1,23 +1,145 @@
+import asyncio
 import requests
 import time
 import hmac
 import hashlib
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
 from typing import *
+from src.api.request_scheduler import RequestScheduler
+from src.api.response_decoder import ResponseDecoder
+from src.api.response_cache import ResponseCache
+from src.api.retry_policy import RetryPolicy
 from src.logging.logger import Logger
-from src.utils.config_vars import HTTP_VALID_RESPONSE_CODES, API_VALID_INTERNAL_RESPONSE_CODES
+from src.utils.utils import get_date_timestamps
+from src.utils.config_vars import (HTTP_VALID_RESPONSE_CODES, API_VALID_INTERNAL_RESPONSE_CODES,
+                                   API_RATE_LIMIT_RESPONSE_CODES, DEFAULT_CONNECTION_PARAMS)
 import aiohttp
+from requests.adapters import HTTPAdapter
 
 logger = Logger()
 
+class IncompleteResponseError(Exception):
+    # a page of the cursor chain came back with a non valid (and non retryable) code, so every page past it is missing
+    def __init__(self, ret_code, ret_msg=""):
+        super().__init__(f"Unable to process request: code '{ret_code}', retMsg '{ret_msg}'")
+        self.ret_code = ret_code
+        # records of the pages fetched before the failed one, filled in by whoever was collecting them
+        self.records = []
+
+
 class RequestHandler:
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(self, api_key: str, api_secret: str, connection_params: Dict = None,
+                 rate_limit_params: Dict = None, retry_params: Dict = None, cache_params: Dict = None,
+                 decoding_schemas: Dict = None):
         if not api_key or not api_secret:
             missing_data = "api_key" if not api_key else "api_secret"
             raise ValueError(f"Unable to set up RequestHandler. Missing '{missing_data}'")
 
         self.api_key = api_key
         self.api_secret = api_secret
+        # user provided values take precedence over the defaults
+        self.connection_params = DEFAULT_CONNECTION_PARAMS | (connection_params or {})
+        self.scheduler = RequestScheduler(rate_limit_params)
+        self.retry_policy = RetryPolicy(retry_params)
+        self.response_cache = ResponseCache(cache_params)
+        self.decoder = ResponseDecoder(decoding_schemas)
+
+        self.session = None
+        # sync mode counterparts: a pooled requests session driven by a bounded thread pool
+        self.sync_session = None
+        self.executor = None
+        self.connection_stats = {"requests": 0, "created": 0, "reused": 0}
+
+    async def __aenter__(self):
+        await self.open_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close_session()
+
+    def __build_connector(self):
+        return aiohttp.TCPConnector(
+            limit=self.connection_params.get("limit"),
+            limit_per_host=self.connection_params.get("limit_per_host"),
+            keepalive_timeout=self.connection_params.get("keepalive_timeout"),
+            use_dns_cache=self.connection_params.get("ttl_dns_cache") > 0,
+            ttl_dns_cache=self.connection_params.get("ttl_dns_cache"),
+        )
+
+    def __build_trace_config(self):
+        # keeps track of how many requests were served by brand-new vs reused (keep-alive) connections
+        async def on_request_start(session, context, params):
+            self.connection_stats["requests"] += 1
+
+        async def on_connection_create_end(session, context, params):
+            self.connection_stats["created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.connection_stats["reused"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def __create_session(self):
+        compress_responses = self.connection_params.get("compress_responses")
+        headers = {"Accept-Encoding": "gzip, deflate"} if compress_responses else {}
+
+        return aiohttp.ClientSession(
+            connector=self.__build_connector(),
+            headers=headers,
+            auto_decompress=True,
+            timeout=aiohttp.ClientTimeout(total=self.connection_params.get("timeout")),
+            trace_configs=[self.__build_trace_config()],
+        )
+
+    def __create_sync_session(self):
+        # requests' connection pool is sized so every worker thread can keep its own connection alive
+        adapter = HTTPAdapter(pool_maxsize=self.connection_params.get("sync_workers"))
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if self.connection_params.get("compress_responses"):
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        return session
+
+    async def open_session(self, use_async=True):
+        # a single long-lived session (and connection pool) shared by every endpoint and date window
+        if not use_async:
+            if self.sync_session is None:
+                self.sync_session = self.__create_sync_session()
+                self.executor = ThreadPoolExecutor(max_workers=self.connection_params.get("sync_workers"),
+                                                   thread_name_prefix="request-handler")
+                logger.debug(f"Opened pooled sync session with connection params: {self.connection_params}")
+            return self.sync_session
+
+        if self.session is None or self.session.closed:
+            self.session = self.__create_session()
+            logger.debug(f"Opened pooled session with connection params: {self.connection_params}")
+        return self.session
+
+    def __close_sync_session(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.sync_session is not None:
+            self.sync_session.close()
+        self.sync_session = None
+        self.executor = None
+
+    async def close_session(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self.__close_sync_session()
+
+    def get_connection_reuse_ratio(self):
+        opened_connections = self.connection_stats["created"] + self.connection_stats["reused"]
+        if not opened_connections:
+            return 0.0
+        return self.connection_stats["reused"] / opened_connections
 
     def generate_signature(self, params):
         # generates an HMAC signature for the upcoming API request
@@ -32,13 +154,10 @@ class RequestHandler:
         date_dict = {}
         if date:
             # converts the date to the UNIX timestamp range specified by the user
-            start_date = datetime.strptime(date, "%Y-%m-%d")
-            start_time = int(start_date.timestamp())
-            end_time = int((start_date + timedelta(days=day_count)).timestamp())
-
+            start_time, end_time = get_date_timestamps(date, day_count)
             date_dict = {
-            "startTime": start_time * 1000,
-            "endTime": end_time * 1000,
+            "startTime": start_time,
+            "endTime": end_time,
             }
 
         main_params = {
@@ -52,63 +171,155 @@ class RequestHandler:
 
         return params
 
+    def check_rate_limit(self, url, response_json, headers=None):
+        # keeps the scheduler in sync with the exchange and flags requests rejected due to rate limits
+        self.scheduler.update_from_headers(url, headers)
+        if response_json.get("retCode") in API_RATE_LIMIT_RESPONSE_CODES:
+            self.scheduler.penalize(url, headers)
+            return True
+        return False
+
     async def process_request(self, session, url, params):
-        async with session.get(url, params=params) as response:
-            if response.status not in HTTP_VALID_RESPONSE_CODES:
-                response.raise_for_status()
-            return await response.json()
+        async with self.scheduler.slot(url):
+            async with session.get(url, params=params) as response:
+                if response.status not in HTTP_VALID_RESPONSE_CODES:
+                    self.scheduler.update_from_headers(url, response.headers)
+                    response.raise_for_status()
+                response_json = self.decoder.decode(url, await response.read())
+                self.check_rate_limit(url, response_json, response.headers)
+                return response_json
 
-    async def get_paginated_response(self, endpoint, additional_params, date, day_count=1, use_async=False):
+    def process_request_sync(self, url, params):
+        # blocking, meant to be run on one of the executor's worker threads
+        session = self.sync_session if self.sync_session is not None else requests
+        response = session.get(url, params=params, timeout=self.connection_params.get("timeout"))
+        if response.status_code not in HTTP_VALID_RESPONSE_CODES:
+            self.scheduler.update_from_headers(url, response.headers)
+            response.raise_for_status()
+        response_json = self.decoder.decode(url, response.content)
+        self.check_rate_limit(url, response_json, response.headers)
+        logger.debug(f"Response: {response.status_code}, {response.text}")
+        return response_json
+
+    async def __fetch_page(self, session, endpoint, page_params, date, day_count):
+        cache_params = self.build_request_params(page_params, date, day_count)
+        cached_response = self.response_cache.get(endpoint, cache_params)
+        if cached_response is not None:
+            logger.debug(f"Cached response found for '{endpoint}' (cursor '{page_params.get('cursor', '')}')")
+            # entries cached before a schema change are brought up to date
+            return self.decoder.type_response(endpoint, cached_response)
+
+        # a single page, retried as a whole (with freshly signed params) whenever it fails for a transient reason
+        async def request_page():
+            request_params = self.build_request_params(page_params, date, day_count)
+            logger.debug(f"Request params: {request_params}")
+
+            if session is not None:
+                response_json = await self.process_request(session, endpoint, request_params)
+            else:
+                async with self.scheduler.slot(endpoint):
+                    # sent from a worker thread so the event loop keeps every other window and endpoint going
+                    response_json = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.process_request_sync, endpoint, request_params)
+            self.retry_policy.check_response(response_json)
+            return response_json
+
+        response_json = await self.retry_policy.run(
+            request_page, description=f"'{endpoint}' (cursor '{page_params.get('cursor', '')}')")
+        if response_json.get("retCode") in API_VALID_INTERNAL_RESPONSE_CODES:
+            self.response_cache.set(endpoint, cache_params, response_json)
+        return response_json
+
+    async def __iter_pages(self, session, endpoint, additional_params, date, day_count):
+        page_params = dict(additional_params)
+        # a failed page is retried from its own cursor, every page fetched before it has already been yielded
+        next_page = asyncio.ensure_future(self.__fetch_page(session, endpoint, dict(page_params), date, day_count))
+        try:
+            while next_page is not None:
+                response_json = await next_page
+                next_page = None
+                if response_json.get("retCode") not in API_VALID_INTERNAL_RESPONSE_CODES:
+                    raise IncompleteResponseError(response_json.get("retCode"), response_json.get("retMsg", ""))
+
+                response_result = response_json.get('result', {})
+                page_cursor = page_params.get("cursor", "")
+                cursor = response_result.get('nextPageCursor', None)
+                logger.debug(f"Response: {response_json}")
+                if cursor:
+                    page_params["cursor"] = cursor
+                    # the next page is already in flight while the caller processes the current one
+                    next_page = asyncio.ensure_future(
+                        self.__fetch_page(session, endpoint, dict(page_params), date, day_count))
+
+                yield page_cursor, cursor or "", response_result.get('list', [])
+        finally:
+            # the caller stopped iterating early (or failed), the prefetched page is no longer needed
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    @asynccontextmanager
+    async def __use_session(self, use_async):
+        if not use_async:
+            # the pooled sync session is opened on first use (if it wasn't beforehand) and kept until close_session
+            await self.open_session(use_async=False)
+            yield None
+        elif self.session is not None and not self.session.closed:
+            yield self.session
+        else:
+            # no pooled session was opened beforehand, fall back to a short-lived one
+            async with self.__create_session() as session:
+                yield session
+
+    async def iter_paginated_response(self, endpoint, additional_params, date, day_count=1, use_async=False,
+                                      with_cursors=False):
+        # yields each page's records as soon as it arrives, so they can be processed while the next one is fetched.
+        # with_cursors yields (cursor, next_cursor, records) instead. A "cursor" additional param starts the chain
+        # midway
         if not endpoint:
             raise ValueError("Unable to process response without a valid endpoint")
         if day_count < 1:
             raise ValueError("day_count value must be higher than 0. At least 24 hours of data must be requested")
 
-        full_response = []
-        if use_async:
-            async with aiohttp.ClientSession() as session:
-                while True:
-                    request_params = self.build_request_params(additional_params, date, day_count)
-                    logger.debug(f"Request params: {request_params}")
-
-                    response_json = await self.process_request(session, endpoint, request_params)
-                    if response_json.get("retCode") not in API_VALID_INTERNAL_RESPONSE_CODES:
-                        logger.warning(
-                            f"Unable to process request: code '{response_json.get('retCode')}',"
-                            f" retMsg '{response_json.get('retMsg')}'"
-                        )
-                        return full_response
-
-                    response_result = response_json.get('result', {})
-                    cursor = response_result.get('nextPageCursor', None)
-
-                    full_response += response_result.get('list', [])
-                    if not cursor:
-                        break
-                    additional_params["cursor"] = cursor
-                    logger.debug(f"Async Response: {response_json}")
-        else:
-            while True:
-                request_params = self.build_request_params(additional_params, date, day_count)
-                logger.debug(f"Request params: {request_params}")
-                response = requests.get(endpoint, params=request_params)
+        async with self.__use_session(use_async) as session:
+            async with aclosing(self.__iter_pages(session, endpoint, additional_params, date, day_count)) as pages:
+                async for page_cursor, next_cursor, page in pages:
+                    yield (page_cursor, next_cursor, page) if with_cursors else page
 
-                if response.status_code not in HTTP_VALID_RESPONSE_CODES:
-                    response.raise_for_status()
+    async def get_first_page(self, endpoint, additional_params, use_async=False):
+        # a single page, used to probe how dense a window is. Returns its records and whether more pages follow
+        if not endpoint:
+            raise ValueError("Unable to process response without a valid endpoint")
 
-                response_json = response.json()
-                if response_json.get("retCode") not in API_VALID_INTERNAL_RESPONSE_CODES:
-                    logger.warning(f"Unable to process request: code '{response_json.get("retcode")}',"
-                                    f" retMsg '{response_json.get("retMsg")}'")
-                    return full_response
+        async with self.__use_session(use_async) as session:
+            response_json = await self.__fetch_page(session, endpoint, dict(additional_params), '', 1)
+        if response_json.get("retCode") not in API_VALID_INTERNAL_RESPONSE_CODES:
+            logger.warning(f"Unable to probe '{endpoint}': code '{response_json.get('retCode')}',"
+                           f" retMsg '{response_json.get('retMsg')}'")
+            return [], False
 
-                response_result = response_json.get('result', {})
-                cursor = response_result.get('nextPageCursor', None)
+        response_result = response_json.get('result', {})
+        return response_result.get('list', []), bool(response_result.get('nextPageCursor'))
+
+    def count_cached_pages(self, endpoint, additional_params):
+        # follows a window's cursor chain through the response cache, without sending any request.
+        # Returns how many of its pages are cached and whether the whole chain is
+        page_params = dict(additional_params)
+        cached_pages = 0
+        while True:
+            cached_response = self.response_cache.get(endpoint, self.build_request_params(page_params))
+            if cached_response is None:
+                return cached_pages, False
+            cached_pages += 1
+            cursor = (cached_response.get('result') or {}).get('nextPageCursor')
+            if not cursor:
+                return cached_pages, True
+            page_params["cursor"] = cursor
 
-                full_response += response_result.get('list',[])
-                if not cursor:
-                    break
-                additional_params["cursor"] = cursor
-                logger.debug(f"Response: {response.status_code}, {response.text}")
+    async def get_paginated_response(self, endpoint, additional_params, date, day_count=1, use_async=False):
+        full_response = []
+        async with aclosing(self.iter_paginated_response(endpoint, additional_params, date, day_count,
+                                                         use_async)) as pages:
+            async for page in pages:
+                full_response += page
 
         return full_response
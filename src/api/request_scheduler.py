@@ -0,0 +1,131 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import *
+from urllib.parse import urlparse
+
+from src.logging.logger import Logger
+from src.utils.config_vars import (DEFAULT_RATE_LIMIT_PARAMS, RATE_LIMIT_HEADER, RATE_LIMIT_STATUS_HEADER,
+                                   RATE_LIMIT_RESET_TIMESTAMP_HEADER)
+
+logger = Logger()
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError(f"Unable to set up TokenBucket. rate ('{rate}') and capacity ('{capacity}')"
+                             f" must be higher than 0")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # the exchange may tell us to hold off until a given moment, regardless of our own token count
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def __refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def get_wait_time(self):
+        self.__refill()
+        blocked_for = self.blocked_until - time.monotonic()
+        if blocked_for > 0:
+            return blocked_for
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        # the lock keeps waiters in FIFO order so no request gets starved
+        async with self.lock:
+            while True:
+                wait_time = self.get_wait_time()
+                if wait_time <= 0:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep(wait_time)
+
+    def update(self, limit: int = None, remaining: int = None, reset_timestamp: int = None):
+        # syncs the bucket with the limits reported back by the exchange
+        self.__refill()
+        if limit:
+            self.rate = float(limit)
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0:
+                self.block(reset_timestamp)
+
+    def block(self, reset_timestamp: int = None, default_delay: float = 1.0):
+        # reset_timestamp is the exchange's (epoch ms) moment at which its limit window resets
+        delay = max(0.0, (reset_timestamp / 1000) - time.time()) if reset_timestamp else default_delay
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+
+class RequestScheduler:
+    def __init__(self, rate_limit_params: Dict = None):
+        # user provided values take precedence over the defaults
+        self.rate_limit_params = DEFAULT_RATE_LIMIT_PARAMS | (rate_limit_params or {})
+
+        self.global_semaphore = asyncio.Semaphore(self.rate_limit_params.get("max_in_flight"))
+        self.endpoint_semaphores = {}
+        self.buckets = {}
+
+    @staticmethod
+    def get_endpoint_key(url: str):
+        # limits are applied per endpoint path, not per query
+        return urlparse(url).path or url
+
+    def get_bucket(self, url: str):
+        endpoint_key = self.get_endpoint_key(url)
+        if endpoint_key not in self.buckets:
+            requests_per_second = self.rate_limit_params.get("requests_per_second")
+            self.buckets[endpoint_key] = TokenBucket(rate=requests_per_second, capacity=requests_per_second)
+        return self.buckets[endpoint_key]
+
+    def __get_endpoint_semaphore(self, url: str):
+        endpoint_key = self.get_endpoint_key(url)
+        if endpoint_key not in self.endpoint_semaphores:
+            self.endpoint_semaphores[endpoint_key] = asyncio.Semaphore(
+                self.rate_limit_params.get("max_in_flight_per_endpoint"))
+        return self.endpoint_semaphores[endpoint_key]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        # caps in-flight requests globally and per endpoint, and paces them by the endpoint's token bucket.
+        # tokens are taken before the global slot so a throttled endpoint doesn't hold back the others
+        async with self.__get_endpoint_semaphore(url):
+            await self.get_bucket(url).acquire()
+            async with self.global_semaphore:
+                yield
+
+    def update_from_headers(self, url: str, headers):
+        if not headers:
+            return
+
+        try:
+            limit, remaining, reset_timestamp = [
+                int(headers.get(header)) if headers.get(header) is not None else None
+                for header in [RATE_LIMIT_HEADER, RATE_LIMIT_STATUS_HEADER, RATE_LIMIT_RESET_TIMESTAMP_HEADER]
+            ]
+        except (TypeError, ValueError) as err:
+            logger.debug(f"Unable to parse rate limit headers for '{url}': {err}")
+            return
+
+        self.get_bucket(url).update(limit, remaining, reset_timestamp)
+
+    def penalize(self, url: str, headers=None):
+        # called once the exchange has rejected a request for exceeding its rate limit
+        reset_timestamp = None
+        if headers and headers.get(RATE_LIMIT_RESET_TIMESTAMP_HEADER) is not None:
+            try:
+                reset_timestamp = int(headers.get(RATE_LIMIT_RESET_TIMESTAMP_HEADER))
+            except (TypeError, ValueError):
+                reset_timestamp = None
+
+        self.get_bucket(url).block(reset_timestamp)
+        logger.warning(f"Rate limit reached for '{self.get_endpoint_key(url)}'. Holding off further requests")
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import *
+from urllib.parse import urlparse
+
+from src.logging.logger import Logger
+from src.utils.config_vars import DEFAULT_CACHE_PARAMS, VOLATILE_REQUEST_PARAMS
+
+logger = Logger()
+
+class ResponseCache:
+    def __init__(self, cache_params: Dict = None):
+        # user provided values take precedence over the defaults
+        self.cache_params = DEFAULT_CACHE_PARAMS | (cache_params or {})
+
+        self.enabled = bool(self.cache_params.get("enabled"))
+        self.cache_dir = self.cache_params.get("cache_dir")
+        self.ttl = self.cache_params.get("ttl")
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def build_key(endpoint: str, request_params: Dict):
+        # content addressed by endpoint path and every param that shapes the response (window, cursor, account, ...)
+        # signature and timestamp change on every request, hence are left out
+        key_params = {key: value for key, value in request_params.items() if key not in VOLATILE_REQUEST_PARAMS}
+        key_material = json.dumps({"path": urlparse(endpoint).path, "params": key_params}, sort_keys=True,
+                                  default=str)
+        return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+    def get_path(self, key: str):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def is_expired(self, path: str, request_params: Dict):
+        cached_at = os.path.getmtime(path)
+        end_time = request_params.get("endTime")
+        # a window that had already closed by the time it was cached can't change anymore
+        if end_time and int(end_time) / 1000 < cached_at - self.ttl:
+            return False
+        return time.time() - cached_at > self.ttl
+
+    def contains(self, endpoint: str, request_params: Dict):
+        if not self.enabled:
+            return False
+        path = self.get_path(self.build_key(endpoint, request_params))
+        return os.path.isfile(path) and not self.is_expired(path, request_params)
+
+    def get(self, endpoint: str, request_params: Dict):
+        if not self.enabled:
+            return None
+
+        path = self.get_path(self.build_key(endpoint, request_params))
+        if not os.path.isfile(path) or self.is_expired(path, request_params):
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            with gzip.open(path, "rb") as file:
+                payload = json.loads(file.read())
+        except (OSError, ValueError) as err:
+            logger.warning(f"Unable to read cached response '{path}', it will be fetched again: {err}")
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return payload
+
+    def set(self, endpoint: str, request_params: Dict, payload: Dict):
+        if not self.enabled:
+            return
+
+        path = self.get_path(self.build_key(endpoint, request_params))
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # written to a temporary file first so a crash never leaves a truncated entry behind
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wb") as file:
+            file.write(json.dumps(payload).encode("utf-8"))
+        os.replace(temp_path, path)
+
+    def get_hit_ratio(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        if not lookups:
+            return 0.0
+        return self.stats["hits"] / lookups
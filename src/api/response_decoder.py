@@ -0,0 +1,53 @@
+import json
+from typing import *
+from urllib.parse import urlparse
+
+# orjson is an optional, faster drop-in for the stdlib decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class ResponseDecoder:
+    # decodes raw response bytes and types every record of the response's 'list' by the schema declared for its
+    # endpoint, so numbers are parsed once (instead of on every later pass) and repeated values
+    # (symbols, sides, order types, ...) share a single interned string
+    def __init__(self, schemas: Dict[str, Dict[str, Callable]] = None):
+        # schemas keyed by endpoint path, each mapping field names to their converter (int, float, sys.intern, ...)
+        self.schemas = {urlparse(endpoint).path or endpoint: list(schema.items())
+                        for endpoint, schema in (schemas or {}).items()}
+
+    @staticmethod
+    def loads(payload: Union[bytes, str]):
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+    def get_schema(self, url: str):
+        return self.schemas.get(urlparse(url).path or url)
+
+    @staticmethod
+    def type_record(record: Dict, schema: List[Tuple[str, Callable]]):
+        for field, convert in schema:
+            value = record.get(field)
+            if value is None or value == "":
+                continue
+            try:
+                record[field] = convert(value)
+            except (TypeError, ValueError):
+                # values the schema doesn't account for are kept as they came
+                pass
+        return record
+
+    def type_response(self, url: str, response_json: Dict):
+        schema = self.get_schema(url)
+        response_result = response_json.get("result") if isinstance(response_json, dict) else None
+        if not schema or not isinstance(response_result, dict):
+            return response_json
+
+        for record in response_result.get("list") or []:
+            self.type_record(record, schema)
+        return response_json
+
+    def decode(self, url: str, payload: Union[bytes, str]):
+        return self.type_response(url, self.loads(payload))
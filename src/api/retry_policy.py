@@ -0,0 +1,70 @@
+import asyncio
+import random
+from typing import *
+
+import aiohttp
+import requests
+
+from src.logging.logger import Logger
+from src.utils.config_vars import DEFAULT_RETRY_PARAMS
+
+logger = Logger()
+
+class RetryableResponseError(Exception):
+    def __init__(self, ret_code, ret_msg=""):
+        super().__init__(f"Request failed with retryable code '{ret_code}', retMsg '{ret_msg}'")
+        self.ret_code = ret_code
+
+
+class RetryPolicy:
+    def __init__(self, retry_params: Dict = None):
+        # user provided values take precedence over the defaults
+        self.retry_params = DEFAULT_RETRY_PARAMS | (retry_params or {})
+
+        if self.retry_params.get("max_attempts") < 1:
+            raise ValueError("Unable to set up RetryPolicy. max_attempts must be higher than 0")
+
+        self.retryable_http_codes = set(self.retry_params.get("retryable_http_codes"))
+        self.retryable_ret_codes = set(self.retry_params.get("retryable_ret_codes"))
+
+    def check_response(self, response_json: Dict):
+        # raises on internal api codes that are worth another attempt (eg. rate limits or server timeouts)
+        ret_code = response_json.get("retCode")
+        if ret_code in self.retryable_ret_codes:
+            raise RetryableResponseError(ret_code, response_json.get("retMsg", ""))
+
+    @staticmethod
+    def get_status_code(exc: Exception):
+        # aiohttp, requests and urllib errors all carry the HTTP status under a different attribute
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status
+        response = getattr(exc, "response", None)
+        if response is not None and getattr(response, "status_code", None) is not None:
+            return response.status_code
+        return getattr(exc, "code", None)
+
+    def is_retryable(self, exc: Exception):
+        if isinstance(exc, RetryableResponseError):
+            return True
+        if isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError,
+                            requests.ConnectionError, requests.Timeout)):
+            return True
+        return self.get_status_code(exc) in self.retryable_http_codes
+
+    def get_delay(self, attempt: int):
+        # exponential backoff with "full jitter" so concurrent retries don't hit the exchange in lockstep
+        max_delay = min(self.retry_params.get("max_delay"), self.retry_params.get("base_delay") * (2 ** (attempt - 1)))
+        return random.uniform(0, max_delay)
+
+    async def run(self, request_func: Callable[[], Awaitable], description: str = ""):
+        max_attempts = self.retry_params.get("max_attempts")
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return await request_func()
+            except Exception as exc:
+                if not self.is_retryable(exc) or attempt >= max_attempts:
+                    raise
+                delay = self.get_delay(attempt)
+                logger.warning(f"Attempt {attempt}/{max_attempts} failed for {description}: {exc}."
+                               f" Retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
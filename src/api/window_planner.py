@@ -0,0 +1,159 @@
+import asyncio
+import json
+import math
+import os
+from pathlib import Path
+from typing import *
+
+from src.logging.logger import Logger
+from src.utils.config_vars import DEFAULT_WINDOW_PLANNER_PARAMS
+
+logger = Logger()
+
+class WindowPlanner:
+    # reshapes the (start_time, end_time) request windows, in epoch ms, based on how many pages each is expected
+    # to hold: sparse windows are merged up to the api's max span, dense ones are split into smaller windows that
+    # can be fetched in parallel, so no single cursor chain grows longer than max_chain_length pages
+    def __init__(self, planner_params: Dict = None, stats_path: str = None):
+        # user provided values take precedence over the defaults
+        self.planner_params = DEFAULT_WINDOW_PLANNER_PARAMS | (planner_params or {})
+
+        self.enabled = bool(self.planner_params.get("enabled"))
+        # spans are configured in seconds
+        self.max_window_span = int(self.planner_params.get("max_window_span") * 1000)
+        self.min_window_span = int(self.planner_params.get("min_window_span") * 1000)
+        self.max_chain_length = self.planner_params.get("max_chain_length")
+        self.history_size = self.planner_params.get("history_size")
+
+        if self.min_window_span <= 0 or self.max_window_span < self.min_window_span:
+            raise ValueError("Unable to set up WindowPlanner. min_window_span must be higher than 0 and not higher"
+                             " than max_window_span")
+        if self.max_chain_length < 1:
+            raise ValueError("Unable to set up WindowPlanner. max_chain_length must be higher than 0")
+
+        # pages observed on previously fetched windows, kept per dataset
+        self.stats_path = stats_path
+        self.stats = self.__load()
+        # observations recorded since the stats were loaded
+        self.recorded_stats = {}
+
+    def __load(self):
+        if not self.stats_path or not os.path.isfile(self.stats_path):
+            return {}
+        with open(self.stats_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def save(self):
+        if not self.stats_path:
+            return
+        # the stats file is shared by every pipeline fetching the account (eg. coalesced timeframes), this planner's
+        # observations are appended to whatever they saved since it was loaded rather than overwriting it
+        saved_stats = self.__load()
+        for dataset, observations in self.recorded_stats.items():
+            saved_stats[dataset] = (saved_stats.get(dataset, []) + observations)[-self.history_size:]
+        self.stats = saved_stats
+        self.recorded_stats = {}
+
+        Path(self.stats_path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{self.stats_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.stats, file, indent=4)
+        os.replace(temp_path, self.stats_path)
+
+    def record(self, dataset: str, start_time: int, end_time: int, pages: int):
+        if end_time <= start_time:
+            return
+        observations = self.stats.setdefault(dataset, [])
+        observations.append([start_time, end_time, pages])
+        # only the most recent activity is representative of what's coming next
+        self.stats[dataset] = observations[-self.history_size:]
+        self.recorded_stats.setdefault(dataset, []).append([start_time, end_time, pages])
+
+    def estimate_pages(self, dataset: str, start_time: int, end_time: int):
+        observations = self.stats.get(dataset)
+        if not observations:
+            return None
+        observed_span = sum(observation_end - observation_start
+                            for observation_start, observation_end, _ in observations)
+        observed_pages = sum(pages for _, _, pages in observations)
+        return (observed_pages / observed_span) * (end_time - start_time)
+
+    @staticmethod
+    def estimate_pages_from_probe(records: List[Dict], has_more: bool, time_col: str, start_time: int,
+                                  end_time: int):
+        # the first page holds the most recent records of the window, the time range it spans tells how dense
+        # the rest of the window is
+        if not has_more:
+            return 1 if records else 0
+        record_times = [int(record[time_col]) for record in records if record.get(time_col)]
+        if not record_times:
+            return None
+        covered_span = max(1, end_time - min(record_times))
+        return (end_time - start_time) / covered_span
+
+    def merge_windows(self, windows: List[Tuple[int, int]]):
+        # contiguous windows are joined and re-sliced into the largest windows the api accepts
+        merged_windows = []
+        for start_time, end_time in sorted(windows):
+            if merged_windows and start_time <= merged_windows[-1][1]:
+                merged_windows[-1] = (merged_windows[-1][0], max(end_time, merged_windows[-1][1]))
+            else:
+                merged_windows += [(start_time, end_time)]
+
+        return [
+            (window_start, min(window_start + self.max_window_span, end_time))
+            for start_time, end_time in merged_windows
+            for window_start in range(start_time, end_time, self.max_window_span)
+        ]
+
+    def split_window(self, start_time: int, end_time: int, expected_pages: float):
+        if expected_pages is None or expected_pages <= self.max_chain_length:
+            return [(start_time, end_time)]
+
+        split_count = math.ceil(expected_pages / self.max_chain_length)
+        split_span = max(self.min_window_span, math.ceil((end_time - start_time) / split_count))
+        return [
+            (window_start, min(window_start + split_span, end_time))
+            for window_start in range(start_time, end_time, split_span)
+        ]
+
+    def split_estimate(self, start_time: int, end_time: int, expected_pages: float):
+        # windows a window is split into, along with their share of its expected pages
+        return [
+            ((window_start, window_end), None if expected_pages is None else
+             expected_pages * (window_end - window_start) / (end_time - start_time))
+            for window_start, window_end in self.split_window(start_time, end_time, expected_pages)
+        ]
+
+    async def estimate_windows(self, dataset: str, windows: List[Tuple[int, int]], time_col: str,
+                               probe: Callable[[int, int], Awaitable[Tuple[List[Dict], bool]]] = None):
+        # pages each window is expected to hold (None if unknown), from the previously fetched windows or a probe
+        async def estimate_pages(start_time, end_time):
+            expected_pages = self.estimate_pages(dataset, start_time, end_time)
+            if expected_pages is None and probe is not None:
+                records, has_more = await probe(start_time, end_time)
+                expected_pages = self.estimate_pages_from_probe(records, has_more, time_col, start_time, end_time)
+            return expected_pages
+
+        expected_pages = await asyncio.gather(*[estimate_pages(start_time, end_time)
+                                                for start_time, end_time in windows])
+        return list(zip(windows, expected_pages))
+
+    async def plan(self, dataset: str, windows: List[Tuple[int, int]], time_col: str,
+                   probe: Callable[[int, int], Awaitable[Tuple[List[Dict], bool]]] = None,
+                   with_estimates: bool = False):
+        # probe fetches the first page of a window, returning its records and whether there are more pages.
+        # with_estimates returns (window, expected_pages) pairs instead of the windows alone
+        if not self.enabled or not windows:
+            return list(windows)
+
+        estimated_windows = await self.estimate_windows(dataset, self.merge_windows(windows), time_col, probe)
+        planned_windows = [
+            planned_window
+            for (start_time, end_time), window_pages in estimated_windows
+            for planned_window in self.split_estimate(start_time, end_time, window_pages)
+        ]
+        logger.debug(f"Planned {len(planned_windows)} '{dataset}' window(s) out of {len(windows)}"
+                     f" (expected pages: {[window_pages for _, window_pages in estimated_windows]})")
+
+        return planned_windows if with_estimates else [window for window, _ in planned_windows]
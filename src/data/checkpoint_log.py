@@ -0,0 +1,79 @@
+import json
+import os
+from pathlib import Path
+from typing import *
+
+from src.logging.logger import Logger
+
+logger = Logger()
+
+class CheckpointLog:
+    # append-only log (json lines) of every page fetched during a run, keyed by (endpoint, window params, cursor).
+    # A run interrupted midway (crash, Ctrl-C, lost connectivity) and started again with resume replays the logged
+    # pages and only requests the ones it was missing. The log is cleared once the run fetches everything
+    def __init__(self, log_path: str, resume: bool = False):
+        if not log_path:
+            raise ValueError("Unable to set up CheckpointLog without a valid log file path")
+        self.log_path = log_path
+        # window plans (per stats key) and pages (per key) logged so far
+        self.plans = {}
+        self.pages = {}
+        self.stats = {"replayed": 0, "logged": 0}
+
+        if resume:
+            self.__load()
+        elif os.path.isfile(self.log_path):
+            logger.info(f"Discarding the checkpoint log of a previous run ('{self.log_path}'). Run with --resume to"
+                        f" pick it up instead")
+            os.remove(self.log_path)
+
+    @staticmethod
+    def build_key(endpoint: str, params: Dict, cursor: str = ""):
+        return json.dumps([endpoint, sorted(params.items()), cursor or ""])
+
+    def __load(self):
+        if not os.path.isfile(self.log_path):
+            return
+        with open(self.log_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may have been cut short by the interruption
+                    continue
+                if entry.get("type") == "plan":
+                    self.plans[entry.get("key")] = [tuple(window) for window in entry.get("windows")]
+                else:
+                    self.pages[entry.get("key")] = (entry.get("next_cursor"), entry.get("records"))
+        logger.info(f"Resuming from {len(self.pages)} page(s) checkpointed on a previous run")
+
+    def __append(self, entry: Dict):
+        Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def get_plan(self, stats_key: str):
+        return self.plans.get(stats_key)
+
+    def record_plan(self, stats_key: str, windows: List[Tuple[int, int]]):
+        # planned windows depend on the page stats at the time, they're logged so resumed pages keep matching
+        self.plans[stats_key] = list(windows)
+        self.__append({"type": "plan", "key": stats_key, "windows": windows})
+
+    def get_page(self, endpoint: str, params: Dict, cursor: str = ""):
+        # (next_cursor, records) of a page logged beforehand, if any
+        page = self.pages.get(self.build_key(endpoint, params, cursor))
+        if page is not None:
+            self.stats["replayed"] += 1
+        return page
+
+    def record_page(self, endpoint: str, params: Dict, cursor: str, next_cursor: str, records: List[Dict]):
+        key = self.build_key(endpoint, params, cursor)
+        self.pages[key] = (next_cursor, records)
+        self.stats["logged"] += 1
+        self.__append({"type": "page", "key": key, "next_cursor": next_cursor, "records": records})
+
+    def clear(self):
+        self.plans, self.pages = {}, {}
+        if os.path.isfile(self.log_path):
+            os.remove(self.log_path)
@@ -1,50 +1,68 @@
 from copy import deepcopy
-import json
+from dateutil.tz import tzlocal
 from src.data.custom_df_functions import *
 from src.data.kpi_functions import (build_roi, get_win_trades, get_win_trades_by_group, build_acc_pnl,
                                     build_profit_factor, build_trade_group_identifiers, get_stopped_out_count,
                                     get_risk_managed_count, get_trades_by_asset_count, get_trades_by_session_count)
-from src.utils.utils import remove_matched_elements
+from src.utils.utils import remove_matched_elements, humanize_durations
 from src.data.decorators import with_preemptive_function, get_matches_in_map
+from src.data.filter_rules import build_column_mask, build_row_mask, build_labels
+from src.data.trade_aggregator import build_aggregated_view
+from src.logging.logger import Logger
 from src.utils.df_vars import COL_NAME_EXEC_DATE
-from src.utils.config_vars import DEFAULT_DATE_FORMAT
 
-def filter_content(account_stats, relevant_params, transaction_time_col_name):
-    relevant_content = []
+logger = Logger()
 
-    for stat in account_stats:
-        stat_content = {}
-        if relevant_params:
-            for param in relevant_params:
-                stat_content[param] = stat.get(param, None)
-        else:
-            stat_content = deepcopy(stat)
+def build_exec_dates(transaction_times):
+    # epoch ms timestamps to (local, second precision) datetimes in a single vectorized pass. Missing or unparsable
+    # timestamps become NaT
+    exec_dates = pd.to_datetime(pd.to_numeric(transaction_times, errors="coerce"), unit="ms", utc=True)
+    return exec_dates.dt.tz_convert(tzlocal()).dt.tz_localize(None).dt.floor("s")
 
-        if stat_content.get(transaction_time_col_name):
-            stat_content["execDate"] = (datetime.fromtimestamp(int(stat_content[transaction_time_col_name]) / 1000).
-                                         strftime(DEFAULT_DATE_FORMAT))
-        relevant_content.append(stat_content)
+def filter_content(stats_df, relevant_params, transaction_time_col_name):
+    # projection is done at column level, missing columns are filled with NaN
+    if relevant_params:
+        stats_df = stats_df.reindex(columns=relevant_params)
 
-    return relevant_content
+    if transaction_time_col_name in stats_df.columns:
+        stats_df["execDate"] = build_exec_dates(stats_df[transaction_time_col_name])
+
+    return stats_df
 
 def build_dataframe_data(trades_content):
-    if not trades_content:
+    if trades_content is None or len(trades_content) == 0:
         return
 
+    if isinstance(trades_content, pd.DataFrame):
+        # read back from the record store, missing values come as NaN like they would after building the dataframe
+        return trades_content.reset_index(drop=True)
     trades_df = pd.DataFrame(trades_content)
     #sorted_df = trades_df.sort_values(by=["execDate"], ascending=True)
 
     return trades_df
 
-def build_relevant_dataset(account_data, relevant_params, transaction_time_col_name): # which can be trades or transaction log data
-    if account_data:
-        account_stats = filter_content(account_data, relevant_params, transaction_time_col_name)
-        print(json.dumps(account_stats, indent=4))
-        stats_df = build_dataframe_data(account_stats)
+def build_relevant_dataset(account_data, relevant_params, transaction_time_col_name, dataset_label="dataset"): # which can be trades or transaction log data
+    # account_data can either be the raw list of records or a dataframe read from the record store
+    stats_df = build_dataframe_data(account_data)
+    if stats_df is not None:
+        stats_df = filter_content(stats_df, relevant_params, transaction_time_col_name)
+        # opt-in (see the config's [logging] section), serialized only when enabled
+        logger.dump_payload(dataset_label, stats_df)
 
         return stats_df
     else:
-        print("No trades found for the given date.")
+        logger.info("No trades found for the given date.")
+
+def get_balance_transfers(transaction_log_df, transfer_types, type_col_name="type", amount_col_name="change",
+                          date_col_name="execDate"):
+    # deposits (> 0) and withdrawals (< 0) found in the transaction log, as a date indexed series of amounts. They are
+    # filtered out along with every other non trade row, so they have to be picked up before that
+    required_col_names = {type_col_name, amount_col_name, date_col_name}
+    if transaction_log_df is None or not required_col_names <= set(transaction_log_df.columns):
+        return pd.Series(dtype=float)
+    transfers_df = transaction_log_df[transaction_log_df[type_col_name].isin(transfer_types)]
+    return pd.Series(pd.to_numeric(transfers_df[amount_col_name], errors="coerce").fillna(0.0).to_numpy(dtype=float),
+                     index=pd.DatetimeIndex(transfers_df[date_col_name])).sort_index()
 
 def merge_datasets(df1, df2, merge_type, merge_col):
     cols_to_use = list(df2.columns.difference(df1.columns)) + [merge_col]
@@ -64,17 +82,14 @@ def trim_fill_dataset(df, columns_to_keep, default_type: str = 'string'):
 
 #1
 @with_preemptive_function(get_matches_in_map)
-def filter_dataset(df, filter_map_in_df, filter_row_list):
+def filter_dataset(df, filter_map_in_df, filter_row_list, order_action_rules=()):
     # column level filters
 
-    # combine filter conditions dynamically
-    condition = pd.Series(True, index=df.index)  # start with all True
-    for col, func in filter_map_in_df.items():
-        condition &= df[col].apply(func)
-    filtered_df = df.loc[condition]
+    # combine filter conditions dynamically, each rule is compiled into a vectorized mask
+    filtered_df = df.loc[build_column_mask(df, filter_map_in_df)]
 
     # row level filters
-    filtered_df = filtered_df[filtered_df.apply(lambda row: all(custom_func(row) for custom_func in filter_row_list), axis=1)]
+    filtered_df = filtered_df[build_row_mask(filtered_df, filter_row_list)]
 
     # rows that did not match the filtering rule
     # edges cases are usually automatically removed positions (a tp from a trade that got stopped out or vice versa)
@@ -82,10 +97,10 @@ def filter_dataset(df, filter_map_in_df, filter_row_list):
     #edge_cases = filtered_df[~filtered_df.apply(lambda row: all(custom_func(row) for custom_func in filter_row_list), axis=1)]
 
     filtered_df["cashFlow"] = pd.to_numeric(filtered_df["cashFlow"])
-    filtered_df["orderAction"] = filtered_df.apply(set_order_action, axis=1)
+    # every row is classified at once, by the first order action rule it matches
+    filtered_df["orderAction"] = build_labels(filtered_df, order_action_rules, UNKNOWN_ACTION_LABEL)
     filtered_df["side"] = filtered_df["side"].map({"Buy": "Long", "Sell": "Short"})
-    # sort dataset by date
-    filtered_df["execDate"] = pd.to_datetime(df['execDate'], format=DEFAULT_DATE_FORMAT)
+    # sort dataset by date (already parsed into datetimes when normalized)
     filtered_df = filtered_df.sort_values(by=["execDate"], ascending=True)
 
     return filtered_df
@@ -111,7 +126,7 @@ def astype_dataset(df, typing_map_in_df):
 
 #4
 @with_preemptive_function(get_matches_in_map)
-def apply_kpis_to_dataset(df, kpi_map={}):
+def apply_kpis_to_dataset(df, kpi_map={}, now=None, balance_transfers=None):
     # adds the ROI(%) column
     identified_pos_df = build_trade_group_identifiers(
         pd.DataFrame(deepcopy(df.to_dict())))
@@ -119,14 +134,12 @@ def apply_kpis_to_dataset(df, kpi_map={}):
 
     # filter invalid trades (TP/SLs without an associated New Order)
 
-    detailed_df = build_roi(identified_pos_df)
+    detailed_df = build_roi(identified_pos_df, balance_transfers)
     # wins, total_trades = build_win_trades(detailed_df)
     # pnl = build_acc_pnl(detailed_df)
     # profit_factor = build_profit_factor(detailed_df)
 
-    aggregated_df = pd.DataFrame(deepcopy(detailed_df.to_dict()))
-    aggregated_df[COL_NAME_TRADE_SESSION] = pd.Series(dtype=object)
-    aggregated_df = identified_pos_df.groupby('Trade Group').apply(process_group).reset_index(drop=True)
+    aggregated_df = build_aggregated_view(identified_pos_df, now=now)
 
     return detailed_df, aggregated_df #, wins, total_trades, pnl, profit_factor
 
@@ -135,9 +148,17 @@ def apply_kpis_to_dataset(df, kpi_map={}):
 def round_truncate_dataset(df, round_map_in_df):
     return df.apply(lambda row: apply_format(row, round_map_in_df), axis=1)
 
+def humanize_duration_columns(df):
+    duration_colnames = df.select_dtypes(include="timedelta").columns
+    if duration_colnames.empty:
+        return df
+    return df.assign(**{colname: humanize_durations(df[colname]) for colname in duration_colnames})
+
 #6
 @with_preemptive_function(get_matches_in_map)
 def format_dataset(df, format_map_in_df):
+    # durations stay numeric until rendered, all at once
+    df = humanize_duration_columns(df)
     return df.apply(lambda row: apply_format(row, format_map_in_df), axis=1)
 
 def build_high_level_stats(detailed_df, aggregated_df, profits_col_name):
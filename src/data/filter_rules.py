@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from typing import *
+
+### declarative dataframe filter rules ###
+# column rules are (rule, *args) tuples applied to a single column, row rules are (rule, *columns) tuples applied to
+# the whole dataframe. Both compile to functions building a boolean mask in a single vectorized pass. Plain
+# callables (a per value function for column rules, a per row one for row rules) are still supported, on a slow path
+
+EQUALS_RULE = "equals"
+NOT_NULL_RULE = "not_null"
+GREATER_THAN_RULE = "greater_than"
+IN_SET_RULE = "in_set"
+COLUMNS_EQUAL_RULE = "columns_equal"
+
+COLUMN_RULE_MASKS = {
+    EQUALS_RULE: lambda series, value: series == value,
+    NOT_NULL_RULE: lambda series: series.notna(),
+    GREATER_THAN_RULE: lambda series, value: series > value,
+    IN_SET_RULE: lambda series, values: series.isin(values),
+}
+
+ROW_RULE_MASKS = {
+    COLUMNS_EQUAL_RULE: lambda df, left_col, right_col: df[left_col] == df[right_col],
+}
+
+def compile_column_rule(rule) -> Callable[[pd.Series], pd.Series]:
+    if callable(rule):
+        return lambda series: series.apply(rule)
+
+    rule_name, *rule_args = rule
+    if rule_name not in COLUMN_RULE_MASKS:
+        raise ValueError(f"Unable to compile column filter rule '{rule_name}'. Supported rules:"
+                         f" {', '.join(COLUMN_RULE_MASKS)}")
+    build_mask = COLUMN_RULE_MASKS.get(rule_name)
+    return lambda series: build_mask(series, *rule_args)
+
+def compile_row_rule(rule) -> Callable[[pd.DataFrame], pd.Series]:
+    if callable(rule):
+        # reduced so an empty dataframe still results in an (empty) mask
+        return lambda df: df.apply(lambda row: bool(rule(row)), axis=1, result_type="reduce").astype(bool)
+
+    rule_name, *rule_args = rule
+    if rule_name not in ROW_RULE_MASKS:
+        raise ValueError(f"Unable to compile row filter rule '{rule_name}'. Supported rules:"
+                         f" {', '.join(ROW_RULE_MASKS)}")
+    build_mask = ROW_RULE_MASKS.get(rule_name)
+    return lambda df: build_mask(df, *rule_args)
+
+def build_column_mask(df: pd.DataFrame, column_rules: Dict):
+    mask = pd.Series(True, index=df.index)
+    for col, rule in column_rules.items():
+        mask &= compile_column_rule(rule)(df[col])
+    return mask
+
+def build_row_mask(df: pd.DataFrame, row_rules: List):
+    mask = pd.Series(True, index=df.index)
+    for rule in row_rules:
+        mask &= compile_row_rule(rule)(df)
+    return mask
+
+def build_labels(df: pd.DataFrame, labelled_rules: List[Tuple[str, Dict]], default_label: str):
+    # each row gets the label of the first (label, column_rules) entry it matches, default_label if none
+    if not labelled_rules:
+        return pd.Series(default_label, index=df.index, dtype=object)
+    masks = [build_column_mask(df, column_rules).to_numpy(dtype=bool) for _, column_rules in labelled_rules]
+    return pd.Series(np.select(masks, [label for label, _ in labelled_rules], default=default_label),
+                     index=df.index, dtype=object)
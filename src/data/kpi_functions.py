@@ -1,9 +1,11 @@
-from src.data.custom_df_functions import calculate_roi
+from src.data.position_matcher import match_trade_groups
 import pandas as pd
 from src.utils.config import COL_NAME_CLOSED_SIZE, COL_NAME_SYMBOL, COL_NAME_ACTION, COL_NAME_SIDE, COL_NAME_QUANTITY
-from src.utils.df_vars import COL_NAME_ROI_PERCENT, COL_NAME_ACC_BALANCE, COL_NAME_REALIZED_PROFIT, \
-    COL_NAME_TRADE_STATUS, COL_NAME_STOPPED_OUT, COL_NAME_RISK_MANAGED, COL_NAME_TRADE_SESSION
-from collections import Counter
+from src.utils.df_vars import COL_NAME_EXEC_DATE, COL_NAME_ROI_PERCENT, COL_NAME_ACC_BALANCE, \
+    COL_NAME_REALIZED_PROFIT, COL_NAME_TRADE_STATUS, COL_NAME_STOPPED_OUT, COL_NAME_RISK_MANAGED, \
+    COL_NAME_TRADE_SESSION
+from src.utils.session_vars import TRADE_SESSION_BITS
+import numpy as np
 
 def get_win_trades_by_group(id_groupped_df, pnl_col_to_sum=COL_NAME_REALIZED_PROFIT):
     trade_results = id_groupped_df.groupby('Trade Group')[pnl_col_to_sum].sum()
@@ -28,20 +30,36 @@ def get_risk_managed_count(df, column_name=COL_NAME_RISK_MANAGED):
 def get_trades_by_asset_count(df, column_name=COL_NAME_SYMBOL):
     return df.groupby(column_name).size().to_dict()
 
-def get_trades_by_session_count(df, column_name=COL_NAME_TRADE_SESSION):
-    flattened_items = [item for sublist in df[column_name].dropna() for item in sublist]
-    session_counts = Counter(flattened_items)
-
-    return dict(session_counts)
-
-def build_roi(df):
-    #df['ROI'] = df["Wallet Balance"].astype(float).diff().fillna(0.0)
-    previous_balance = df[COL_NAME_ACC_BALANCE].shift(1)
-    #df['ROI(%)'] = df.apply(lambda row:
-    #                        ((row["Realized Profit"] * 100.0) / previous_balance[row.name])
-    #                        if previous_balance[row.name] else 0.0, axis=1).fillna(0.0)
-
-    df[COL_NAME_ROI_PERCENT] = df.apply(lambda row: calculate_roi(row, previous_balance), axis=1)
+def get_trades_by_session_count(df, column_name=COL_NAME_TRADE_SESSION, session_bits=TRADE_SESSION_BITS):
+    # session column holds a bitmask of sessions per trade
+    session_masks = df[column_name].dropna().to_numpy(dtype=np.int64)
+    session_counts = {session: int(np.count_nonzero(session_masks & session_bit))
+                      for session, session_bit in session_bits.items()}
+
+    return {session: count for session, count in session_counts.items() if count}
+
+def get_transfers_between(balance_transfers, dates):
+    # net amount transferred in (or out) of the account after the previous date and up to each date. Transfers are a
+    # date indexed series of amounts (deposits > 0, withdrawals < 0)
+    balance_transfers = balance_transfers.sort_index()
+    transferred_until = np.concatenate(([0.0], balance_transfers.to_numpy(dtype=float).cumsum()))
+    transfer_dates = balance_transfers.index.to_numpy(dtype="datetime64[ns]")
+    transferred_until = pd.Series(transferred_until[np.searchsorted(transfer_dates, dates.to_numpy(
+        dtype="datetime64[ns]"), side="right")], index=dates.index)
+    return transferred_until - transferred_until.shift(1)
+
+# builds roi while (optionally) leaving any account top up / withdrawals out of it
+def build_roi(df, balance_transfers=None, profit_colname=COL_NAME_REALIZED_PROFIT,
+              acc_balance_colname=COL_NAME_ACC_BALANCE, date_colname=COL_NAME_EXEC_DATE):
+    profits, balances = df[profit_colname], df[acc_balance_colname]
+    previous_balance = balances.shift(1)
+    if balance_transfers is not None and not balance_transfers.empty:
+        # the balance a row starts from includes whatever got transferred since the previous one
+        previous_balance = previous_balance + get_transfers_between(balance_transfers, df[date_colname])
+
+    # rows without a previous balance (the first one) are measured against their own balance
+    df[COL_NAME_ROI_PERCENT] = ((profits * 100.0) / previous_balance).where(
+        previous_balance.notna(), - 100 + ((profits + balances) * 100.0) / balances)
     return df
 
 def build_acc_pnl(df, profit_col_name = COL_NAME_REALIZED_PROFIT,
@@ -77,55 +95,12 @@ def build_profit_factor(df, profit_colname=COL_NAME_REALIZED_PROFIT, decimal_cas
 """
 
 def build_trade_group_identifiers(df):
-    trade_group = 0
-    invalid_group = -1
-
-    open_positions = {}
-    trade_groups = []
-    for _, row in df.iterrows():
-        symbol = row[COL_NAME_SYMBOL]
-        action = row[COL_NAME_ACTION]
-        side = row[COL_NAME_SIDE]
-        quantity = row[COL_NAME_QUANTITY]
-
-        open_pos_on_symbol = open_positions.get(symbol)
-        if open_pos_on_symbol is None:
-            open_positions[symbol] = {}
-            open_pos_on_symbol = open_positions[symbol]
-
-        if action == 'New Order':
-            if side not in open_pos_on_symbol.keys():
-                # no open position for that  side found, therefore
-                # sets new group identifier
-                trade_group += 1
-                # adds new group id to the list
-                trade_groups += [trade_group]
-                # new dict item for a new trade entry
-                new_order_data = {
-                    side: {
-                        "group": trade_group,
-                        "remaining_quantity": quantity
-                    }
-                }
-                open_positions[symbol] |= new_order_data
-                continue
-
-            open_pos_on_symbol[side]['remaining_quantity'] += quantity
-            trade_groups += [open_pos_on_symbol[side]['group']]
-            continue
-
-        elif action in ['Take Profit', 'Stop Loss']:
-            side_to_deduct = "Short" if side == "Long" else "Long" if side == "Short" else "Invalid"
-            if side_to_deduct in open_pos_on_symbol.keys():
-                # an ongoing trade exists to TP/SL from
-                open_pos_on_symbol[side_to_deduct]['remaining_quantity'] -= float(row[COL_NAME_CLOSED_SIZE]) #quantity
-                trade_groups += [open_pos_on_symbol[side_to_deduct]['group']]
-                if open_pos_on_symbol[side_to_deduct]['remaining_quantity'] == 0.0:
-                    open_pos_on_symbol.pop(side_to_deduct)
-                continue
-        # found a take profit / stop loss without a matching trade (potentially belongs to a different dataset, pass
-        # or an invalid trade
-        trade_groups += [invalid_group]
-
-    df['Trade Group'] = trade_groups
+    # executions are matched into trades by the (sequential) position matcher, over plain column arrays
+    df['Trade Group'] = match_trade_groups(
+        df[COL_NAME_SYMBOL].to_numpy(),
+        df[COL_NAME_ACTION].to_numpy(),
+        df[COL_NAME_SIDE].to_numpy(),
+        df[COL_NAME_QUANTITY].to_numpy(),
+        df[COL_NAME_CLOSED_SIZE].to_numpy(),
+    )
     return df
\ No newline at end of file
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from typing import *
+
+from src.utils.df_vars import NEW_ORDER_ACTION_LABEL, STOP_LOSS_ACTION_LABEL, TAKE_PROFIT_ACTION_LABEL
+
+INVALID_TRADE_GROUP = -1
+NO_TRADE_GROUP = 0
+
+OPEN_ACTION = 0
+CLOSE_ACTION = 1
+OTHER_ACTION = 2
+
+ACTION_CODES = {
+    NEW_ORDER_ACTION_LABEL: OPEN_ACTION,
+    TAKE_PROFIT_ACTION_LABEL: CLOSE_ACTION,
+    STOP_LOSS_ACTION_LABEL: CLOSE_ACTION,
+}
+
+# closing orders deduct from the position of the opposite side. Any other side can't be closed
+OPPOSITE_SIDES = {"Long": "Short", "Short": "Long"}
+INVALID_SIDE = "Invalid"
+
+def get_opposite_side_codes(side_labels):
+    side_codes = {side: code for code, side in enumerate(side_labels)}
+    return np.array([side_codes.get(OPPOSITE_SIDES.get(side, INVALID_SIDE), -1) for side in side_labels],
+                    dtype=np.int64)
+
+def match_trade_groups(symbols, actions, sides, quantities, closed_sizes):
+    # walks the executions in order, grouping every new order with the open position of its side (on its symbol) and
+    # matching closing orders against the open position of the opposite side. Positions are kept as flat
+    # (group, remaining quantity) slots per symbol and side code. Returns the trade group of every execution,
+    # INVALID_TRADE_GROUP for the ones without a matching position
+    symbol_codes, _ = pd.factorize(pd.Series(symbols, dtype=object), use_na_sentinel=False)
+    side_codes, side_labels = pd.factorize(pd.Series(sides, dtype=object), use_na_sentinel=False)
+    action_codes = pd.Series(actions, dtype=object).map(ACTION_CODES).fillna(OTHER_ACTION).to_numpy(dtype=np.int64)
+    opposite_side_codes = get_opposite_side_codes(side_labels)[side_codes] if len(side_labels) else side_codes
+
+    side_count = max(len(side_labels), 1)
+    slot_count = (int(symbol_codes.max()) + 1 if len(symbol_codes) else 0) * side_count
+    open_groups = [NO_TRADE_GROUP] * slot_count
+    remaining_quantities = [0.0] * slot_count
+    closed_sizes = list(closed_sizes)
+
+    trade_group = 0
+    trade_groups = [INVALID_TRADE_GROUP] * len(symbol_codes)
+    for index, (symbol_code, action_code, side_code, opposite_side_code, quantity) in enumerate(zip(
+            symbol_codes.tolist(), action_codes.tolist(), side_codes.tolist(), opposite_side_codes.tolist(),
+            list(quantities))):
+        if action_code == OPEN_ACTION:
+            slot = symbol_code * side_count + side_code
+            if open_groups[slot] == NO_TRADE_GROUP:
+                # no open position for that side, a new trade starts
+                trade_group += 1
+                open_groups[slot] = trade_group
+                remaining_quantities[slot] = quantity
+            else:
+                remaining_quantities[slot] += quantity
+            trade_groups[index] = open_groups[slot]
+
+        elif action_code == CLOSE_ACTION and opposite_side_code >= 0:
+            slot = symbol_code * side_count + opposite_side_code
+            if open_groups[slot] != NO_TRADE_GROUP:
+                # an ongoing trade exists to TP/SL from
+                remaining_quantities[slot] -= float(closed_sizes[index])
+                trade_groups[index] = open_groups[slot]
+                if remaining_quantities[slot] == 0.0:
+                    open_groups[slot] = NO_TRADE_GROUP
+        # anything else is a take profit / stop loss without a matching trade (potentially belongs to a different
+        # dataset pass) or an invalid trade
+
+    return np.array(trade_groups, dtype=np.int64)
@@ -0,0 +1,28 @@
+from typing import *
+
+class RecordDeduplicator:
+    # drops records already ingested (eg. the ones sitting right on the boundary of two adjacent windows, which the
+    # api returns in both), identified by their dataset's key columns. A single set lookup per record
+    def __init__(self, key_cols: List[str]):
+        if not key_cols:
+            raise ValueError("Unable to set up RecordDeduplicator without any key columns")
+        self.key_cols = key_cols
+        self.seen_keys = set()
+        self.dropped = 0
+
+    def get_key(self, record: Dict):
+        key = tuple(record.get(col) for col in self.key_cols)
+        # records missing part of their key can't be told apart, hence are always kept
+        return None if any(value is None or value == "" for value in key) else key
+
+    def filter(self, records: List[Dict]):
+        unique_records = []
+        for record in records:
+            key = self.get_key(record)
+            if key is not None:
+                if key in self.seen_keys:
+                    self.dropped += 1
+                    continue
+                self.seen_keys.add(key)
+            unique_records.append(record)
+        return unique_records
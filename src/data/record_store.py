@@ -0,0 +1,196 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import *
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.logging.logger import Logger
+
+logger = Logger()
+
+STORE_DATE_FORMAT = "%Y-%m-%d"
+# partition value used for records without a symbol (eg. transfers in the transaction log)
+EMPTY_SYMBOL_PARTITION = "_"
+
+class RecordStore:
+    # raw api records kept on disk as gzip compressed json lines, one file per dataset and (UTC) day
+    def __init__(self, data_dir: str):
+        if not data_dir:
+            raise ValueError("Unable to set up RecordStore without a valid data directory")
+        self.data_dir = data_dir
+
+    @staticmethod
+    def get_day(timestamp: int):
+        return datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).strftime(STORE_DATE_FORMAT)
+
+    @staticmethod
+    def get_record_key(record: Dict, key_cols: List[str]):
+        return tuple(str(record.get(col)) for col in key_cols)
+
+    def get_path(self, dataset: str, day: str):
+        return os.path.join(self.data_dir, dataset, f"{day}.jsonl.gz")
+
+    def __read_day(self, dataset: str, day: str):
+        path = self.get_path(dataset, day)
+        if not os.path.isfile(path):
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def __write_day(self, dataset: str, day: str, records: List[Dict]):
+        path = self.get_path(dataset, day)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # written to a temporary file first so a crash never leaves a truncated partition behind
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+        os.replace(temp_path, path)
+
+    def write(self, dataset: str, records: List[Dict], time_col: str, key_cols: List[str]):
+        records_by_day = {}
+        for record in records:
+            if not record.get(time_col):
+                logger.warning(f"Unable to store {dataset} record without a '{time_col}' value: {record}")
+                continue
+            records_by_day.setdefault(self.get_day(record[time_col]), []).append(record)
+
+        for day, day_records in records_by_day.items():
+            # newly fetched records replace previously stored ones with the same key
+            merged_records = {self.get_record_key(record, key_cols): record
+                              for record in self.__read_day(dataset, day) + day_records}
+            sorted_records = sorted(merged_records.values(), key=lambda record: int(record[time_col]))
+            self.__write_day(dataset, day, sorted_records)
+
+    def get_days(self, start_time: int, end_time: int):
+        # every (UTC) day partition overlapping [start_time, end_time)
+        day = datetime.strptime(self.get_day(start_time), STORE_DATE_FORMAT)
+        last_day = datetime.strptime(self.get_day(max(start_time, end_time - 1)), STORE_DATE_FORMAT)
+
+        days = []
+        while day <= last_day:
+            days += [day.strftime(STORE_DATE_FORMAT)]
+            day += timedelta(days=1)
+        return days
+
+    def read(self, dataset: str, start_time: int, end_time: int, time_col: str):
+        # records whose time falls within [start_time, end_time), oldest first
+        records = []
+        for day in self.get_days(start_time, end_time):
+            records += [record for record in self.__read_day(dataset, day)
+                        if start_time <= int(record[time_col]) < end_time]
+
+        return records
+
+    def read_frame(self, dataset: str, start_time: int, end_time: int, time_col: str, columns: List[str] = None):
+        records_df = pd.DataFrame(self.read(dataset, start_time, end_time, time_col))
+        if columns and not records_df.empty:
+            records_df = records_df[[col for col in records_df.columns if col in set(columns) | {time_col}]]
+        return records_df
+
+
+class ParquetRecordStore(RecordStore):
+    # raw api records kept on disk as columnar parquet files, partitioned by dataset, (UTC) day and symbol:
+    # <data_dir>/<dataset>/day=<YYYY-mm-dd>/symbol=<symbol>/data.parquet
+    PARTITION_FILE_NAME = "data.parquet"
+
+    def get_path(self, dataset: str, day: str, symbol: str = EMPTY_SYMBOL_PARTITION):
+        return os.path.join(self.data_dir, dataset, f"day={day}", f"symbol={symbol}", self.PARTITION_FILE_NAME)
+
+    @staticmethod
+    def get_symbol_partition(record: Dict):
+        return record.get("symbol") or EMPTY_SYMBOL_PARTITION
+
+    @staticmethod
+    def build_table(records: List[Dict]):
+        # every column gets its type inferred on its own, so records missing some of the fields don't matter
+        col_names = list(dict.fromkeys(key for record in records for key in record.keys()))
+        columns = {}
+        for col_name in col_names:
+            values = [record.get(col_name) for record in records]
+            try:
+                column = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                column = pa.array([str(value) if value is not None else None for value in values])
+            columns[col_name] = column.cast(pa.string()) if pa.types.is_null(column.type) else column
+        return pa.Table.from_pydict(columns)
+
+    def __read_partition(self, path: str, columns: List[str] = None):
+        # read as a single file, the partition values are already known from the path
+        parquet_file = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [col for col in parquet_file.schema_arrow.names if col in set(columns)]
+        return parquet_file.read(columns=columns)
+
+    def write(self, dataset: str, records: List[Dict], time_col: str, key_cols: List[str]):
+        records_by_partition = {}
+        for record in records:
+            if not record.get(time_col):
+                logger.warning(f"Unable to store {dataset} record without a '{time_col}' value: {record}")
+                continue
+            partition = (self.get_day(record[time_col]), self.get_symbol_partition(record))
+            records_by_partition.setdefault(partition, []).append(record)
+
+        for (day, symbol), partition_records in records_by_partition.items():
+            path = self.get_path(dataset, day, symbol)
+            # the symbol lives in the partition path, not in the file
+            stored_records = self.__read_partition(path).to_pylist() if os.path.isfile(path) else []
+            stored_records = [record | {"symbol": partition_records[0].get("symbol")} for record in stored_records]
+
+            # newly fetched records replace previously stored ones with the same key
+            merged_records = {self.get_record_key(record, key_cols): record
+                              for record in stored_records + partition_records}
+            sorted_records = sorted(merged_records.values(), key=lambda record: int(record[time_col]))
+            table = self.build_table([{key: value for key, value in record.items() if key != "symbol"}
+                                      for record in sorted_records])
+
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            # written to a temporary file first so a crash never leaves a truncated partition behind
+            temp_path = f"{path}.tmp"
+            pq.write_table(table, temp_path, compression="zstd")
+            os.replace(temp_path, path)
+
+    def read_frame(self, dataset: str, start_time: int, end_time: int, time_col: str, columns: List[str] = None):
+        # only the day partitions overlapping the range get scanned (predicate pushdown on the date range)
+        # and only the requested columns get read (column projection)
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + [time_col]))
+
+        frames = []
+        for day in self.get_days(start_time, end_time):
+            day_dir = os.path.join(self.data_dir, dataset, f"day={day}")
+            if not os.path.isdir(day_dir):
+                continue
+            for symbol_dir in sorted(os.listdir(day_dir)):
+                path = os.path.join(day_dir, symbol_dir, self.PARTITION_FILE_NAME)
+                if not os.path.isfile(path):
+                    continue
+                partition_df = self.__read_partition(path, columns).to_pandas(integer_object_nulls=True)
+                if columns is None or "symbol" in columns:
+                    symbol = symbol_dir.removeprefix("symbol=")
+                    partition_df["symbol"] = "" if symbol == EMPTY_SYMBOL_PARTITION else symbol
+                frames += [partition_df]
+
+        if not frames:
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+
+        records_df = pd.concat(frames, ignore_index=True)
+        record_times = pd.to_numeric(records_df[time_col])
+        records_df = records_df[(record_times >= start_time) & (record_times < end_time)]
+        return records_df.sort_values(by=time_col, key=pd.to_numeric, kind="stable").reset_index(drop=True)
+
+    def read(self, dataset: str, start_time: int, end_time: int, time_col: str):
+        records_df = self.read_frame(dataset, start_time, end_time, time_col)
+        # missing fields come back as nulls, drop them so records look like they did when fetched
+        return [{key: value for key, value in record.items() if value is not None and not pd.isna(value)}
+                for record in records_df.astype(object).to_dict("records")]
+
+
+RECORD_STORE_FORMATS = {
+    "json": RecordStore,
+    "parquet": ParquetRecordStore,
+}
@@ -0,0 +1,76 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import *
+
+class SyncState:
+    # per dataset (ie. per endpoint) time range, in epoch ms, whose records have been fully ingested.
+    # "to" is the dataset's high-water mark
+    def __init__(self, state_path: str):
+        if not state_path:
+            raise ValueError("Unable to set up SyncState without a valid state file path")
+        self.state_path = state_path
+        self.state = self.__load()
+
+    def __load(self):
+        if not os.path.isfile(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def save(self):
+        # the state file is shared by every pipeline syncing the account (eg. coalesced timeframes), whatever they
+        # saved since it was loaded is merged in rather than overwritten
+        for dataset, coverage in self.__load().items():
+            self.add_coverage(dataset, coverage.get("from"), coverage.get("to"))
+
+        Path(self.state_path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, indent=4)
+        os.replace(temp_path, self.state_path)
+
+    def get_coverage(self, dataset: str):
+        coverage = self.state.get(dataset)
+        if not coverage:
+            return None
+        return coverage.get("from"), coverage.get("to")
+
+    def get_missing_windows(self, dataset: str, windows: List[Tuple[int, int]]):
+        # trims every (start_time, end_time) window down to the parts that haven't been ingested yet
+        coverage = self.get_coverage(dataset)
+        if not coverage:
+            return list(windows)
+
+        covered_from, covered_to = coverage
+        missing_windows = []
+        for start_time, end_time in windows:
+            if end_time <= covered_from or start_time >= covered_to:
+                missing_windows += [(start_time, end_time)]
+                continue
+            if start_time < covered_from:
+                missing_windows += [(start_time, covered_from)]
+            if end_time > covered_to:
+                missing_windows += [(covered_to, end_time)]
+
+        return missing_windows
+
+    def mark_synced(self, dataset: str, start_time: int, end_time: int, sync_lag: int = 0):
+        # records from the last sync_lag seconds may still be settling on the exchange side, so they're never marked
+        end_time = min(end_time, int((time.time() - sync_lag) * 1000))
+        self.add_coverage(dataset, start_time, end_time)
+
+    def add_coverage(self, dataset: str, start_time: int, end_time: int):
+        if end_time <= start_time:
+            return
+
+        coverage = self.get_coverage(dataset)
+        if coverage and start_time <= coverage[1] and end_time >= coverage[0]:
+            # contiguous with what was already ingested, extend it
+            start_time, end_time = min(start_time, coverage[0]), max(end_time, coverage[1])
+        elif coverage and end_time < coverage[0]:
+            # an older, disjoint range. Keep tracking the most recent one
+            return
+
+        self.state[dataset] = {"from": start_time, "to": end_time}
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import *
+
+from src.utils.df_vars import *
+from src.utils.utils import get_decimal_cases
+from src.utils.session_tagger import tag_sessions
+import src.utils.config_vars as vars
+from src.logging.logger import Logger
+
+logger = Logger()
+
+TRADE_GROUP_COL_NAME = "Trade Group"
+
+# numpy sums up to 7 values one by one and pairwise from there, the threshold a single Series.sum() switches at
+PAIRWISE_SUM_MIN_SIZE = 8
+
+# compact, fixed size record of a trade, filled column-wise by the aggregation and turned into the aggregated view
+# in one go. Optional values come with a flag telling whether the trade has them
+TRADE_SUMMARY_DTYPE = np.dtype([
+    ("first_row", np.int64),
+    ("entry_price", np.float64),
+    ("entry_date", "datetime64[ns]"),
+    ("quantity", np.float64),
+    ("gross_profit", np.float64),
+    ("realized_profit", np.float64),
+    ("preset_sl", np.float64),
+    ("preset_sl_set", np.bool_),
+    ("stopped_at", np.float64),
+    ("stopped_at_set", np.bool_),
+    ("stopped_out", np.bool_),
+    ("preset_tp", np.float64),
+    ("preset_tp_set", np.bool_),
+    ("exit_price", np.float64),
+    ("exit_price_set", np.bool_),
+    ("closed", np.bool_),
+    ("closed_date", "datetime64[ns]"),
+    ("status", np.int64),
+    ("risk", np.float64),
+    ("risk_set", np.bool_),
+    ("risk_managed", np.bool_),
+    ("take_profits", object),
+    ("sessions", np.uint8),
+    ("duration", "timedelta64[ns]"),
+])
+
+# aggregated view column: (trade summary field, field flagging whether it's set, value of the trades it isn't set on)
+AGGREGATED_VIEW_FIELDS = {
+    COL_NAME_EXEC_PRICE: ("entry_price",),
+    COL_NAME_EXEC_DATE: ("entry_date",),
+    COL_NAME_QUANTITY: ("quantity",),
+    COL_NAME_GROSS_PROFIT: ("gross_profit",),
+    COL_NAME_REALIZED_PROFIT: ("realized_profit",),
+    COL_NAME_SL_SET: ("preset_sl", "preset_sl_set", pd.NA),
+    COL_NAME_SL_TRIGGERED: ("stopped_at", "stopped_at_set", pd.NA),
+    COL_NAME_EXIT_PRICE: ("exit_price", "exit_price_set", ''),
+    COL_NAME_TP_SET: ("preset_tp", "preset_tp_set", pd.NA),
+    COL_NAME_TAKE_PROFITS: ("take_profits",),
+    COL_NAME_IS_CLOSED: ("closed",),
+    COL_NAME_CLOSED_DATE: ("closed_date", "closed", ''),
+    COL_NAME_TRADE_DURATION: ("duration",),
+    COL_NAME_TRADE_STATUS: ("status",),
+    COL_NAME_RISK_TAKEN: ("risk", "risk_set", pd.NA),
+    COL_NAME_RISK_MANAGED: ("risk_managed",),
+    COL_NAME_STOPPED_OUT: ("stopped_out",),
+    COL_NAME_TRADE_SESSION: ("sessions",),
+}
+
+### aggregated (one row per trade group) KPIs, computed column-wise over the whole dataframe ###
+# rows are sorted by group beforehand (keeping their date order within it), so every group is a contiguous slice
+# and per group values are built from masked, whole column arrays instead of a Series per group
+
+def get_group_slices(group_codes, group_count):
+    group_sizes = np.bincount(group_codes, minlength=group_count)
+    return np.cumsum(group_sizes) - group_sizes, group_sizes
+
+def get_first_rows(group_codes, group_count, rows_filter=None):
+    # position of the first (filtered) row of every group, -1 for the groups without any
+    positions = np.flatnonzero(rows_filter) if rows_filter is not None else np.arange(len(group_codes))
+    groups, first_indices = np.unique(group_codes[positions], return_index=True)
+    first_rows = np.full(group_count, -1, dtype=np.int64)
+    first_rows[groups] = positions[first_indices]
+    return first_rows
+
+def sum_by_group(values, group_codes, group_count, rows_filter=None):
+    # NaNs are skipped. Values are added in the same order a Series.sum() of each group adds them, so sums (and
+    # anything compared against or rounded from them) stay identical to a per group computation
+    values = np.asarray(values, dtype=float)
+    values = np.where(np.isnan(values), 0.0, values)
+    if rows_filter is not None:
+        values, group_codes = values[rows_filter], group_codes[rows_filter]
+    group_starts, group_sizes = get_group_slices(group_codes, group_count)
+
+    sums = np.zeros(group_count)
+    for position in range(PAIRWISE_SUM_MIN_SIZE - 1):
+        groups = np.flatnonzero((group_sizes > position) & (group_sizes < PAIRWISE_SUM_MIN_SIZE))
+        if not len(groups):
+            break
+        sums[groups] += values[group_starts[groups] + position]
+    for group in np.flatnonzero(group_sizes >= PAIRWISE_SUM_MIN_SIZE):
+        sums[group] = values[group_starts[group]:group_starts[group] + group_sizes[group]].sum()
+    return sums
+
+def round_by_group(values, decimal_cases):
+    rounded_values = np.array(values, dtype=float)
+    for decimals in np.unique(decimal_cases):
+        decimals_filter = decimal_cases == decimals
+        rounded_values[decimals_filter] = np.round(rounded_values[decimals_filter], int(decimals))
+    return rounded_values
+
+def get_first_values(values, first_rows, default=np.nan):
+    # values of the first (filtered) row of every group and whether the group had any
+    found = first_rows >= 0
+    return np.where(found, values[np.where(found, first_rows, 0)], default), found
+
+# closed KPIs of a close type (SL or TP): preset close order (first one set on a new order, kept only if the trade
+# got closed by that type), price of the order fully closing the position and total size closed, per group
+def get_closed_kpis(df, group_codes, group_count, new_order_rows, closed_rows, close_type_colname: str):
+    preset_close_orders = df[close_type_colname]
+    preset_rows = new_order_rows & preset_close_orders.notna().to_numpy() & (preset_close_orders != '').to_numpy()
+    first_preset_rows = get_first_rows(group_codes, group_count, preset_rows)
+    first_preset_rows[np.bincount(group_codes[closed_rows], minlength=group_count) == 0] = -1
+    preset_close_order = np.full(group_count, np.nan)
+    preset_close_order_set = first_preset_rows >= 0
+    preset_close_order[preset_close_order_set] = [float(value) for value in preset_close_orders.to_numpy(
+        dtype=object)[first_preset_rows[preset_close_order_set]]]
+
+    remaining_sizes = pd.to_numeric(df[COL_NAME_REM_SIZE], errors="coerce").to_numpy(dtype=float)
+    fully_closed_price, fully_closed = get_first_values(
+        df[COL_NAME_EXEC_PRICE].astype(float).to_numpy(),
+        get_first_rows(group_codes, group_count, closed_rows & (remaining_sizes == 0.0)))
+
+    closed_size = sum_by_group(df[COL_NAME_CLOSED_SIZE], group_codes, group_count, closed_rows)
+    return (preset_close_order, preset_close_order_set), (fully_closed_price, fully_closed), closed_size
+
+def get_average_weighted_exits(df, group_codes, group_count, closed_rows, total_closed_size, decimal_cases):
+    # closed sizes are weighted by the total closed size of their trade, as long as anything got closed
+    weights = np.where(total_closed_size > 0.0, total_closed_size, 1.0)[group_codes]
+    weighted_exits = (df[COL_NAME_CLOSED_SIZE].to_numpy(dtype=float) / weights) *\
+        df[COL_NAME_EXEC_PRICE].to_numpy(dtype=float)
+    return round_by_group(sum_by_group(weighted_exits, group_codes, group_count, closed_rows), decimal_cases)
+
+def build_trade_summaries(df, group_codes, group_count, now: datetime) -> np.ndarray:
+    # fills a TRADE_SUMMARY_DTYPE record per trade group. df and group_codes MUST be sorted by group
+    trade_summaries = np.zeros(group_count, dtype=TRADE_SUMMARY_DTYPE)
+    group_starts, group_sizes = get_group_slices(group_codes, group_count)
+    trade_summaries["first_row"] = group_starts
+    last_rows = group_starts + group_sizes - 1
+
+    new_order_rows, stop_loss_rows, take_profit_rows = [(df[COL_NAME_ACTION] == action).to_numpy() for action in [
+        NEW_ORDER_ACTION_LABEL,
+        STOP_LOSS_ACTION_LABEL,
+        TAKE_PROFIT_ACTION_LABEL
+    ]]
+
+    # entry values are the ones of the first new order
+    trade_summaries["entry_price"] = df[COL_NAME_EXEC_PRICE].astype(float).to_numpy()[
+        get_first_rows(group_codes, group_count, new_order_rows)]
+    decimal_cases = np.array([get_decimal_cases(price) for price in trade_summaries["entry_price"].tolist()],
+                             dtype=np.int64)
+    entry_kpis = df[new_order_rows].groupby(group_codes[new_order_rows]).agg(
+        entry_date=(COL_NAME_EXEC_DATE, "min"))
+    trade_summaries["entry_date"] = entry_kpis["entry_date"].to_numpy()
+    trade_summaries["sessions"] = tag_sessions(entry_kpis["entry_date"])
+
+    trade_summaries["quantity"] = sum_by_group(df[COL_NAME_QUANTITY], group_codes, group_count, new_order_rows)
+    trade_summaries["gross_profit"] = np.round(sum_by_group(df[COL_NAME_GROSS_PROFIT], group_codes, group_count), 2)
+    trade_summaries["realized_profit"] = np.round(sum_by_group(df[COL_NAME_REALIZED_PROFIT], group_codes,
+                                                               group_count), 2)
+
+    (trade_summaries["preset_sl"], trade_summaries["preset_sl_set"]), \
+        (trade_summaries["stopped_at"], trade_summaries["stopped_at_set"]), sls_closed_size = get_closed_kpis(
+            df, group_codes, group_count, new_order_rows, stop_loss_rows, COL_NAME_STOP_LOSS)
+    (trade_summaries["preset_tp"], trade_summaries["preset_tp_set"]), _, tps_closed_size = get_closed_kpis(
+        df, group_codes, group_count, new_order_rows, take_profit_rows, COL_NAME_TAKE_PROFIT)
+    total_closed_size = sls_closed_size + tps_closed_size
+
+    avg_sl_weighted, avg_tp_weighted = [
+        get_average_weighted_exits(df, group_codes, group_count, closed_rows, total_closed_size, decimal_cases)
+        for closed_rows in [stop_loss_rows, take_profit_rows]
+    ]
+    trade_summaries["exit_price"] = avg_sl_weighted + avg_tp_weighted
+    trade_summaries["exit_price_set"] = trade_summaries["exit_price"] > 0.0
+
+    taken_tp_rows = take_profit_rows & df[COL_NAME_EXEC_PRICE].notna().to_numpy()
+    trade_summaries["take_profits"] = pd.Series(
+        [str(tp) for tp in df.loc[taken_tp_rows, COL_NAME_EXEC_PRICE].tolist()], dtype=object)\
+        .groupby(group_codes[taken_tp_rows]).agg(' / '.join).reindex(range(group_count), fill_value='').to_numpy()
+
+    trade_summaries["closed"] = ~(trade_summaries["quantity"] > total_closed_size)
+    # even though there can be row with equal datetime, the last row of a group will always represent the trade
+    # close time as long as closed == true
+    trade_summaries["closed_date"] = np.where(trade_summaries["closed"], df[COL_NAME_EXEC_DATE].to_numpy()[last_rows],
+                                              np.datetime64("NaT"))
+    # open trades last until now
+    trade_summaries["duration"] = np.where(trade_summaries["closed"], trade_summaries["closed_date"],
+                                           np.datetime64(now, "ns")) - trade_summaries["entry_date"]
+    # TODO allow user to choose whether trade_result is defined by realized_profit or gross_profit returns
+    trade_summaries["status"] = np.where(trade_summaries["gross_profit"] > 0.0, 1,
+                                         np.where(trade_summaries["gross_profit"] < 0.0, -1, 0))
+    init_acc_balance = df[COL_NAME_ACC_BALANCE].astype(float).to_numpy()[group_starts]
+
+    # risk is measured against the preset SL, the one that stopped the trade out otherwise. Winning trades without
+    # a preset SL carry no risk
+    has_preset_sl = trade_summaries["preset_sl_set"] & ~np.isnan(trade_summaries["preset_sl"])
+    trade_summaries["stopped_out"] = trade_summaries["stopped_at_set"] & ~np.isnan(trade_summaries["stopped_at"])
+    sl_to_compare_risk = np.where(has_preset_sl, trade_summaries["preset_sl"], trade_summaries["stopped_at"])
+    risk_set = ~(~has_preset_sl & (trade_summaries["status"] == 1)) & (has_preset_sl | trade_summaries["stopped_out"])
+    trade_summaries["risk_set"] = risk_set
+    trade_summaries["risk"][risk_set] = np.abs(np.round(
+        (np.abs(trade_summaries["entry_price"][risk_set] - sl_to_compare_risk[risk_set]) *
+         trade_summaries["quantity"][risk_set]) / init_acc_balance[risk_set], 2))
+    trade_summaries["risk_managed"] = risk_set & (trade_summaries["risk"] <= vars.RISK_THRESHOLD)
+
+    return trade_summaries
+
+def build_trade_summary_column(trade_summaries, field: str, set_field: str = None, unset_value=pd.NA):
+    values = pd.Series(trade_summaries[field])
+    if set_field is None or trade_summaries[set_field].all():
+        return values
+    # fields not set on every trade hold the unset value instead (so the column keeps mixed, object values)
+    values = values.to_numpy(dtype=object)
+    values[~trade_summaries[set_field]] = unset_value
+    return pd.Series(values, dtype=object)
+
+def build_aggregated_view(df, relevant_colnames=AGGREGATED_VIEW_USABLE_COLUMNS,
+                          group_colname=TRADE_GROUP_COL_NAME, now: datetime = None) -> pd.DataFrame:
+    # one row per trade group (ordered by group), the first row's values as default for non KPI columns. Durations of
+    # open trades are measured up to now (the current time by default)
+    # data MUST be date asc sorted!
+    group_ids, group_codes = np.unique(df[group_colname].to_numpy(), return_inverse=True)
+    new_order_rows = (df[COL_NAME_ACTION] == NEW_ORDER_ACTION_LABEL).to_numpy()
+    # trades can't be aggregated without the new order opening them
+    valid_groups = np.zeros(len(group_ids), dtype=bool)
+    valid_groups[group_codes[new_order_rows]] = True
+    if not valid_groups.all():
+        logger.warning(f"Unable to process KPIs for {int((~valid_groups).sum())} of the order groups in the"
+                       f" dataframe: no new order found")
+        df = df[valid_groups[group_codes]]
+        group_ids, group_codes = np.unique(df[group_colname].to_numpy(), return_inverse=True)
+    group_count = len(group_ids)
+    if not group_count:
+        return pd.DataFrame(columns=relevant_colnames)
+
+    sorted_rows = np.argsort(group_codes, kind="stable")
+    df, group_codes = df.iloc[sorted_rows], group_codes[sorted_rows]
+    trade_summaries = build_trade_summaries(df, group_codes, group_count, now or datetime.now())
+
+    # the dataframe is only built once, from the filled trade summaries
+    return pd.DataFrame({
+        colname: build_trade_summary_column(trade_summaries, *AGGREGATED_VIEW_FIELDS.get(colname))
+        if colname in AGGREGATED_VIEW_FIELDS else
+        pd.Series(df[colname].to_numpy(dtype=object)[trade_summaries["first_row"]], dtype=object).infer_objects()
+        for colname in relevant_colnames
+    })
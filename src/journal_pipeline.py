@@ -1,6 +1,14 @@
 import logging
 from urllib.parse import urljoin
-from src.api.request_handler import RequestHandler
+from src.api.request_budget import RequestBudget
+from src.api.request_coalescer import RequestCoalescer
+from src.api.request_handler import RequestHandler, IncompleteResponseError
+from src.api.window_planner import WindowPlanner
+from src.data.checkpoint_log import CheckpointLog
+from src.data.record_deduplicator import RecordDeduplicator
+from src.data.record_store import RecordStore, RECORD_STORE_FORMATS
+from src.data.sync_state import SyncState
+from src.utils.file_vars import SYNC_STATE_FILE_NAME, PAGE_STATS_FILE_NAME
 from src.data.data_helpers import *
 from src.file.journal_formatter import *
 from src.utils.config import Config
@@ -10,6 +18,7 @@ from src.utils.utils import *
 import src.utils.config_vars as vars
 import os
 import asyncio
+from contextlib import aclosing, asynccontextmanager
 from src.logging.logger import Logger
 
 logger = Logger()
@@ -20,7 +29,9 @@ class JournalPipeline:
                  config_file_path: str,
                  start_date: str,
                  timeframe: str,
-                 config_type=vars.TOML_CONFIG_TYPE):
+                 config_type=vars.TOML_CONFIG_TYPE,
+                 request_coalescer: RequestCoalescer = None,
+                 resume: bool = False):
 
         if not config_type:
             raise ValueError(f"Invalid config type '{config_type}' was provided during app bootstrap."
@@ -53,6 +64,14 @@ class JournalPipeline:
             raise ValueError(f"Timeframe provided '{timeframe}' is invalida. Please choose one of the following"
                              f" timeframes:\n {'    - '.join(vars.SUPPORTED_TIMEFRAMES)}")
         self.timeframe = timeframe.capitalize()
+        # shared between pipelines running side by side, so overlapping timeframes are fetched only once
+        self.request_coalescer = request_coalescer
+        # set while pipelines sharing the request coalescer run, see share_request_handlers
+        self.request_handler = None
+        # pick up the pages checkpointed by a previous, interrupted run instead of starting over
+        self.resume = resume
+        # durations of open trades are measured up to the time the pipeline started
+        self.started_at = datetime.now()
 
         self.__load_params()
         self.__set_application_logger()
@@ -64,8 +83,16 @@ class JournalPipeline:
 
         #self.project_params = self.config.params.get("project")
         self.exchange_api_params  = self.config.params.get("api").get(self.exchange_api_name)
+        self.connection_params = self.config.params.get("api").get("connection", {})
+        self.rate_limit_params = self.config.params.get("api").get("rate_limit", {})
+        self.retry_params = self.config.params.get("api").get("retry", {})
+        self.window_planner_params = self.config.params.get("api").get("window_planner", {})
+        self.sharding_params = vars.DEFAULT_SHARDING_PARAMS | self.config.params.get("api").get("sharding", {})
         self.journal_params  = self.config.params.get("journal_app").get(self.journal_app_name)
-        self.logging_params = self.config.params.get("logging")
+        self.logging_params = vars.DEFAULT_LOGGING_PARAMS | self.config.params.get("logging", {})
+        self.cache_params = self.config.params.get("cache", {})
+        self.storage_params = vars.DEFAULT_STORAGE_PARAMS | self.config.params.get("storage", {})
+        self.checkpoint_params = vars.DEFAULT_CHECKPOINT_PARAMS | self.config.params.get("checkpoint", {})
 
         risk_threshold = self.journal_params.get("risk_threshold")
         profits_col_name = self.journal_params.get("compute_profits_by")
@@ -79,6 +106,8 @@ class JournalPipeline:
         if risk_threshold:
             vars.RISK_THRESHOLD = float(risk_threshold)
 
+        self.adjust_roi_for_transfers = bool(self.journal_params.get("adjust_roi_for_transfers", False))
+
         self.__build_endpoints_map()
 
     def __build_endpoints_map(self):
@@ -93,36 +122,353 @@ class JournalPipeline:
         logger.set_log_level(getattr(logging, self.logging_params.get("log_level").upper()))
         logger.set_file_handler(log_to_file=self.logging_params.get("log_to_file"),
                              log_dir=self.logging_params.get("log_dir"))
+        logger.set_payload_dump(dump_payloads=self.logging_params.get("dump_payloads"),
+                                sample_size=self.logging_params.get("payload_sample_size"),
+                                dump_to_file=self.logging_params.get("dump_payloads_to_file"),
+                                log_dir=self.logging_params.get("log_dir"))
+
+    def __get_timeframe_windows(self):
+        paginated_date = paginate_date(self.date, self.timeframe)
+        return [get_date_timestamps(date, day_count) for date, day_count in paginated_date]
+
+    def __get_account_dir(self, api_key):
+        # every account gets its own directory so switching api keys never mixes up records
+        return os.path.join(self.storage_params.get("data_dir"), get_account_id(api_key))
+
+    def __get_checkpoint_log_path(self, api_key):
+        # one log per account, timeframe and date, so runs for different journals never resume each other's pages
+        return os.path.join(self.checkpoint_params.get("checkpoint_dir"),
+                            f"{get_account_id(api_key)}_{self.timeframe.lower()}_{self.date}.jsonl")
+
+    def __build_record_store(self, api_key):
+        account_dir = self.__get_account_dir(api_key)
+        store_format = self.storage_params.get("format")
+        if store_format not in RECORD_STORE_FORMATS:
+            raise ValueError(f"Unable to set up the record store. Unsupported storage format '{store_format}'."
+                             f" Please, choose one of the following: {', '.join(RECORD_STORE_FORMATS)}")
+
+        return (RECORD_STORE_FORMATS.get(store_format)(account_dir),
+                SyncState(os.path.join(account_dir, SYNC_STATE_FILE_NAME)))
+
+    def __build_request_handler(self, api_key):
+        base_url = self.exchange_api_params.get("base_url")
+        return RequestHandler(
+            api_key=api_key,
+            api_secret=os.environ.get(vars.API_SECRET),
+            connection_params=self.connection_params,
+            rate_limit_params=self.rate_limit_params,
+            retry_params=self.retry_params,
+            cache_params=self.cache_params,
+            decoding_schemas={
+                urljoin(base_url, endpoint): self.data_marshaller.DATASET_TO_FIELD_TYPES_MAP.get(dataset_type, {})
+                for dataset_type, endpoint in self.endpoints.items()
+            },
+        )
+
+    def __build_window_planner(self, api_key, sync_enabled):
+        # page counts seen on previous runs are kept next to the account's records
+        return WindowPlanner(
+            self.window_planner_params,
+            stats_path=os.path.join(self.__get_account_dir(api_key), PAGE_STATS_FILE_NAME) if sync_enabled
+            else None,
+        )
+
+    def get_projected_columns(self, dataset_type):
+        # raw columns the journal actually makes use of, plus any (raw) column requested by a custom table
+        table_columns = [column for table in self.journal_params.get("tables", []) for column in
+                         table.get("columns", [])]
+        return list(dict.fromkeys(self.data_marshaller.DATASET_TO_PROJECTED_COLS_MAP.get(dataset_type, []) +
+                                  table_columns))
+
+    def load_data(self, columns_map=None):
+        # reads the timeframe straight from the local record store, without hitting the api
+        api_key = os.environ.get(vars.API_KEY)
+        if not self.storage_params.get("enabled") or not api_key:
+            raise ValueError("Unable to load data: the record store is disabled or no api key was provided")
+
+        record_store, _ = self.__build_record_store(api_key)
+        windows = self.__get_timeframe_windows()
+        return self.__read_frames(record_store, windows[0][0], windows[-1][1], columns_map)
+
+    def __read_frames(self, record_store, timeframe_start, timeframe_end, columns_map=None):
+        columns_map = columns_map if columns_map is not None else \
+            {dataset_type: self.get_projected_columns(dataset_type) for dataset_type in self.endpoints.keys()}
+        return {
+            dataset_type: record_store.read_frame(
+                dataset_type, timeframe_start, timeframe_end,
+                self.data_marshaller.DATASET_TO_TRANSACTION_DATE_COL_MAP.get(dataset_type),
+                columns=columns_map.get(dataset_type),
+            ) for dataset_type in self.endpoints.keys()
+        }
+
+    @staticmethod
+    def __log_request_handler_stats(request_handler, use_async=True):
+        if use_async:
+            connection_stats = request_handler.connection_stats
+            logger.info(f"Requests sent: {connection_stats.get('requests')}. Connections opened:"
+                        f" {connection_stats.get('created')}, reused: {connection_stats.get('reused')}"
+                        f" (reuse ratio: {request_handler.get_connection_reuse_ratio():.0%})")
+        if request_handler.response_cache.enabled:
+            cache_stats = request_handler.response_cache.stats
+            logger.info(f"Cached pages used: {cache_stats.get('hits')}, fetched: {cache_stats.get('misses')}"
+                        f" (hit ratio: {request_handler.response_cache.get_hit_ratio():.0%})")
+
+    @staticmethod
+    @asynccontextmanager
+    async def share_request_handlers(pipelines, use_async=True):
+        # pipelines sharing a request coalescer (and so, each other's pieces) share the account's request handler too:
+        # a single scheduler and session, so together they never go past the rate limits meant for the whole account.
+        # It's opened before any of them starts and closed once all of them are done with it
+        request_handlers = {}
+        for pipeline in pipelines:
+            if pipeline.request_coalescer is None:
+                continue
+            coalescer_id = id(pipeline.request_coalescer)
+            if coalescer_id not in request_handlers:
+                request_handlers[coalescer_id] = pipeline.__build_request_handler(os.environ.get(vars.API_KEY))
+            pipeline.request_handler = request_handlers.get(coalescer_id)
+
+        try:
+            for request_handler in request_handlers.values():
+                await request_handler.open_session(use_async)
+            yield list(request_handlers.values())
+        finally:
+            for request_handler in request_handlers.values():
+                await request_handler.close_session()
+            for pipeline in pipelines:
+                pipeline.request_handler = None
+
+    @staticmethod
+    async def fetch_all(pipelines, use_async=True):
+        async with JournalPipeline.share_request_handlers(pipelines, use_async) as request_handlers:
+            results = await asyncio.gather(*[pipeline.fetch_data(use_async) for pipeline in pipelines],
+                                           return_exceptions=True)
+        for request_handler in request_handlers:
+            JournalPipeline.__log_request_handler_stats(request_handler, use_async)
+        return results
 
     async def fetch_data(self, use_async=True):
         try:
             base_url = self.exchange_api_params.get("base_url")
-            paginated_date = paginate_date(self.date, self.timeframe)
-
-            request_handler = RequestHandler(
-                api_key=os.environ.get(vars.API_KEY),
-                api_secret=os.environ.get(vars.API_SECRET),
-            )
+            windows = self.__get_timeframe_windows()
+            timeframe_start, timeframe_end = windows[0][0], windows[-1][1]
+
+            api_key = os.environ.get(vars.API_KEY)
+            # a shared request handler is opened and closed by whoever shares it, not by each pipeline
+            shared_request_handler = self.request_handler is not None
+            request_handler = self.request_handler if shared_request_handler else \
+                self.__build_request_handler(api_key)
+
+            # incremental sync: only the windows past each dataset's high-water mark get requested,
+            # the rest is read back from the local record store
+            sync_enabled = bool(self.storage_params.get("enabled")) and bool(api_key)
+            if sync_enabled:
+                record_store, sync_state = self.__build_record_store(api_key)
+            window_planner = self.__build_window_planner(api_key, sync_enabled)
+            checkpoint_log = CheckpointLog(self.__get_checkpoint_log_path(api_key), resume=self.resume) \
+                if self.checkpoint_params.get("enabled") and api_key else None
+
+            async def stream_window(stats_key, endpoint, time_col, start_time, end_time, shard_params,
+                                    deduplicator=None):
+                url = urljoin(base_url, endpoint)
+                window_params = {"startTime": start_time, "endTime": end_time} | shard_params
+                records = []
+                page_count = 0
+
+                def process_page(page):
+                    # pages are kept as raw records, they're normalized in a single vectorized pass over the whole
+                    # (stored) dataset once the journal gets built
+                    return deduplicator.filter(page) if deduplicator is not None else page
+
+                # pages checkpointed before a previous run got interrupted are replayed instead of requested again
+                cursor = ""
+                checkpoint = checkpoint_log.get_page(url, window_params) if checkpoint_log is not None else None
+                while checkpoint is not None:
+                    cursor, page = checkpoint
+                    page_count += 1
+                    records += process_page(page)
+                    if not cursor:
+                        window_planner.record(stats_key, start_time, end_time, page_count)
+                        return records
+                    checkpoint = checkpoint_log.get_page(url, window_params, cursor)
+
+                pages = request_handler.iter_paginated_response(
+                    endpoint=url,
+                    additional_params=window_params | ({"cursor": cursor} if cursor else {}),
+                    date='',
+                    day_count=1,
+                    use_async=use_async,
+                    with_cursors=True,
+                )
+                async with aclosing(pages):
+                    try:
+                        async for page_cursor, next_cursor, page in pages:
+                            page_count += 1
+                            if checkpoint_log is not None:
+                                checkpoint_log.record_page(url, window_params, page_cursor, next_cursor, page)
+                            records += process_page(page)
+                    except IncompleteResponseError as exc:
+                        exc.records = records
+                        raise
+                window_planner.record(stats_key, start_time, end_time, page_count)
+                return records
+
+            async def gather_requests(dataset_type, endpoint, symbols=None):
+                time_col = self.data_marshaller.DATASET_TO_TRANSACTION_DATE_COL_MAP.get(dataset_type)
+                key_cols = self.data_marshaller.DATASET_TO_RECORD_KEY_COLS_MAP.get(dataset_type)
+                dataset_windows = sync_state.get_missing_windows(dataset_type, windows) if sync_enabled else windows
+                # records on the boundary of two adjacent windows come back in both
+                deduplicator = RecordDeduplicator(key_cols)
+                # windows whose cursor chain broke midway, they're never marked as synced
+                incomplete_windows = []
+                fetched_count = 0
+
+                async def plan_shard(symbol):
+                    shard_params = {"symbol": symbol} if symbol else {}
+                    # page density is tracked per shard, a single symbol is usually far sparser than the whole account
+                    stats_key = f"{dataset_type}/{symbol}" if symbol else dataset_type
+
+                    async def probe(start_time, end_time):
+                        return await request_handler.get_first_page(
+                            endpoint=urljoin(base_url, endpoint),
+                            additional_params={"startTime": start_time, "endTime": end_time} | shard_params,
+                            use_async=use_async,
+                        )
+
+                    # a resumed run sticks to the windows it had planned, so its checkpointed pages keep matching
+                    shard_windows = checkpoint_log.get_plan(stats_key) if checkpoint_log is not None else None
+                    if shard_windows is None:
+                        # dense windows get split into parallel ones, sparse ones merged
+                        shard_windows = await window_planner.plan(stats_key, dataset_windows, time_col, probe)
+                        if checkpoint_log is not None:
+                            checkpoint_log.record_plan(stats_key, shard_windows)
+                    return [(stats_key, shard_params, window) for window in shard_windows]
+
+                shards = symbols if symbols is not None else [None]
+                planned_windows = flatten_list(await asyncio.gather(*[plan_shard(symbol) for symbol in shards]))
+                async def fetch_window_records(stats_key, shard_params, start_time, end_time):
+                    try:
+                        if self.request_coalescer is None:
+                            return await stream_window(stats_key, endpoint, time_col, start_time, end_time,
+                                                       shard_params, deduplicator)
+                        # coalesced pieces may be shared with other pipelines, hence are de-duplicated once received
+                        records = await self.request_coalescer.fetch(
+                            RequestCoalescer.build_key(urljoin(base_url, endpoint), shard_params),
+                            start_time, end_time, time_col,
+                            lambda piece_start, piece_end: stream_window(stats_key, endpoint, time_col, piece_start,
+                                                                         piece_end, shard_params),
+                        )
+                    except IncompleteResponseError as exc:
+                        # whatever was fetched before the failed page still makes it to this run's journal
+                        logger.warning(f"'{dataset_type}' window ({start_time}, {end_time}) was only partially"
+                                       f" fetched, it will be requested again on the next run: {exc}")
+                        incomplete_windows.append((start_time, end_time))
+                        if self.request_coalescer is None:
+                            return exc.records
+                        # the failed piece may be a shared one, reaching past the requested window
+                        records = [record for record in exc.records
+                                   if record.get(time_col) and start_time <= int(record[time_col]) < end_time]
+                    return deduplicator.filter(records)
+
+                async def fetch_window(stats_key, shard_params, start_time, end_time):
+                    nonlocal fetched_count
+                    records = await fetch_window_records(stats_key, shard_params, start_time, end_time)
+                    if not sync_enabled:
+                        return records
+                    # synced windows are stored as soon as they're fetched, so only the windows in flight (a few
+                    # pages each, see the window planner's max_chain_length) are ever held in memory
+                    record_store.write(dataset_type, records, time_col, key_cols)
+                    fetched_count += len(records)
+                    return []
 
-            async def gather_requests(dataset_type, endpoint):
                 tasks = [
-                    request_handler.get_paginated_response(
-                        endpoint=urljoin(base_url, endpoint),
-                        additional_params={},
-                        date=date,
-                        day_count=day_count,
-                        use_async=use_async,
-                    )
-                    for date, day_count in paginated_date
+                    fetch_window(stats_key, shard_params, start_time, end_time)
+                    for stats_key, shard_params, (start_time, end_time) in planned_windows
                 ]
-                return dataset_type, flatten_list(await asyncio.gather(*tasks))
-
-            tasks = [
-                gather_requests(dataset_type, endpoint)
-                for dataset_type, endpoint in self.endpoints.items()
+                data = flatten_list(await asyncio.gather(*tasks))
+                if deduplicator.dropped:
+                    logger.info(f"Dropped {deduplicator.dropped} duplicate '{dataset_type}' record(s)")
+                if not sync_enabled:
+                    if symbols is not None:
+                        # shards complete in any order, the merged records are put back in a deterministic one
+                        data = sorted(data, key=lambda record: (int(record.get(time_col) or 0),
+                                                                RecordStore.get_record_key(record, key_cols)))
+                    return dataset_type, data
+
+                # coverage is contiguous, it stops where the earliest incomplete window starts
+                synced_until = min([timeframe_end] + [start_time for start_time, _ in incomplete_windows])
+                sync_state.mark_synced(dataset_type, timeframe_start, synced_until,
+                                       self.storage_params.get("sync_lag"))
+                logger.info(f"Fetched {fetched_count} new '{dataset_type}' records over {len(dataset_windows)}"
+                            f" missing window(s)")
+
+                # the whole timeframe gets read back (once) from the record store when every dataset is synced
+                return dataset_type, None
+
+            source_dataset = self.data_marshaller.SYMBOL_SOURCE_DATASET
+            sharded_datasets = [
+                dataset_type for dataset_type in self.endpoints.keys()
+                if self.sharding_params.get("enabled") and source_dataset in self.endpoints
+                and dataset_type in self.data_marshaller.SHARDABLE_DATASETS
             ]
 
-            results = await asyncio.gather(*tasks)
+            async def get_traded_symbols(source_task):
+                # symbols traded over the timeframe, as found in the transaction log (fetched or read back from the
+                # record store). Orders that were never filled don't show up there, but don't make it to the journal
+                _, source_data = await source_task
+                if sync_enabled:
+                    # only the symbol column is read back from the store
+                    source_symbols = record_store.read_frame(
+                        source_dataset, timeframe_start, timeframe_end,
+                        self.data_marshaller.DATASET_TO_TRANSACTION_DATE_COL_MAP.get(source_dataset),
+                        columns=["symbol"]).get("symbol", [])
+                else:
+                    source_symbols = [record.get("symbol") for record in source_data]
+                return sorted({symbol for symbol in source_symbols if isinstance(symbol, str) and symbol})
+
+            async def gather_sharded_requests(symbols_task, dataset_type, endpoint):
+                symbols = await asyncio.shield(symbols_task)
+                logger.info(f"Fetching '{dataset_type}' sharded over {len(symbols)} symbol(s)")
+                return await gather_requests(dataset_type, endpoint, symbols)
+
+            if not shared_request_handler:
+                await request_handler.open_session(use_async)
+            try:
+                if sharded_datasets:
+                    source_task = asyncio.ensure_future(gather_requests(source_dataset,
+                                                                        self.endpoints.get(source_dataset)))
+                    symbols_task = asyncio.ensure_future(get_traded_symbols(source_task))
+                    tasks = [source_task] + [
+                        gather_sharded_requests(symbols_task, dataset_type, endpoint)
+                        if dataset_type in sharded_datasets else gather_requests(dataset_type, endpoint)
+                        for dataset_type, endpoint in self.endpoints.items() if dataset_type != source_dataset
+                    ]
+                else:
+                    tasks = [
+                        gather_requests(dataset_type, endpoint)
+                        for dataset_type, endpoint in self.endpoints.items()
+                    ]
+                results = await asyncio.gather(*tasks)
+            finally:
+                if not shared_request_handler:
+                    await request_handler.close_session()
+
+            if not shared_request_handler:
+                JournalPipeline.__log_request_handler_stats(request_handler, use_async)
+
+            if sync_enabled:
+                sync_state.save()
+            window_planner.save()
+            if checkpoint_log is not None:
+                if checkpoint_log.stats.get("replayed"):
+                    logger.info(f"Pages replayed from the checkpoint log: {checkpoint_log.stats.get('replayed')},"
+                                f" fetched: {checkpoint_log.stats.get('logged')}")
+                # everything was fetched, there's nothing left to resume
+                checkpoint_log.clear()
+
+            if sync_enabled:
+                # once synced, the journal is built from a (column projected) scan of the local record store
+                return self.__read_frames(record_store, timeframe_start, timeframe_end)
 
             data_per_endpoint = {dataset_type: data for dataset_type, data in results}
             return data_per_endpoint
@@ -130,7 +476,73 @@ class JournalPipeline:
         except Exception as exc:
             raise Exception(f"Unable to fetch data: {exc}")
 
+    async def plan_requests(self, use_async=True, request_budget: RequestBudget = None):
+        # dry run of fetch_data: plans every dataset's request windows and estimates how many pages each holds
+        # (from the page stats of previous runs, or by probing its first page) without fetching the data itself
+        try:
+            base_url = self.exchange_api_params.get("base_url")
+            windows = self.__get_timeframe_windows()
+
+            api_key = os.environ.get(vars.API_KEY)
+            shared_request_handler = self.request_handler is not None
+            request_handler = self.request_handler if shared_request_handler else \
+                self.__build_request_handler(api_key)
+            sync_enabled = bool(self.storage_params.get("enabled")) and bool(api_key)
+            if sync_enabled:
+                _, sync_state = self.__build_record_store(api_key)
+            window_planner = self.__build_window_planner(api_key, sync_enabled)
+            request_budget = request_budget if request_budget is not None else RequestBudget(self.rate_limit_params)
+            if self.sharding_params.get("enabled"):
+                logger.info("Sharded datasets are estimated as a single cursor chain, their symbols aren't known"
+                            " until the transaction log is fetched")
+
+            async def plan_dataset(dataset_type, endpoint):
+                url = urljoin(base_url, endpoint)
+                time_col = self.data_marshaller.DATASET_TO_TRANSACTION_DATE_COL_MAP.get(dataset_type)
+                dataset_windows = sync_state.get_missing_windows(dataset_type, windows) if sync_enabled else windows
+
+                async def probe(start_time, end_time):
+                    request_budget.probes += 1
+                    return await request_handler.get_first_page(
+                        endpoint=url,
+                        additional_params={"startTime": start_time, "endTime": end_time},
+                        use_async=use_async,
+                    )
+
+                if window_planner.enabled:
+                    estimated_windows = await window_planner.plan(dataset_type, dataset_windows, time_col, probe,
+                                                                  with_estimates=True)
+                else:
+                    estimated_windows = await window_planner.estimate_windows(dataset_type, dataset_windows,
+                                                                              time_col, probe)
+                for (start_time, end_time), expected_pages in estimated_windows:
+                    # parts of the window other (coalesced) timeframes already planned are shared, only the gaps
+                    # get requested, each one holding its share of the window's pages
+                    for gap_start, gap_end in request_budget.get_gaps(url, {"startTime": start_time,
+                                                                            "endTime": end_time}):
+                        gap_params = {"startTime": gap_start, "endTime": gap_end}
+                        gap_pages = None if expected_pages is None else \
+                            expected_pages * (gap_end - gap_start) / (end_time - start_time)
+                        # pages already cached (probed ones included) won't be requested again
+                        cached_pages, fully_cached = request_handler.count_cached_pages(url, gap_params)
+                        request_budget.add_window(url, gap_params, gap_pages, cached_pages, fully_cached)
+
+            if not shared_request_handler:
+                await request_handler.open_session(use_async)
+            try:
+                await asyncio.gather(*[plan_dataset(dataset_type, endpoint)
+                                       for dataset_type, endpoint in self.endpoints.items()])
+            finally:
+                if not shared_request_handler:
+                    await request_handler.close_session()
+
+            return request_budget
+
+        except Exception as exc:
+            raise Exception(f"Unable to plan requests: {exc}")
+
     def build_data(self, account_trade_data, dataset_map):
+        # each dataset can either be the raw list of records or a dataframe read from the record store
         if not account_trade_data or not dataset_map:
             missing_data = "account trade data" if not account_trade_data else "dataset map"
             raise ValueError(f"Unable to build the data: No {missing_data} was provided")
@@ -140,10 +552,16 @@ class JournalPipeline:
                 label: build_relevant_dataset(
                 dataset,
                 [],
-                dataset_map.get(label)
+                dataset_map.get(label),
+                label,
             ) for label, dataset in account_trade_data.items()
         }
 
+        # deposits / withdrawals don't survive the filtering, they're picked up beforehand
+        balance_transfers = get_balance_transfers(datasets.get(vars.TRADES_DATASET),
+                                                  self.data_marshaller.BALANCE_TRANSFER_TYPES) \
+            if self.adjust_roi_for_transfers else None
+
         # merge
         try:
             detailed_df = datasets[vars.TRADES_DATASET]
@@ -155,7 +573,7 @@ class JournalPipeline:
         # apply transformations
         transformations = [
             (filter_dataset, self.data_marshaller.DATAFRAME_COLUMN_FILTER_RULES,
-             self.data_marshaller.DATAFRAME_ROW_FILTER_RULES),
+             self.data_marshaller.DATAFRAME_ROW_FILTER_RULES, self.data_marshaller.ORDER_ACTION_RULES),
             (rename_dataset, self.data_marshaller.DATAFRAME_NAME_MAPPING),
             (astype_dataset, Config.JournalFormatter.MarkDownTable.DATAFRAME_TYPING_RULES),
         ]
@@ -164,7 +582,8 @@ class JournalPipeline:
 
         # apply KPIs
         kpi_map = Config.JournalFormatter.MarkDownTable.DATAFRAME_KPI_MAP
-        detailed_df, aggregated_df = apply_kpis_to_dataset(detailed_df, kpi_map)
+        detailed_df, aggregated_df = apply_kpis_to_dataset(detailed_df, kpi_map, self.started_at,
+                                                          balance_transfers)
 
         # generate stats
         stats = build_high_level_stats(detailed_df, aggregated_df, self.profits_col_name)
@@ -352,13 +771,8 @@ class JournalPipeline:
         file_writer = FileWriter(journal_dir=os.getenv("REPORTS_DIR"), timeframe_dir=self.timeframe)
         file_writer.write_to_file(content=journal_content, file_name=journal_title)
 
-    def run(self):
+    def build_journal(self, acc_trade_data):
         try:
-            #1
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                raise RuntimeError("Cannot run the coroutine: event loop is already running.")
-            acc_trade_data = loop.run_until_complete(self.fetch_data())
             #2
             detailed_df, aggregated_df, stats = self.build_data(
                 acc_trade_data,
@@ -375,3 +789,70 @@ class JournalPipeline:
             self.write_journal_to_file(journal_title, journal_content)
         except Exception as exc:
             logger.critical(f"Error caught while running the pipeline: {exc}")
+
+    def run(self):
+        JournalPipeline.run_all([self])
+
+    @staticmethod
+    def run_all(pipelines):
+        # every pipeline's data is fetched concurrently, so overlapping timeframes sharing a request coalescer
+        # cost about as many requests as the longest one alone
+        try:
+            #1
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                raise RuntimeError("Cannot run the coroutine: event loop is already running.")
+            results = loop.run_until_complete(JournalPipeline.fetch_all(pipelines))
+        except Exception as exc:
+            logger.critical(f"Error caught while running the pipeline: {exc}")
+            return
+
+        for pipeline, acc_trade_data in zip(pipelines, results):
+            if isinstance(acc_trade_data, Exception):
+                logger.critical(f"Error caught while running the {pipeline.timeframe} pipeline: {acc_trade_data}")
+                continue
+            pipeline.build_journal(acc_trade_data)
+
+        coalescers = {id(pipeline.request_coalescer): pipeline.request_coalescer for pipeline in pipelines
+                      if pipeline.request_coalescer is not None}
+        for request_coalescer in coalescers.values():
+            logger.info(f"Windows requested: {request_coalescer.stats.get('requested')}. Pieces fetched:"
+                        f" {request_coalescer.stats.get('fetched')}, shared: {request_coalescer.stats.get('shared')}"
+                        f" (saved ratio: {request_coalescer.get_saved_ratio():.0%})")
+
+    @staticmethod
+    def plan_all(pipelines):
+        # dry run of run_all: reports the requests the run would send and how long they'd take under the configured
+        # rate limits, without fetching any data. Overlapping windows of several timeframes are shared the way the
+        # request coalescer shares them, only their uncovered parts are accounted for
+        if not pipelines:
+            return
+        request_budget = RequestBudget(pipelines[0].rate_limit_params)
+
+        async def plan_pipelines():
+            async with JournalPipeline.share_request_handlers(pipelines):
+                return await asyncio.gather(
+                    *[pipeline.plan_requests(request_budget=request_budget) for pipeline in pipelines],
+                    return_exceptions=True)
+
+        try:
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                raise RuntimeError("Cannot run the coroutine: event loop is already running.")
+            results = loop.run_until_complete(plan_pipelines())
+        except Exception as exc:
+            logger.critical(f"Error caught while planning the pipeline: {exc}")
+            return
+
+        for pipeline, result in zip(pipelines, results):
+            if isinstance(result, Exception):
+                logger.critical(f"Error caught while planning the {pipeline.timeframe} pipeline: {result}")
+
+        for endpoint, endpoint_budget in request_budget.endpoints.items():
+            logger.info(f"'{endpoint}': {endpoint_budget.get('windows')} window(s),"
+                        f" {endpoint_budget.get('requests')} expected request(s),"
+                        f" {endpoint_budget.get('cached_pages')} cached page(s)")
+        logger.info(f"Expected requests: {request_budget.get_request_count()} (after {request_budget.probes} probe"
+                    f" request(s)). Expected duration: {request_budget.get_expected_duration():.1f}s under the"
+                    f" configured rate limits. Cache hit ratio: {request_budget.get_cache_hit_ratio():.0%}")
+        return request_budget
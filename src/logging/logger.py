@@ -1,3 +1,5 @@
+import gzip
+import json
 import logging
 import os
 from datetime import datetime
@@ -18,6 +20,10 @@ class Logger:
     def _initialize(self, name, log_level):
         # initializes the logger only once
         self.logger = logging.getLogger(name)
+        # payload dumps are opt-in, nothing gets serialized unless they're enabled
+        self.dump_payloads = False
+        self.payload_sample_size = 0
+        self.payload_dump_dir = None
         if not self.logger.hasHandlers():
             self.logger.setLevel(log_level)
             self.formatter = logging.Formatter(
@@ -43,6 +49,33 @@ class Logger:
             file_handler.setFormatter(self.formatter)
             self.logger.addHandler(file_handler)
 
+    def set_payload_dump(self, dump_payloads=False, sample_size=5, dump_to_file=False, log_dir=DEFAULT_LOGS_DIR):
+        self.dump_payloads = bool(dump_payloads)
+        self.payload_sample_size = sample_size
+        # full payloads are written (gzipped) apart from the logs, which only get a sample
+        self.payload_dump_dir = os.path.join(log_dir, "payloads") if dump_to_file else None
+
+    def dump_payload(self, label, records):
+        # records can be a list of dicts or a dataframe
+        if not self.dump_payloads:
+            return
+        log_sample = self.logger.isEnabledFor(logging.DEBUG) and self.payload_sample_size > 0
+        if not log_sample and not self.payload_dump_dir:
+            return
+
+        records = records.to_dict("records") if hasattr(records, "to_dict") else list(records)
+        if log_sample:
+            sample = records[:self.payload_sample_size]
+            self.logger.debug(f"Payload '{label}' ({len(records)} record(s), first {len(sample)} shown):\n"
+                              f"{json.dumps(sample, indent=4, default=str)}")
+        if self.payload_dump_dir:
+            Path(self.payload_dump_dir).mkdir(parents=True, exist_ok=True)
+            dump_file = os.path.join(self.payload_dump_dir,
+                                     f"{datetime.now().strftime('%Y-%m-%d_%H%M%S')}_{label}.json.gz")
+            with gzip.open(dump_file, "wt", encoding="utf-8") as file:
+                json.dump(records, file, default=str)
+            self.logger.debug(f"Full '{label}' payload written to '{dump_file}'")
+
     def debug(self, message):
         self.logger.debug(message)
 
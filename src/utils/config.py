@@ -1,7 +1,10 @@
 from src.utils.df_vars import *
 from src.data.data_helpers import round_truncate_value, format_roi
+from src.data.filter_rules import EQUALS_RULE, NOT_NULL_RULE, IN_SET_RULE, GREATER_THAN_RULE, COLUMNS_EQUAL_RULE
 from src.utils.session_vars import TRADE_SESSION_FORMAT_RULES
+from src.utils.session_tagger import get_session_labels
 import pandas as pd
+import sys
 import src.utils.config_vars as vars
 
 class Config:
@@ -24,14 +27,72 @@ class Config:
                 vars.ORDER_HISTORY_DATASET: "createdTime",
             }
 
+            # columns that uniquely identify a record of each dataset
+            DATASET_TO_RECORD_KEY_COLS_MAP = {
+                vars.TRADES_DATASET: ["transactionTime", "id"],
+                vars.TRANSACTIONS_DATASET: ["execId"],
+                vars.ORDER_HISTORY_DATASET: ["orderId", "updatedTime"],
+            }
+
+            # decoding schema of each dataset's records. Numbers are parsed once, while decoding the response, and
+            # recurring labels are interned. Fields that show up as strings further down (ids, size, sl/tp, ...)
+            # are left as they come
+            DATASET_TO_FIELD_TYPES_MAP = {
+                vars.TRADES_DATASET: {
+                    "transactionTime": int, "cashFlow": float, "change": float, "cashBalance": float,
+                    "fee": float, "feeRate": float, "symbol": sys.intern, "side": sys.intern, "type": sys.intern,
+                    "category": sys.intern, "currency": sys.intern,
+                },
+                vars.TRANSACTIONS_DATASET: {
+                    "execTime": int, "execPrice": float, "execQty": float, "execFee": float,
+                    "symbol": sys.intern, "side": sys.intern, "execType": sys.intern, "createType": sys.intern,
+                    "orderType": sys.intern, "stopOrderType": sys.intern,
+                },
+                vars.ORDER_HISTORY_DATASET: {
+                    "createdTime": int, "updatedTime": int, "symbol": sys.intern, "side": sys.intern,
+                    "orderStatus": sys.intern, "orderType": sys.intern, "stopOrderType": sys.intern,
+                    "createType": sys.intern,
+                },
+            }
+
+            # datasets that can be requested one symbol at a time (sharding), and the dataset whose records tell
+            # which symbols were traded
+            SHARDABLE_DATASETS = [vars.TRANSACTIONS_DATASET, vars.ORDER_HISTORY_DATASET]
+            SYMBOL_SOURCE_DATASET = vars.TRADES_DATASET
+
+            # raw columns read back from the record store when building the journal (column projection)
+            DATASET_TO_PROJECTED_COLS_MAP = {
+                vars.TRADES_DATASET: ["symbol", "orderId", "side", "type", "tradeId", "fee", "feeRate", "size",
+                                      "cashFlow", "change", "cashBalance"],
+                vars.TRANSACTIONS_DATASET: ["symbol", "orderId", "execId", "side", "execType", "createType",
+                                            "execQty", "execPrice", "execFee", "closedSize"],
+                vars.ORDER_HISTORY_DATASET: ["symbol", "orderId", "side", "positionIdx", "createType", "stopLoss",
+                                             "takeProfit"],
+            }
+
+            # transaction log types moving funds in/out of the account (deposits and withdrawals)
+            BALANCE_TRANSFER_TYPES = ["TRANSFER_IN", "TRANSFER_OUT"]
+
+            # declarative rules (see src/data/filter_rules.py), plain functions are accepted as well
             DATAFRAME_COLUMN_FILTER_RULES = {
                 # remove funding rate rows
-                "execType": lambda value: value == 'Trade',
-                "positionIdx": lambda value: ~pd.isna(value)
+                "execType": (EQUALS_RULE, 'Trade'),
+                "positionIdx": (NOT_NULL_RULE,),
             }
 
             DATAFRAME_ROW_FILTER_RULES = [
-                lambda row: row["tradeId"] == row["execId"]
+                (COLUMNS_EQUAL_RULE, "tradeId", "execId"),
+            ]
+
+            # (order action, column rules) entries, a row gets the action of the first entry it matches
+            # (UNKNOWN_ACTION_LABEL if none). New createTypes only need a new entry
+            ORDER_ACTION_RULES = [
+                # closing orders in profit are take profits, the rest stop losses
+                # TODO validate for stop losses in profit
+                (TAKE_PROFIT_ACTION_LABEL, {"createType": (EQUALS_RULE, "CreateByClosing"),
+                                            "cashFlow": (GREATER_THAN_RULE, 0.0)}),
+                (STOP_LOSS_ACTION_LABEL, {"createType": (IN_SET_RULE, ["CreateByClosing", "CreateByStopLoss"])}),
+                (NEW_ORDER_ACTION_LABEL, {"createType": (EQUALS_RULE, "CreateByUser")}),
             ]
 
             # TODO merge col_names that reference the same thing
@@ -148,8 +209,8 @@ class Config:
                     else '<center><input type="checkbox"><center/>',
                     COL_NAME_SL_SET: lambda value: value if not pd.isna(value) else '<span style="color: red;">None<span/>',
                     COL_NAME_SL_TRIGGERED: lambda value: value if not pd.isna(value) else 'None',
-                    COL_NAME_TRADE_SESSION: lambda values: ''.join([TRADE_SESSION_FORMAT_RULES.get(value, '')
-                                                                     for value in list(values)]) if values else '',
+                    COL_NAME_TRADE_SESSION: lambda value: ''.join([TRADE_SESSION_FORMAT_RULES.get(session, '')
+                                                                    for session in get_session_labels(value)]),
                     COL_NAME_TAKE_PROFITS: lambda value: f'<span style="color: red;">None<span/>' if not value else value
                 },
                 "html": {
@@ -1,3 +1,5 @@
+from src.utils.file_vars import DEFAULT_CACHE_DIR, DEFAULT_DATA_DIR, DEFAULT_CHECKPOINT_DIR, DEFAULT_LOGS_DIR
+
 CONFIG_FILE_NAME = "config"
 INI_CONFIG_TYPE = "ini"
 TOML_CONFIG_TYPE = "toml"
@@ -49,6 +51,108 @@ ORDER_HISTORY_DATASET = "order_history"
 
 HTTP_VALID_RESPONSE_CODES = [200,]
 API_VALID_INTERNAL_RESPONSE_CODES = [0,]
+# 10006: too many visits (per UID), 10018: exceeded the IP rate limit
+API_RATE_LIMIT_RESPONSE_CODES = [10006, 10018]
+
+# request params that change on every request and don't shape the response
+VOLATILE_REQUEST_PARAMS = ["timestamp", "sign"]
+
+# rate limit details sent back by the exchange on every response
+RATE_LIMIT_HEADER = "X-Bapi-Limit"
+RATE_LIMIT_STATUS_HEADER = "X-Bapi-Limit-Status"
+RATE_LIMIT_RESET_TIMESTAMP_HEADER = "X-Bapi-Limit-Reset-Timestamp"
+
+# pooled connection defaults (overridable through the config's [api.connection] section)
+DEFAULT_CONNECTION_PARAMS = {
+    # max simultaneous connections overall and per host
+    "limit": 100,
+    "limit_per_host": 10,
+    # seconds an idle connection is kept alive for reuse
+    "keepalive_timeout": 30,
+    # seconds resolved DNS entries are cached for (0 disables the cache)
+    "ttl_dns_cache": 300,
+    # total seconds allowed per request
+    "timeout": 30,
+    "compress_responses": True,
+    # worker threads sending requests when running in sync (non aiohttp) mode
+    "sync_workers": 10,
+}
+
+# request scheduling defaults (overridable through the config's [api.rate_limit] section)
+DEFAULT_RATE_LIMIT_PARAMS = {
+    # max requests in flight overall and per endpoint
+    "max_in_flight": 10,
+    "max_in_flight_per_endpoint": 5,
+    # per endpoint pace used until the exchange reports its own limits
+    "requests_per_second": 10,
+}
+
+# retry defaults (overridable through the config's [api.retry] section)
+DEFAULT_RETRY_PARAMS = {
+    # attempts per page (including the first one) before giving up on the whole request
+    "max_attempts": 5,
+    # seconds. Backoff doubles on every attempt (with random jitter) up to max_delay
+    "base_delay": 0.5,
+    "max_delay": 30.0,
+    "retryable_http_codes": [408, 429, 500, 502, 503, 504],
+    # 10000: server timeout, 10016: server error, plus the rate limit codes
+    "retryable_ret_codes": [10000, 10016] + API_RATE_LIMIT_RESPONSE_CODES,
+}
+
+# adaptive request window planning defaults (overridable through the config's [api.window_planner] section)
+DEFAULT_WINDOW_PLANNER_PARAMS = {
+    "enabled": True,
+    # seconds. Widest time range the api accepts on a single request (7 days) and narrowest one worth splitting into
+    "max_window_span": 604800,
+    "min_window_span": 3600,
+    # pages fetched one after another (following the cursor) before a window gets split into parallel ones
+    "max_chain_length": 3,
+    # previously fetched windows (per dataset) used to estimate how many pages a new window holds
+    "history_size": 20,
+}
+
+# per symbol sharded fetching defaults (overridable through the config's [api.sharding] section)
+DEFAULT_SHARDING_PARAMS = {
+    "enabled": False,
+}
+
+# raw response cache defaults (overridable through the config's [cache] section)
+DEFAULT_CACHE_PARAMS = {
+    "enabled": True,
+    "cache_dir": DEFAULT_CACHE_DIR,
+    # seconds a response from a window that hadn't closed yet stays valid for.
+    # windows that were already closed when cached never expire
+    "ttl": 300,
+}
+
+# local record storage and incremental sync defaults (overridable through the config's [storage] section)
+DEFAULT_STORAGE_PARAMS = {
+    "enabled": True,
+    "data_dir": DEFAULT_DATA_DIR,
+    # "parquet" (columnar files partitioned by day and symbol) or "json" (gzipped json lines per day)
+    "format": "parquet",
+    # seconds. The most recent records may still be settling on the exchange side and are never marked as synced
+    "sync_lag": 60,
+}
+
+# resumable run defaults (overridable through the config's [checkpoint] section)
+DEFAULT_CHECKPOINT_PARAMS = {
+    "enabled": True,
+    # every fetched page is logged here until the run completes. Runs started with --resume skip the logged ones
+    "checkpoint_dir": DEFAULT_CHECKPOINT_DIR,
+}
+
+# logging defaults (overridable through the config's [logging] section)
+DEFAULT_LOGGING_PARAMS = {
+    "log_level": "info",
+    "log_to_file": False,
+    "log_dir": DEFAULT_LOGS_DIR,
+    # debugging aid: logs (at debug level) a sample of every dataset's records before the journal gets built
+    "dump_payloads": False,
+    "payload_sample_size": 5,
+    # also write every dataset's full records to a gzipped file under <log_dir>/payloads
+    "dump_payloads_to_file": False,
+}
 
 DEFAULT_DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
 VALID_INPUT_DATE_FORMATS = ["%Y-%m-%d", "%Y-%m"]
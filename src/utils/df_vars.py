@@ -67,6 +67,7 @@ AGGREGATED_VIEW_USABLE_COLUMNS = [
 NEW_ORDER_ACTION_LABEL = "New Order"
 STOP_LOSS_ACTION_LABEL = "Stop Loss"
 TAKE_PROFIT_ACTION_LABEL = "Take Profit"
+UNKNOWN_ACTION_LABEL = "Unknown"
 
 WIN_RESULT_LABEL = "Win"
 LOSS_RESULT_LABEL = "Loss"
@@ -4,4 +4,9 @@ WRITE_MODES = {
 }
 
 DEFAULT_LOGS_DIR = "logs"
-DEFAULT_REPORTS_DIR = "reports"
\ No newline at end of file
+DEFAULT_REPORTS_DIR = "reports"
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_DATA_DIR = "data"
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+SYNC_STATE_FILE_NAME = "sync_state.json"
+PAGE_STATS_FILE_NAME = "page_stats.json"
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from datetime import time
+from dateutil.tz import tzlocal
+from typing import *
+from zoneinfo import ZoneInfo
+
+from src.utils.session_vars import TRADE_SESSION_ZONES, TRADE_SESSION_BITS
+
+### trading session tagging, for whole datetime columns ###
+# every datetime gets a bitmask of the sessions (TRADE_SESSION_BITS) open at the time. Sessions are looked up in a
+# (calendar day, minute of day) table, in UTC, built from the zone rules of every session's market
+
+MINUTES_PER_DAY = 24 * 60
+
+def get_minute_of_day(time_of_day: time):
+    return time_of_day.hour * 60 + time_of_day.minute
+
+def build_session_table(utc_days, sessions=TRADE_SESSION_ZONES, session_bits=TRADE_SESSION_BITS) -> np.ndarray:
+    # bitmask of the sessions open at every (UTC) minute of each of the given days, a (days, minutes) table
+    utc_days = np.asarray(utc_days, dtype="datetime64[D]")
+    utc_minutes = pd.DatetimeIndex((utc_days[:, None] + np.arange(MINUTES_PER_DAY).astype("timedelta64[m]"))
+                                   .ravel().astype("datetime64[ns]"), tz="UTC")
+    session_table = np.zeros(len(utc_minutes), dtype=np.uint8)
+    for session, (zone, start, end) in sessions.items():
+        local_minutes = utc_minutes.tz_convert(ZoneInfo(zone))
+        minute_of_day = local_minutes.hour * 60 + local_minutes.minute
+        start_minute, end_minute = get_minute_of_day(start), get_minute_of_day(end)
+        # handles midnight span cases
+        if start_minute > end_minute:
+            is_open = (minute_of_day >= start_minute) | (minute_of_day < end_minute)
+        else:
+            is_open = (minute_of_day >= start_minute) & (minute_of_day < end_minute)
+        session_table[np.asarray(is_open)] |= session_bits.get(session)
+    return session_table.reshape(len(utc_days), MINUTES_PER_DAY)
+
+def tag_sessions(dates, local_timezone=None, sessions=TRADE_SESSION_ZONES,
+                 session_bits=TRADE_SESSION_BITS) -> np.ndarray:
+    # session bitmask of every (naive, local time) datetime. Missing dates aren't in any session
+    dates = pd.Series(pd.to_datetime(dates))
+    # times repeated by a daylight saving change are taken as standard time, skipped ones moved past the change
+    utc_dates = dates.dt.tz_localize(local_timezone or tzlocal(), ambiguous=np.zeros(len(dates), dtype=bool),
+                                     nonexistent="shift_forward").dt.tz_convert("UTC").dt.tz_localize(None)\
+        .to_numpy(dtype="datetime64[m]")
+
+    session_masks = np.zeros(len(utc_dates), dtype=np.uint8)
+    found = ~np.isnat(utc_dates)
+    if not found.any():
+        return session_masks
+    utc_days, day_codes = np.unique(utc_dates[found].astype("datetime64[D]"), return_inverse=True)
+    minutes = (utc_dates[found] - utc_dates[found].astype("datetime64[D]")).astype(np.int64)
+    session_masks[found] = build_session_table(utc_days, sessions, session_bits)[day_codes, minutes]
+    return session_masks
+
+def get_session_labels(session_mask, session_bits=TRADE_SESSION_BITS) -> List[str]:
+    if pd.isna(session_mask):
+        return []
+    return [session for session, session_bit in session_bits.items() if int(session_mask) & session_bit]
@@ -12,14 +12,14 @@ TRADE_SESSION_FORMAT_RULES = {
     NEW_YORK_SESSION_LABEL: '<span class="tag-session-ny">NY</span>',
 }
 
-# TODO automatic check for season time changes
-TRADE_SESSION_TIMEZONES = sessions = {
-    # actual ? sydney 10 pm to 7 am
-    "Sydney": (time(22, 0), time(8, 0)),
-    # actual ? tokyo 12 am to 9 am
-    "Tokyo": (time(0, 0), time(8, 0)),
-    # actual ? london 8 am to 5 pm
-    "London": (time(8, 0), time(17, 0)),
-    # actual ? new york 1 pm to 10 pm
-    "New York": (time(14, 30), time(20, 0)),
+# sessions in the local time of their market, so they follow its daylight saving changes.
+# Session: (zoneinfo key, open time, close time)
+TRADE_SESSION_ZONES = {
+    SYDNEY_SESSION_LABEL: ("Australia/Sydney", time(9, 0), time(19, 0)),
+    TOKYO_SESSION_LABEL: ("Asia/Tokyo", time(9, 0), time(17, 0)),
+    LONDON_SESSION_LABEL: ("Europe/London", time(8, 0), time(17, 0)),
+    NEW_YORK_SESSION_LABEL: ("America/New_York", time(9, 30), time(15, 0)),
 }
+
+# bit flagging each session in a session bitmask
+TRADE_SESSION_BITS = {session: 1 << index for index, session in enumerate(TRADE_SESSION_ZONES)}
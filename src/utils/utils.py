@@ -1,12 +1,13 @@
 from typing import List, Tuple
 import string
+import hashlib
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import calendar
 
 from src.logging.logger import Logger
 from src.utils.config_vars import DAYS_PAGINATION_SIZE, VALID_INPUT_DATE_FORMATS
-from src.utils.session_vars import TRADE_SESSION_TIMEZONES
 import re
 
 logger = Logger()
@@ -92,72 +93,39 @@ def get_decimal_cases(number):
 
     return len(number_segmented[-1])
 
-def date_difference(date_init: str or datetime, date_end: str or datetime, format="%Y-%m-%d %H:%M:%S") -> str:
-    if not date_init or not date_end:
-        return ""
-
-    try:
-        if isinstance(date_init, str):
-            date_init = datetime.strptime(date_init, format)
-        if isinstance(date_end, str):
-            date_end = datetime.strptime(date_end, format)
-    except ValueError as value_err:
-        raise ValueError(f"Unable to format date: {value_err}")
-
-    if date_end < date_init:
-        raise ValueError(f"date_end {str(date_end)} cannot be bigger than date_init {date_init}!")
-
-    delta = abs(date_end - date_init)
-    days = delta.days
-    hours, remainder = divmod(delta.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    time_units = [
-        (days, "day"),
-        (hours, "hour"),
-        (minutes, "minute"),
-        (seconds, "second"),
-    ]
-
-    # include only non-zero time units
-    formatted_parts = [
-        f"{value} {unit}{'s' if value > 1 else ''}"
-        for value, unit in time_units if value > 0
-    ]
-
-    if not formatted_parts:
-        return "0 seconds"
-
-    # Combine the parts into the final string
-    if len(formatted_parts) == 1:
-        return formatted_parts[0]
-
-    return ", ".join(formatted_parts[:-1]) + f" and {formatted_parts[-1]}"
-
-def get_sessions_in_date(date: str or datetime, sessions=TRADE_SESSION_TIMEZONES, date_format="%Y-%m-%d %H:%M:%S"):
-    if not date:
-        raise ValueError(f"Unable to parse date '{date}' to datetime in format '{date_format}'.")
-        #return []
-    if isinstance(date, str):
-        try:
-            date = datetime.strptime(date, date_format)
-        except ValueError as value_err:
-            raise ValueError(f"Unable to parse date '{date}' to datetime in format '{date_format}'.")
-                       # f" No sessions will be associated to this entry.")
-            #return []
-
-    time_in_date = date.time()
-
-    sessions_associated = []
-    for session, (start, end) in sessions.items():
-        # handles midnight span cases
-        if start > end:
-            if time_in_date >= start or time_in_date < end:
-                sessions_associated += [session]
-        elif start < end:
-            if start <= time_in_date < end:
-                sessions_associated += [session]
-
-    return sessions_associated
+DURATION_UNITS = [
+    ("day", 24 * 3600),
+    ("hour", 3600),
+    ("minute", 60),
+    ("second", 1),
+]
+
+def humanize_durations(durations) -> pd.Series:
+    # formats a whole timedelta column at once as "2 days, 3 hours and 5 seconds". Missing durations are left empty
+    durations = pd.Series(pd.to_timedelta(durations))
+    missing = durations.isna().to_numpy()
+    remaining_seconds = np.where(missing, 0, durations.abs().to_numpy(dtype="timedelta64[s]").astype(np.int64))
+
+    # non-zero time units only
+    unit_parts = []
+    for unit, unit_seconds in DURATION_UNITS:
+        values, remaining_seconds = np.divmod(remaining_seconds, unit_seconds)
+        unit_parts += [np.where(values > 0, np.char.add(values.astype(str), np.where(values > 1, f" {unit}s",
+                                                                                      f" {unit}")), '')]
+    unit_parts = np.stack(unit_parts, axis=1)
+    has_part = unit_parts != ''
+    part_counts = has_part.sum(axis=1, keepdims=True)
+    part_positions = has_part.cumsum(axis=1)
+
+    # parts are joined by commas, the last one by "and"
+    separators = np.where(~has_part | (part_positions == 1), '',
+                          np.where(part_positions == part_counts, " and ", ", "))
+    formatted_parts = np.char.add(separators, unit_parts)
+    formatted_durations = formatted_parts[:, 0]
+    for column in range(1, formatted_parts.shape[1]):
+        formatted_durations = np.char.add(formatted_durations, formatted_parts[:, column])
+    formatted_durations = np.where(part_counts[:, 0] == 0, "0 seconds", formatted_durations)
+    return pd.Series(np.where(missing, '', formatted_durations).astype(object), index=durations.index)
 
 def underscore_format_table_name(table_name: str, table_suffix="table"):
     if not table_name:
@@ -254,6 +222,26 @@ def paginate_date(date, timeframe, pagination_size: int = DAYS_PAGINATION_SIZE)
 
     return paginated_date
 
+def get_date_timestamps(date: str, day_count: int = 1) -> Tuple[int, int]:
+    # converts a date and day count into the (start, end) UNIX timestamp range, in ms, used by the api
+    if not date:
+        raise ValueError("Unable to convert date to timestamps without a valid date")
+    if day_count < 1:
+        raise ValueError(f"Unable to convert date to timestamps: day_count cannot be lower than 1"
+                         f" (value given: '{day_count}')")
+
+    start_date = datetime.strptime(date, "%Y-%m-%d")
+    start_time = int(start_date.timestamp())
+    end_time = int((start_date + timedelta(days=day_count)).timestamp())
+
+    return start_time * 1000, end_time * 1000
+
+def get_account_id(api_key: str, length: int = 16):
+    # non-reversible identifier used to keep each account's local data apart
+    if not api_key:
+        raise ValueError("Unable to build account id without a valid api key")
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:length]
+
 def flatten_list(list_to_flatten, depth_level=1):
     if depth_level <= 0:
         return list_to_flatten
@@ -0,0 +1,73 @@
+import unittest
+
+from parameterized import parameterized
+from src.api.request_budget import RequestBudget
+
+ENDPOINT = "https://api-testnet.bybit.com/v5/execution/list"
+OTHER_ENDPOINT = "https://api-testnet.bybit.com/v5/order/history"
+
+class TestRequestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.budget = RequestBudget({"requests_per_second": 10})
+
+    @parameterized.expand([
+        ("unknown_density", None, 0, False, 1),
+        ("empty_window", 0, 0, False, 1),
+        ("dense_window", 4.2, 0, False, 5),
+        ("partly_cached", 4.2, 3, False, 2),
+        ("more_cached_than_expected", 2, 3, False, 1),
+        ("fully_cached", 3, 3, True, 0),
+    ])
+    def test_add_window(self, _, expected_pages, cached_pages, fully_cached, expected_requests):
+        self.budget.add_window(ENDPOINT, {"startTime": 0, "endTime": 1}, expected_pages, cached_pages, fully_cached)
+        self.assertEqual(self.budget.endpoints["/v5/execution/list"],
+                         {"windows": 1, "requests": expected_requests, "cached_pages": cached_pages})
+
+    def test_add_window_once(self):
+        for params in [{"startTime": 0, "endTime": 1}, {"endTime": 1, "startTime": 0}]:
+            self.budget.add_window(ENDPOINT, params, 2)
+        self.assertEqual(self.budget.get_request_count(), 2)
+
+    @parameterized.expand([
+        ("nothing_accounted", [], {"startTime": 0, "endTime": 7}, [(0, 7)]),
+        ("contained_window", [{"startTime": 0, "endTime": 7}], {"startTime": 1, "endTime": 2}, []),
+        ("overlapping_windows", [{"startTime": 1, "endTime": 2}, {"startTime": 4, "endTime": 9}],
+         {"startTime": 0, "endTime": 7}, [(0, 1), (2, 4)]),
+        ("other_params", [{"startTime": 0, "endTime": 7, "symbol": "BTCUSDT"}], {"startTime": 0, "endTime": 7},
+         [(0, 7)]),
+    ])
+    def test_get_gaps(self, _, accounted_windows, params, expected_result):
+        for accounted_params in accounted_windows:
+            self.budget.add_window(ENDPOINT, accounted_params)
+        self.assertEqual(self.budget.get_gaps(ENDPOINT, params), expected_result)
+
+    def test_add_overlapping_windows(self):
+        # a daily window, then the weekly one containing it: only the rest of the week gets requested
+        self.budget.add_window(ENDPOINT, {"startTime": 2, "endTime": 3}, 1)
+        for gap_start, gap_end in self.budget.get_gaps(ENDPOINT, {"startTime": 0, "endTime": 7}):
+            # a page per day
+            self.budget.add_window(ENDPOINT, {"startTime": gap_start, "endTime": gap_end}, gap_end - gap_start)
+        self.assertEqual(self.budget.endpoints["/v5/execution/list"],
+                         {"windows": 3, "requests": 1 + 2 + 4, "cached_pages": 0})
+
+    @parameterized.expand([
+        ("no_windows", {}, 0.0),
+        ("within_burst", {ENDPOINT: 10}, 0.0),
+        ("slowest_endpoint", {ENDPOINT: 30, OTHER_ENDPOINT: 20}, 2.0),
+    ])
+    def test_get_expected_duration(self, _, requests_per_endpoint, expected_result):
+        for endpoint, requests in requests_per_endpoint.items():
+            for window in range(requests):
+                self.budget.add_window(endpoint, {"startTime": window, "endTime": window + 1})
+        self.assertEqual(self.budget.get_expected_duration(), expected_result)
+
+    @parameterized.expand([
+        ("nothing_planned", [], 0.0),
+        ("half_cached", [(2, 2, True), (2, 0, False)], 0.5),
+    ])
+    def test_get_cache_hit_ratio(self, _, windows, expected_result):
+        for window, (expected_pages, cached_pages, fully_cached) in enumerate(windows):
+            self.budget.add_window(ENDPOINT, {"startTime": window, "endTime": window + 1}, expected_pages,
+                                   cached_pages, fully_cached)
+        self.assertEqual(self.budget.get_cache_hit_ratio(), expected_result)
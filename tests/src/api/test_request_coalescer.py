@@ -0,0 +1,75 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from parameterized import parameterized
+from src.api.request_coalescer import RequestCoalescer
+
+KEY = RequestCoalescer.build_key("https://api-testnet.bybit.com/v5/execution/list")
+
+class TestRequestCoalescer(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.fetched_windows = []
+
+    async def fetch_window(self, start_time, end_time):
+        self.fetched_windows.append((start_time, end_time))
+        await asyncio.sleep(0)
+        # one record per time unit
+        return [{"execTime": str(time)} for time in range(start_time, end_time)]
+
+    @parameterized.expand([
+        ("no_pieces", 0, 10, [], [(0, 10)]),
+        ("fully_covered", 2, 8, [[0, 10, None]], []),
+        ("covered_head", 0, 10, [[0, 4, None]], [(4, 10)]),
+        ("covered_middle", 0, 10, [[6, 8, None], [2, 4, None]], [(0, 2), (4, 6), (8, 10)]),
+        ("covered_beyond", 0, 10, [[5, 20, None]], [(0, 5)]),
+    ])
+    def test_get_gaps(self, _, start_time, end_time, pieces, expected_result):
+        self.assertEqual(RequestCoalescer.get_gaps(start_time, end_time, pieces), expected_result)
+
+    def test_build_key(self):
+        self.assertEqual(RequestCoalescer.build_key("url", {"symbol": "BTCUSDT", "category": "linear"}),
+                         RequestCoalescer.build_key("url", {"category": "linear", "symbol": "BTCUSDT"}))
+        self.assertNotEqual(RequestCoalescer.build_key("url", {"symbol": "BTCUSDT"}), KEY)
+
+    async def test_identical_windows_share_one_request(self):
+        results = await asyncio.gather(*[self.coalescer.fetch(KEY, 0, 10, "execTime", self.fetch_window)
+                                         for _ in range(3)])
+        self.assertEqual(self.fetched_windows, [(0, 10)])
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(self.coalescer.stats, {"requested": 3, "fetched": 1, "shared": 2})
+
+    async def test_overlapping_timeframes(self):
+        # daily, weekly and monthly like windows requested side by side
+        daily, weekly, monthly = await asyncio.gather(
+            self.coalescer.fetch(KEY, 7, 8, "execTime", self.fetch_window),
+            self.coalescer.fetch(KEY, 7, 14, "execTime", self.fetch_window),
+            self.coalescer.fetch(KEY, 0, 31, "execTime", self.fetch_window),
+        )
+        self.assertEqual(sorted(self.fetched_windows), [(0, 7), (7, 8), (8, 14), (14, 31)])
+        for (start_time, end_time), records in [((7, 8), daily), ((7, 14), weekly), ((0, 31), monthly)]:
+            self.assertEqual(records, [{"execTime": str(time)} for time in range(start_time, end_time)])
+
+    async def test_contained_window_after_completion(self):
+        await self.coalescer.fetch(KEY, 0, 31, "execTime", self.fetch_window)
+        records = await self.coalescer.fetch(KEY, 3, 5, "execTime", self.fetch_window)
+        self.assertEqual(self.fetched_windows, [(0, 31)])
+        self.assertEqual(records, [{"execTime": "3"}, {"execTime": "4"}])
+
+    async def test_failed_piece_is_fetched_again(self):
+        async def failing_fetch_window(start_time, end_time):
+            raise ConnectionError("Connection reset by peer")
+
+        with self.assertRaises(ConnectionError):
+            await self.coalescer.fetch(KEY, 0, 10, "execTime", failing_fetch_window)
+        await self.coalescer.fetch(KEY, 0, 10, "execTime", self.fetch_window)
+        self.assertEqual(self.fetched_windows, [(0, 10)])
+
+    @parameterized.expand([
+        ("nothing_fetched", {"requested": 0, "fetched": 0, "shared": 0}, 0.0),
+        ("half_shared", {"requested": 2, "fetched": 1, "shared": 1}, 0.5),
+    ])
+    def test_get_saved_ratio(self, _, stats, expected_result):
+        self.coalescer.stats = stats
+        self.assertEqual(self.coalescer.get_saved_ratio(), expected_result)
@@ -2,7 +2,13 @@ from unittest import IsolatedAsyncioTestCase
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime
 from urllib.error import HTTPError
-from src.api.request_handler import RequestHandler
+import asyncio
+import json
+import tempfile
+import threading
+import aiohttp
+from src.api.request_handler import RequestHandler, IncompleteResponseError
+from src.api.retry_policy import RetryableResponseError
 from parameterized import parameterized
 
 class TestRequestHandler(IsolatedAsyncioTestCase):
@@ -23,7 +29,8 @@ class TestRequestHandler(IsolatedAsyncioTestCase):
             self.assertEqual(handler.api_secret, api_secret)
 
     def setUp(self):
-        self.handler = RequestHandler(api_key="valid_key", api_secret="valid_secret")
+        self.handler = RequestHandler(api_key="valid_key", api_secret="valid_secret",
+                                      cache_params={"enabled": False})
 
     @parameterized.expand([
         ("valid_test", "2025-01-01", 2, {"test": "value"}, True, None),
@@ -151,7 +158,7 @@ class TestRequestHandler(IsolatedAsyncioTestCase):
         ),
     ])
     # @patch("src.api.request_handler.aiohttp.ClientSession.get")
-    @patch("src.api.request_handler.requests.get")
+    @patch("src.api.request_handler.requests.Session.get")
     @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
     @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
     @patch("src.api.request_handler.Logger.debug")
@@ -180,7 +187,8 @@ class TestRequestHandler(IsolatedAsyncioTestCase):
 
                 mock_object = MagicMock()
                 mock_object.status_code = result.get("status_code")
-                mock_object.json.return_value = result.get("response")
+                mock_object.headers = result.get("headers", {})
+                mock_object.content = json.dumps(result.get("response")).encode("utf-8")
                 if mock_object.status_code != 200:
                     mock_object.raise_for_status.side_effect = HTTPError(
                         code=mock_object.status_code, msg=f"Bad HTTP {mock_object.status_code}", hdrs={}, fp=None,
@@ -199,4 +207,231 @@ class TestRequestHandler(IsolatedAsyncioTestCase):
                 endpoint=endpoint, additional_params={}, date="2025-01-01", day_count=day_count, use_async=False
             )
 
-        self.assertEqual(response, expected_result)
\ No newline at end of file
+        self.assertEqual(response, expected_result)
+
+    @parameterized.expand([
+        ("no_connections", {"requests": 0, "created": 0, "reused": 0}, 0.0),
+        ("no_reuse", {"requests": 3, "created": 3, "reused": 0}, 0.0),
+        ("mostly_reused", {"requests": 4, "created": 1, "reused": 3}, 0.75),
+    ])
+    def test_get_connection_reuse_ratio(self, _, connection_stats, expected_result):
+        self.handler.connection_stats = connection_stats
+        self.assertEqual(self.handler.get_connection_reuse_ratio(), expected_result)
+
+    def test_connection_params_override_defaults(self):
+        handler = RequestHandler("api_key", "api_secret", connection_params={"limit_per_host": 2})
+        self.assertEqual(handler.connection_params["limit_per_host"], 2)
+        self.assertIn("keepalive_timeout", handler.connection_params)
+
+    async def test_open_close_session(self):
+        session = await self.handler.open_session()
+        self.assertFalse(session.closed)
+        # opening it again must return the very same pooled session
+        self.assertIs(await self.handler.open_session(), session)
+
+        await self.handler.close_session()
+        self.assertTrue(session.closed)
+        self.assertIsNone(self.handler.session)
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_paginated_response_uses_pooled_session(self, mock_generate_signature, mock_process_request):
+        mock_process_request.return_value = {"retCode": 0, "result": {"list": [{"data": "item1"}],
+                                                                      "nextPageCursor": None}}
+        async with self.handler as handler:
+            await handler.get_paginated_response("https://api-testnet.bybit.com/v5/order/history", {},
+                                                 "2025-01-01", 1, use_async=True)
+            await handler.get_paginated_response("https://api-testnet.bybit.com/v5/execution/list", {},
+                                                 "2025-01-01", 1, use_async=True)
+            sessions_used = [call.args[0] for call in mock_process_request.call_args_list]
+
+        self.assertTrue(all(session is sessions_used[0] for session in sessions_used))
+        self.assertTrue(sessions_used[0].closed)
+
+    @parameterized.expand([
+        ("rate_limited_page", {"retCode": 10006, "retMsg": "Too many visits!"}),
+        ("server_timeout", {"retCode": 10000, "retMsg": "Server Timeout"}),
+        ("connection_error", aiohttp.ClientConnectionError("Connection reset by peer")),
+        ("request_timeout", asyncio.TimeoutError()),
+    ])
+    @patch("src.api.retry_policy.asyncio.sleep", new_callable=AsyncMock)
+    @patch("src.api.retry_policy.logger")
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_paginated_response_resumes_from_failed_page(self, _, failed_response, mock_generate_signature,
+                                                                   mock_process_request, mock_logger, mock_sleep):
+        mock_process_request.side_effect = [
+            {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}},
+            failed_response,
+            {"retCode": 0, "result": {"list": [{"data": "item2"}], "nextPageCursor": None}},
+        ]
+        response = await self.handler.get_paginated_response("https://api-testnet.bybit.com/v5/order/history",
+                                                             {}, "2025-01-01", 1, use_async=True)
+
+        self.assertEqual(response, [{"data": "item1"}, {"data": "item2"}])
+        # the failed page must be requested again from its own cursor, not from the first page
+        self.assertEqual(mock_process_request.call_count, 3)
+        self.assertEqual(mock_process_request.call_args_list[2].args[2]["cursor"], "cursor1")
+        mock_sleep.assert_awaited_once()
+
+    @patch("src.api.retry_policy.asyncio.sleep", new_callable=AsyncMock)
+    @patch("src.api.retry_policy.logger")
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_paginated_response_exhausted_retries(self, mock_generate_signature, mock_process_request,
+                                                            mock_logger, mock_sleep):
+        handler = RequestHandler("api_key", "api_secret", retry_params={"max_attempts": 3},
+                                 cache_params={"enabled": False})
+        mock_process_request.return_value = {"retCode": 10006, "retMsg": "Too many visits!"}
+
+        with self.assertRaises(RetryableResponseError):
+            await handler.get_paginated_response("https://api-testnet.bybit.com/v5/order/history",
+                                                 {}, "2025-01-01", 1, use_async=True)
+        self.assertEqual(mock_process_request.call_count, 3)
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_paginated_response_uses_cached_pages(self, mock_generate_signature, mock_process_request):
+        mock_process_request.side_effect = [
+            {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}},
+            {"retCode": 0, "result": {"list": [{"data": "item2"}], "nextPageCursor": None}},
+        ]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            handler = RequestHandler("api_key", "api_secret", cache_params={"cache_dir": cache_dir})
+            endpoint = "https://api-testnet.bybit.com/v5/order/history"
+
+            first_response = await handler.get_paginated_response(endpoint, {}, "2025-01-01", 1, use_async=True)
+            # every page of the (closed) window is now cached, so no other request should go out
+            second_response = await handler.get_paginated_response(endpoint, {}, "2025-01-01", 1, use_async=True)
+
+        self.assertEqual(first_response, second_response)
+        self.assertEqual(mock_process_request.call_count, 2)
+        self.assertEqual(handler.response_cache.stats, {"hits": 2, "misses": 2})
+
+    @parameterized.expand([
+        ("nothing_cached", [], (0, False)),
+        ("chain_cut_short", [("", "cursor1")], (1, False)),
+        ("whole_chain", [("", "cursor1"), ("cursor1", "")], (2, True)),
+    ])
+    def test_count_cached_pages(self, _, cached_pages, expected_result):
+        endpoint = "https://api-testnet.bybit.com/v5/order/history"
+        window_params = {"startTime": 1735689600000, "endTime": 1735776000000}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            handler = RequestHandler("api_key", "api_secret", cache_params={"cache_dir": cache_dir})
+            for cursor, next_cursor in cached_pages:
+                page_params = window_params | ({"cursor": cursor} if cursor else {})
+                handler.response_cache.set(endpoint, handler.build_request_params(page_params),
+                                           {"retCode": 0, "result": {"list": [], "nextPageCursor": next_cursor}})
+
+            self.assertEqual(handler.count_cached_pages(endpoint, window_params), expected_result)
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_iter_paginated_response_prefetches_next_page(self, mock_generate_signature,
+                                                                mock_process_request):
+        mock_process_request.side_effect = [
+            {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}},
+            {"retCode": 0, "result": {"list": [{"data": "item2"}], "nextPageCursor": None}},
+        ]
+        pages = []
+        async for page in self.handler.iter_paginated_response("https://api-testnet.bybit.com/v5/order/history",
+                                                               {}, "2025-01-01", 1, use_async=True):
+            # the second page is requested while the first one is still being processed
+            await asyncio.sleep(0)
+            pages.append((page, mock_process_request.call_count))
+
+        self.assertEqual(pages, [([{"data": "item1"}], 2), ([{"data": "item2"}], 2)])
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_iter_paginated_response_from_cursor(self, mock_generate_signature, mock_process_request):
+        mock_process_request.side_effect = [
+            {"retCode": 0, "result": {"list": [{"data": "item2"}], "nextPageCursor": "cursor2"}},
+            {"retCode": 0, "result": {"list": [{"data": "item3"}], "nextPageCursor": ""}},
+        ]
+        pages = [page async for page in self.handler.iter_paginated_response(
+            "https://api-testnet.bybit.com/v5/order/history", {"cursor": "cursor1"}, "2025-01-01", 1,
+            use_async=True, with_cursors=True)]
+
+        self.assertEqual(pages, [("cursor1", "cursor2", [{"data": "item2"}]), ("cursor2", "", [{"data": "item3"}])])
+        self.assertEqual(mock_process_request.call_args_list[0].args[2].get("cursor"), "cursor1")
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_iter_paginated_response_incomplete_chain(self, mock_generate_signature, mock_process_request):
+        mock_process_request.side_effect = [
+            {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}},
+            {"retCode": 10002, "retMsg": "invalid request"},
+        ]
+        pages = []
+        # a broken cursor chain must not pass for a complete one
+        with self.assertRaises(IncompleteResponseError):
+            async for page in self.handler.iter_paginated_response("https://api-testnet.bybit.com/v5/order/history",
+                                                                   {}, "2025-01-01", 1, use_async=True):
+                pages.append(page)
+
+        self.assertEqual(pages, [[{"data": "item1"}]])
+
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_iter_paginated_response_stops_early(self, mock_generate_signature, mock_process_request):
+        async def process_request(session, url, params):
+            if params.get("cursor"):
+                await asyncio.sleep(10)
+            return {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}}
+
+        mock_process_request.side_effect = process_request
+        pages = self.handler.iter_paginated_response("https://api-testnet.bybit.com/v5/order/history",
+                                                     {}, "2025-01-01", 1, use_async=True)
+        self.assertEqual(await anext(pages), [{"data": "item1"}])
+        # closing the iterator must not wait for (nor leak) the page already in flight
+        await asyncio.wait_for(pages.aclose(), timeout=1)
+
+    @patch("src.api.request_handler.requests.Session.get")
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_paginated_response_sync_runs_in_executor(self, mock_generate_signature, mock_sync_get):
+        request_threads = []
+
+        def sync_get(url, params=None, timeout=None):
+            request_threads.append(threading.current_thread().name)
+            mock_object = MagicMock()
+            mock_object.status_code = 200
+            mock_object.headers = {}
+            mock_object.content = json.dumps({"retCode": 0, "result": {"list": [{"data": url}],
+                                                                       "nextPageCursor": None}}).encode("utf-8")
+            return mock_object
+
+        mock_sync_get.side_effect = sync_get
+        endpoints = ["https://api-testnet.bybit.com/v5/order/history",
+                     "https://api-testnet.bybit.com/v5/execution/list"]
+        responses = await asyncio.gather(*[
+            self.handler.get_paginated_response(endpoint, {}, "2025-01-01", 1, use_async=False)
+            for endpoint in endpoints
+        ])
+        sync_session = self.handler.sync_session
+        await self.handler.close_session()
+
+        self.assertEqual(responses, [[{"data": endpoint}] for endpoint in endpoints])
+        # requests are sent from the pool's worker threads, through the same pooled session
+        self.assertTrue(all(name.startswith("request-handler") for name in request_threads))
+        self.assertIsNotNone(sync_session)
+        self.assertIsNone(self.handler.sync_session)
+        self.assertIsNone(self.handler.executor)
+
+    @parameterized.expand([
+        ("more_pages", {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": "cursor1"}},
+         ([{"data": "item1"}], True)),
+        ("last_page", {"retCode": 0, "result": {"list": [{"data": "item1"}], "nextPageCursor": ""}},
+         ([{"data": "item1"}], False)),
+        ("invalid_response", {"retCode": 10001, "retMsg": "params error"}, ([], False)),
+    ])
+    @patch("src.api.request_handler.logger")
+    @patch("src.api.request_handler.RequestHandler.process_request", new_callable=AsyncMock)
+    @patch("src.api.request_handler.RequestHandler.generate_signature", return_value="mock_signature")
+    async def test_get_first_page(self, _, response, expected_result, mock_generate_signature,
+                                  mock_process_request, mock_logger):
+        mock_process_request.return_value = response
+        result = await self.handler.get_first_page("https://api-testnet.bybit.com/v5/order/history",
+                                                   {"startTime": 1, "endTime": 2}, use_async=True)
+        self.assertEqual(result, expected_result)
+        mock_process_request.assert_awaited_once()
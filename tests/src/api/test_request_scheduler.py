@@ -0,0 +1,82 @@
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from parameterized import parameterized
+from src.api.request_scheduler import TokenBucket, RequestScheduler
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+
+    @parameterized.expand([
+        ("valid_test", 10, 10, True),
+        ("zero_rate", 0, 10, False),
+        ("negative_capacity", 10, -1, False),
+    ])
+    def test_constructor(self, _, rate, capacity, is_valid):
+        if not is_valid:
+            with self.assertRaises(ValueError):
+                TokenBucket(rate, capacity)
+            return
+        bucket = TokenBucket(rate, capacity)
+        self.assertEqual(bucket.tokens, capacity)
+
+    async def test_acquire_consumes_tokens(self):
+        bucket = TokenBucket(rate=1000, capacity=2)
+        await bucket.acquire()
+        await bucket.acquire()
+        self.assertLess(bucket.tokens, 1)
+        self.assertGreater(bucket.get_wait_time(), 0.0)
+
+    @parameterized.expand([
+        ("limit_updates_rate", 50, 40, None, 50.0, False),
+        ("exhausted_limit_blocks", 50, 0, int((time.time() + 5) * 1000), 50.0, True),
+    ])
+    def test_update(self, _, limit, remaining, reset_timestamp, expected_rate, is_blocked):
+        bucket = TokenBucket(rate=10, capacity=10)
+        bucket.update(limit, remaining, reset_timestamp)
+
+        self.assertEqual(bucket.rate, expected_rate)
+        self.assertLessEqual(bucket.tokens, remaining)
+        self.assertEqual(bucket.get_wait_time() > 1.0, is_blocked)
+
+
+class TestRequestScheduler(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.scheduler = RequestScheduler({"max_in_flight": 2, "max_in_flight_per_endpoint": 1})
+
+    @parameterized.expand([
+        ("full_url", "https://api.bybit.com/v5/order/history?category=linear", "/v5/order/history"),
+        ("path_only", "/v5/execution/list", "/v5/execution/list"),
+    ])
+    def test_get_endpoint_key(self, _, url, expected_result):
+        self.assertEqual(RequestScheduler.get_endpoint_key(url), expected_result)
+
+    def test_buckets_are_per_endpoint(self):
+        bucket = self.scheduler.get_bucket("https://api.bybit.com/v5/order/history")
+        self.assertIs(bucket, self.scheduler.get_bucket("https://api.bybit.com/v5/order/history?cursor=1"))
+        self.assertIsNot(bucket, self.scheduler.get_bucket("https://api.bybit.com/v5/execution/list"))
+
+    @parameterized.expand([
+        ("valid_headers", {"X-Bapi-Limit": "50", "X-Bapi-Limit-Status": "49",
+                           "X-Bapi-Limit-Reset-Timestamp": "1672531200000"}, 50.0),
+        ("missing_headers", {}, 10.0),
+        ("invalid_headers", {"X-Bapi-Limit": "fifty"}, 10.0),
+    ])
+    def test_update_from_headers(self, _, headers, expected_rate):
+        url = "https://api.bybit.com/v5/order/history"
+        self.scheduler.update_from_headers(url, headers)
+        self.assertEqual(self.scheduler.get_bucket(url).rate, expected_rate)
+
+    @patch("src.api.request_scheduler.logger")
+    def test_penalize(self, mock_logger):
+        url = "https://api.bybit.com/v5/order/history"
+        self.scheduler.penalize(url, {"X-Bapi-Limit-Reset-Timestamp": str(int((time.time() + 5) * 1000))})
+        self.assertGreater(self.scheduler.get_bucket(url).get_wait_time(), 1.0)
+
+    async def test_slot_caps_in_flight_requests_per_endpoint(self):
+        url = "https://api.bybit.com/v5/order/history"
+        async with self.scheduler.slot(url):
+            # the single per endpoint slot is taken, another request would have to wait
+            self.assertTrue(self.scheduler.endpoint_semaphores["/v5/order/history"].locked())
+        self.assertFalse(self.scheduler.endpoint_semaphores["/v5/order/history"].locked())
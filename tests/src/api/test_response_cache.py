@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import unittest
+
+from parameterized import parameterized
+from src.api.response_cache import ResponseCache
+
+ENDPOINT = "https://api.bybit.com/v5/execution/list"
+PAYLOAD = {"retCode": 0, "result": {"list": [{"execId": "1"}], "nextPageCursor": None}}
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache({"cache_dir": self.cache_dir.name, "ttl": 60})
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_build_key_ignores_volatile_params(self):
+        params = {"api_key": "key", "startTime": 1, "endTime": 2, "timestamp": "1000", "sign": "abc"}
+        other_params = params | {"timestamp": "2000", "sign": "def"}
+        self.assertEqual(ResponseCache.build_key(ENDPOINT, params), ResponseCache.build_key(ENDPOINT, other_params))
+
+    @parameterized.expand([
+        ("different_cursor", {"cursor": "cursor1"}),
+        ("different_window", {"endTime": 3}),
+        ("different_account", {"api_key": "other_key"}),
+    ])
+    def test_build_key_changes_with_response_shaping_params(self, _, changed_params):
+        params = {"api_key": "key", "startTime": 1, "endTime": 2}
+        self.assertNotEqual(ResponseCache.build_key(ENDPOINT, params),
+                            ResponseCache.build_key(ENDPOINT, params | changed_params))
+
+    def test_set_get(self):
+        params = {"startTime": 1, "endTime": 2}
+        self.assertIsNone(self.cache.get(ENDPOINT, params))
+
+        self.cache.set(ENDPOINT, params, PAYLOAD)
+        self.assertEqual(self.cache.get(ENDPOINT, params), PAYLOAD)
+        self.assertEqual(self.cache.stats, {"hits": 1, "misses": 1})
+        self.assertEqual(self.cache.get_hit_ratio(), 0.5)
+
+    @parameterized.expand([
+        # cached an hour ago, the window had closed long before that
+        ("closed_window_never_expires", -10 * 86400, -3600, False),
+        # cached an hour ago, while the window was still open
+        ("open_window_expires", 3600, -3600, True),
+        # cached a few seconds ago, while the window was still open
+        ("open_window_within_ttl", 3600, -5, False),
+    ])
+    def test_is_expired(self, _, end_time_offset, cached_at_offset, expected_result):
+        now = time.time()
+        params = {"startTime": 1, "endTime": int((now + end_time_offset) * 1000)}
+        self.cache.set(ENDPOINT, params, PAYLOAD)
+        path = self.cache.get_path(self.cache.build_key(ENDPOINT, params))
+        os.utime(path, (now + cached_at_offset, now + cached_at_offset))
+
+        self.assertEqual(self.cache.is_expired(path, params), expected_result)
+        self.assertEqual(self.cache.get(ENDPOINT, params) is None, expected_result)
+
+    def test_disabled_cache(self):
+        cache = ResponseCache({"enabled": False, "cache_dir": self.cache_dir.name})
+        params = {"startTime": 1, "endTime": 2}
+        cache.set(ENDPOINT, params, PAYLOAD)
+        self.assertIsNone(cache.get(ENDPOINT, params))
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
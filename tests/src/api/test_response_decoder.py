@@ -0,0 +1,53 @@
+import json
+import sys
+import unittest
+from unittest.mock import patch
+
+from parameterized import parameterized
+from src.api.response_decoder import ResponseDecoder
+
+ENDPOINT = "https://api-testnet.bybit.com/v5/execution/list"
+SCHEMA = {"execTime": int, "execPrice": float, "symbol": sys.intern}
+
+def build_payload(records):
+    return json.dumps({"retCode": 0, "result": {"list": records, "nextPageCursor": ""}}).encode("utf-8")
+
+class TestResponseDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = ResponseDecoder({ENDPOINT: SCHEMA})
+
+    @parameterized.expand([
+        ("typed_record", {"execTime": "1735689600000", "execPrice": "78641.4", "symbol": "BTCUSDT", "execId": "1"},
+         {"execTime": 1735689600000, "execPrice": 78641.4, "symbol": "BTCUSDT", "execId": "1"}),
+        ("empty_values_kept", {"execTime": "1735689600000", "execPrice": ""},
+         {"execTime": 1735689600000, "execPrice": ""}),
+        ("unparsable_values_kept", {"execTime": "not a time"}, {"execTime": "not a time"}),
+        ("already_typed", {"execTime": 1735689600000, "execPrice": 1.5}, {"execTime": 1735689600000, "execPrice": 1.5}),
+    ])
+    def test_decode(self, _, record, expected_result):
+        response_json = self.decoder.decode(ENDPOINT, build_payload([record]))
+        self.assertEqual(response_json["result"]["list"], [expected_result])
+
+    def test_decode_interns_strings(self):
+        records = self.decoder.decode(ENDPOINT, build_payload([{"symbol": "BTCUSDT"}, {"symbol": "BTCUSDT"}]))
+        symbols = [record["symbol"] for record in records["result"]["list"]]
+        self.assertIs(symbols[0], symbols[1])
+
+    @parameterized.expand([
+        ("unknown_endpoint", "https://api-testnet.bybit.com/v5/order/history"),
+        ("endpoint_with_query", f"{ENDPOINT}?category=linear"),
+    ])
+    def test_decode_schema_lookup(self, _, url):
+        response_json = self.decoder.decode(url, build_payload([{"execTime": "1"}]))
+        expected_time = 1 if url.startswith(ENDPOINT) else "1"
+        self.assertEqual(response_json["result"]["list"][0]["execTime"], expected_time)
+
+    def test_decode_error_response(self):
+        response_json = self.decoder.decode(ENDPOINT, json.dumps({"retCode": 10001, "result": {}}))
+        self.assertEqual(response_json, {"retCode": 10001, "result": {}})
+
+    @patch("src.api.response_decoder.orjson", None)
+    def test_decode_without_orjson(self):
+        response_json = self.decoder.decode(ENDPOINT, build_payload([{"execTime": "1"}]))
+        self.assertEqual(response_json["result"]["list"], [{"execTime": 1}])
@@ -0,0 +1,68 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, AsyncMock
+from urllib.error import HTTPError
+
+import aiohttp
+import requests
+from parameterized import parameterized
+from src.api.retry_policy import RetryPolicy, RetryableResponseError
+
+class TestRetryPolicy(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy({"max_attempts": 3, "base_delay": 1.0, "max_delay": 3.0})
+
+    def test_constructor_invalid_max_attempts(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy({"max_attempts": 0})
+
+    @parameterized.expand([
+        ("valid_response", {"retCode": 0}, False),
+        ("rate_limited", {"retCode": 10006, "retMsg": "Too many visits!"}, True),
+        ("non_retryable_code", {"retCode": 10001, "retMsg": "params error"}, False),
+    ])
+    def test_check_response(self, _, response_json, should_raise):
+        if should_raise:
+            with self.assertRaises(RetryableResponseError):
+                self.policy.check_response(response_json)
+            return
+        self.policy.check_response(response_json)
+
+    @parameterized.expand([
+        ("retryable_ret_code", RetryableResponseError(10006), True),
+        ("timeout", asyncio.TimeoutError(), True),
+        ("connection_error", aiohttp.ClientConnectionError(), True),
+        ("requests_connection_error", requests.ConnectionError(), True),
+        ("server_error", HTTPError(url="", code=503, msg="", hdrs={}, fp=None), True),
+        ("forbidden", HTTPError(url="", code=403, msg="", hdrs={}, fp=None), False),
+        ("unrelated_error", KeyError("missing"), False),
+    ])
+    def test_is_retryable(self, _, exc, expected_result):
+        self.assertEqual(self.policy.is_retryable(exc), expected_result)
+
+    @parameterized.expand([
+        ("first_attempt", 1, 1.0),
+        ("second_attempt", 2, 2.0),
+        ("capped_attempt", 5, 3.0),
+    ])
+    def test_get_delay(self, _, attempt, expected_max_delay):
+        for _ in range(20):
+            delay = self.policy.get_delay(attempt)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, expected_max_delay)
+
+    @patch("src.api.retry_policy.asyncio.sleep", new_callable=AsyncMock)
+    @patch("src.api.retry_policy.logger")
+    async def test_run_retries_until_success(self, mock_logger, mock_sleep):
+        request_func = AsyncMock(side_effect=[asyncio.TimeoutError(), {"retCode": 0}])
+        self.assertEqual(await self.policy.run(request_func), {"retCode": 0})
+        self.assertEqual(request_func.await_count, 2)
+
+    @patch("src.api.retry_policy.asyncio.sleep", new_callable=AsyncMock)
+    async def test_run_does_not_retry_non_retryable_errors(self, mock_sleep):
+        request_func = AsyncMock(side_effect=KeyError("missing"))
+        with self.assertRaises(KeyError):
+            await self.policy.run(request_func)
+        self.assertEqual(request_func.await_count, 1)
+        mock_sleep.assert_not_awaited()
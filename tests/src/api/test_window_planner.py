@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from parameterized import parameterized
+from src.api.window_planner import WindowPlanner
+
+HOUR_MS = 3600000
+DAY_MS = 24 * HOUR_MS
+# 2025-01-01 00:00:00 UTC
+START = 1735689600000
+
+class TestWindowPlanner(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.planner = WindowPlanner({"max_window_span": 7 * 24 * 3600, "min_window_span": 3600,
+                                      "max_chain_length": 2})
+
+    @parameterized.expand([
+        ("min_span_above_max_span", {"min_window_span": 10, "max_window_span": 5}, False),
+        ("no_min_span", {"min_window_span": 0}, False),
+        ("no_chain", {"max_chain_length": 0}, False),
+        ("valid", {}, True),
+    ])
+    def test_constructor(self, _, planner_params, is_valid):
+        if not is_valid:
+            with self.assertRaises(ValueError):
+                WindowPlanner(planner_params)
+            return
+        self.assertTrue(WindowPlanner(planner_params).enabled)
+
+    @parameterized.expand([
+        ("contiguous_windows_merged", [(START, START + 6 * DAY_MS), (START + 6 * DAY_MS, START + 12 * DAY_MS)],
+         [(START, START + 7 * DAY_MS), (START + 7 * DAY_MS, START + 12 * DAY_MS)]),
+        ("disjoint_windows_kept", [(START + 3 * DAY_MS, START + 4 * DAY_MS), (START, START + DAY_MS)],
+         [(START, START + DAY_MS), (START + 3 * DAY_MS, START + 4 * DAY_MS)]),
+        ("no_windows", [], []),
+    ])
+    def test_merge_windows(self, _, windows, expected_result):
+        self.assertEqual(self.planner.merge_windows(windows), expected_result)
+
+    @parameterized.expand([
+        ("unknown_density", None, [(START, START + DAY_MS)]),
+        ("within_chain_length", 2, [(START, START + DAY_MS)]),
+        ("split_in_two", 4, [(START, START + 12 * HOUR_MS), (START + 12 * HOUR_MS, START + DAY_MS)]),
+        ("bounded_by_min_span", 1000, [(START + hour * HOUR_MS, START + (hour + 1) * HOUR_MS)
+                                       for hour in range(24)]),
+    ])
+    def test_split_window(self, _, expected_pages, expected_result):
+        self.assertEqual(self.planner.split_window(START, START + DAY_MS, expected_pages), expected_result)
+
+    @parameterized.expand([
+        ("single_page", [{"execTime": str(START)}], False, 1),
+        ("empty_window", [], False, 0),
+        # the first page only covers the last quarter of the window
+        ("dense_window", [{"execTime": str(START + 18 * HOUR_MS)}, {"execTime": str(START + 20 * HOUR_MS)}],
+         True, 4),
+        ("no_times", [{"execId": "1"}], True, None),
+    ])
+    def test_estimate_pages_from_probe(self, _, records, has_more, expected_result):
+        self.assertEqual(WindowPlanner.estimate_pages_from_probe(records, has_more, "execTime", START,
+                                                                 START + DAY_MS), expected_result)
+
+    def test_estimate_pages_from_history(self):
+        self.assertIsNone(self.planner.estimate_pages("transactions", START, START + DAY_MS))
+        self.planner.record("transactions", START, START + DAY_MS, 10)
+        self.planner.record("transactions", START + DAY_MS, START + 2 * DAY_MS, 2)
+        self.assertEqual(self.planner.estimate_pages("transactions", START, START + DAY_MS), 6)
+
+    def test_record_keeps_recent_history(self):
+        planner = WindowPlanner({"history_size": 2})
+        for day in range(3):
+            planner.record("transactions", START + day * DAY_MS, START + (day + 1) * DAY_MS, day)
+        self.assertEqual([pages for _, _, pages in planner.stats["transactions"]], [1, 2])
+
+    async def test_plan_probes_unknown_windows(self):
+        probe = AsyncMock(side_effect=[
+            ([{"execTime": str(START + 6 * DAY_MS)}], True),
+            ([], False),
+        ])
+        windows = [(START, START + 7 * DAY_MS), (START + 7 * DAY_MS, START + 8 * DAY_MS)]
+        planned_windows = await self.planner.plan("transactions", windows, "execTime", probe)
+
+        self.assertEqual(probe.await_count, 2)
+        # 7 expected pages over the first window, split into chains of at most 2 pages
+        self.assertEqual(len(planned_windows), 5)
+        self.assertEqual(planned_windows[0][0], START)
+        self.assertEqual(planned_windows[-1], (START + 7 * DAY_MS, START + 8 * DAY_MS))
+        self.assertTrue(all(previous[1] == current[0] for previous, current in
+                            zip(planned_windows, planned_windows[1:])))
+
+    async def test_plan_with_estimates(self):
+        self.planner.record("transactions", START - DAY_MS, START, 4)
+        planned_windows = await self.planner.plan("transactions", [(START, START + DAY_MS)], "execTime",
+                                                  with_estimates=True)
+        self.assertEqual(planned_windows, [((START, START + 12 * HOUR_MS), 2.0),
+                                           ((START + 12 * HOUR_MS, START + DAY_MS), 2.0)])
+
+    async def test_estimate_windows(self):
+        probe = AsyncMock(return_value=([{"execTime": str(START)}], False))
+        estimated_windows = await WindowPlanner({"enabled": False}).estimate_windows(
+            "transactions", [(START, START + DAY_MS)], "execTime", probe)
+        self.assertEqual(estimated_windows, [((START, START + DAY_MS), 1)])
+
+    async def test_plan_uses_history_before_probing(self):
+        self.planner.record("transactions", START - DAY_MS, START, 0)
+        probe = AsyncMock()
+        planned_windows = await self.planner.plan("transactions", [(START, START + DAY_MS)], "execTime", probe)
+
+        probe.assert_not_awaited()
+        self.assertEqual(planned_windows, [(START, START + DAY_MS)])
+
+    async def test_plan_disabled(self):
+        planner = WindowPlanner({"enabled": False})
+        windows = [(START, START + DAY_MS), (START + DAY_MS, START + 2 * DAY_MS)]
+        self.assertEqual(await planner.plan("transactions", windows, "execTime"), windows)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as stats_dir:
+            stats_path = os.path.join(stats_dir, "page_stats.json")
+            planner = WindowPlanner(stats_path=stats_path)
+            planner.record("transactions", START, START + DAY_MS, 3)
+            planner.save()
+
+            self.assertEqual(WindowPlanner(stats_path=stats_path).stats, {"transactions": [[START, START + DAY_MS, 3]]})
+
+
+    def test_save_merges_saved_stats(self):
+        with tempfile.TemporaryDirectory() as stats_dir:
+            stats_path = os.path.join(stats_dir, "page_stats.json")
+            # two pipelines fetching the same account, each loaded the stats before the other saved them
+            planner, other_planner = WindowPlanner(stats_path=stats_path), WindowPlanner(stats_path=stats_path)
+            planner.record("transactions", START, START + DAY_MS, 3)
+            other_planner.record("transactions", START + DAY_MS, START + 2 * DAY_MS, 1)
+            planner.save()
+            other_planner.save()
+
+            self.assertEqual(WindowPlanner(stats_path=stats_path).stats, {"transactions": [
+                [START, START + DAY_MS, 3], [START + DAY_MS, START + 2 * DAY_MS, 1]]})
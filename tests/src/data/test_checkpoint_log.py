@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+from src.data.checkpoint_log import CheckpointLog
+
+ENDPOINT = "https://api-testnet.bybit.com/v5/execution/list"
+PARAMS = {"startTime": 1735689600000, "endTime": 1735776000000}
+
+class TestCheckpointLog(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.log_dir.name, "account", "checkpoints.jsonl")
+        self.addCleanup(self.log_dir.cleanup)
+
+    def write_previous_run(self):
+        checkpoint_log = CheckpointLog(self.log_path)
+        checkpoint_log.record_plan("transactions", [(1, 2), (2, 3)])
+        checkpoint_log.record_page(ENDPOINT, PARAMS, "", "cursor1", [{"execId": "1"}])
+        checkpoint_log.record_page(ENDPOINT, PARAMS, "cursor1", "", [{"execId": "2"}])
+
+    def test_constructor_without_path(self):
+        with self.assertRaises(ValueError):
+            CheckpointLog("")
+
+    @parameterized.expand([
+        ("first_page", "", ("cursor1", [{"execId": "1"}])),
+        ("following_page", "cursor1", ("", [{"execId": "2"}])),
+        ("unknown_cursor", "cursor2", None),
+    ])
+    def test_resume(self, _, cursor, expected_result):
+        self.write_previous_run()
+        checkpoint_log = CheckpointLog(self.log_path, resume=True)
+        self.assertEqual(checkpoint_log.get_page(ENDPOINT, dict(reversed(PARAMS.items())), cursor), expected_result)
+        self.assertEqual(checkpoint_log.get_plan("transactions"), [(1, 2), (2, 3)])
+
+    def test_fresh_run_discards_previous_log(self):
+        self.write_previous_run()
+        checkpoint_log = CheckpointLog(self.log_path)
+        self.assertIsNone(checkpoint_log.get_page(ENDPOINT, PARAMS))
+        self.assertFalse(os.path.isfile(self.log_path))
+
+    def test_resume_skips_truncated_entry(self):
+        self.write_previous_run()
+        with open(self.log_path, "a", encoding="utf-8") as file:
+            file.write('{"type": "page", "key": ')
+        checkpoint_log = CheckpointLog(self.log_path, resume=True)
+        self.assertEqual(len(checkpoint_log.pages), 2)
+
+    def test_clear(self):
+        self.write_previous_run()
+        checkpoint_log = CheckpointLog(self.log_path, resume=True)
+        checkpoint_log.clear()
+        self.assertFalse(os.path.isfile(self.log_path))
+        self.assertIsNone(checkpoint_log.get_plan("transactions"))
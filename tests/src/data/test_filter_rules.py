@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+from src.data.filter_rules import (compile_column_rule, compile_row_rule, build_column_mask, build_row_mask,
+                                   build_labels, EQUALS_RULE, NOT_NULL_RULE, IN_SET_RULE, GREATER_THAN_RULE,
+                                   COLUMNS_EQUAL_RULE)
+from src.utils.config import Config
+
+DF = pd.DataFrame({
+    "execType": ["Trade", "Funding", "Trade", None],
+    "positionIdx": [0, 0, np.nan, 1],
+    "tradeId": ["1", "2", "3", np.nan],
+    "execId": ["1", "x", "3", np.nan],
+})
+
+class TestFilterRules(unittest.TestCase):
+
+    @parameterized.expand([
+        ("equals", "execType", (EQUALS_RULE, "Trade"), True, [True, False, True, False]),
+        ("not_null", "positionIdx", (NOT_NULL_RULE,), True, [True, True, False, True]),
+        ("greater_than", "positionIdx", (GREATER_THAN_RULE, 0), True, [False, False, False, True]),
+        ("in_set", "execType", (IN_SET_RULE, {"Trade", "Funding"}), True, [True, True, True, False]),
+        ("function_fallback", "execType", lambda value: value == "Trade", True, [True, False, True, False]),
+        ("unknown_rule", "execType", ("between", 0, 1), False, ValueError),
+    ])
+    def test_compile_column_rule(self, _, col, rule, is_valid, expected_result):
+        if not is_valid:
+            with self.assertRaises(expected_result):
+                compile_column_rule(rule)
+            return
+        self.assertEqual(compile_column_rule(rule)(DF[col]).tolist(), expected_result)
+
+    @parameterized.expand([
+        ("columns_equal", (COLUMNS_EQUAL_RULE, "tradeId", "execId"), True, [True, False, True, False]),
+        ("function_fallback", lambda row: row["tradeId"] == row["execId"], True, [True, False, True, False]),
+        ("unknown_rule", ("columns_differ", "tradeId", "execId"), False, ValueError),
+    ])
+    def test_compile_row_rule(self, _, rule, is_valid, expected_result):
+        if not is_valid:
+            with self.assertRaises(expected_result):
+                compile_row_rule(rule)
+            return
+        self.assertEqual(compile_row_rule(rule)(DF).tolist(), expected_result)
+
+    def test_build_masks(self):
+        column_mask = build_column_mask(DF, {"execType": (EQUALS_RULE, "Trade"), "positionIdx": (NOT_NULL_RULE,)})
+        row_mask = build_row_mask(DF, [(COLUMNS_EQUAL_RULE, "tradeId", "execId")])
+        self.assertEqual((column_mask & row_mask).tolist(), [True, False, False, False])
+
+    def test_build_row_mask_on_empty_dataframe(self):
+        mask = build_row_mask(DF.iloc[0:0], [lambda row: row["tradeId"] == row["execId"]])
+        self.assertTrue(mask.empty)
+
+    @parameterized.expand([
+        ("closed_in_profit", "CreateByClosing", 1.5, "Take Profit"),
+        ("closed_at_loss", "CreateByClosing", -1.5, "Stop Loss"),
+        ("closed_without_cash_flow", "CreateByClosing", np.nan, "Stop Loss"),
+        ("stop_loss", "CreateByStopLoss", 2.0, "Stop Loss"),
+        ("new_order", "CreateByUser", 0.0, "New Order"),
+        ("unmapped_create_type", "CreateByLiq", -3.0, "Unknown"),
+        ("no_create_type", None, 0.0, "Unknown"),
+    ])
+    def test_build_order_action_labels(self, _, create_type, cash_flow, expected_result):
+        df = pd.DataFrame({"createType": [create_type], "cashFlow": [cash_flow]})
+        labels = build_labels(df, Config.DataMarshaller.Bybit.ORDER_ACTION_RULES, "Unknown")
+        self.assertEqual(labels.tolist(), [expected_result])
+
+    def test_build_labels_without_rules(self):
+        self.assertEqual(build_labels(DF, [], "Unknown").tolist(), ["Unknown"] * len(DF))
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+import src.data.data_helpers
+from src.data.kpi_functions import build_roi, get_transfers_between
+
+def build_balances(executions):
+    return pd.DataFrame({
+        "Entry Date": pd.to_datetime([date for date, _, _ in executions]),
+        "Realized Profit": [profit for _, profit, _ in executions],
+        "Wallet Balance": [balance for _, _, balance in executions],
+    })
+
+EXECUTIONS = [
+    ("2025-01-01 10:00:00", 0.0, 1000.0),
+    ("2025-01-01 11:00:00", 15.0, 1515.0),
+    ("2025-01-01 12:00:00", -13.15, 1301.85),
+]
+
+# a 500 deposit before the 2nd execution, a 200 withdrawal before the 3rd one
+TRANSFERS = pd.Series([500.0, -200.0], index=pd.to_datetime(["2025-01-01 10:30:00", "2025-01-01 11:30:00"]))
+
+class TestKpiFunctions(unittest.TestCase):
+
+    @parameterized.expand([
+        # the first execution has no previous balance, it's measured against its own one
+        ("no_transfers", None, [0.0, 1.5, -0.868]),
+        ("empty_transfers", pd.Series(dtype=float), [0.0, 1.5, -0.868]),
+        ("transfers", TRANSFERS, [0.0, 1.0, -1.0]),
+        ("unsorted_transfers", TRANSFERS.iloc[::-1], [0.0, 1.0, -1.0]),
+    ])
+    def test_build_roi(self, _, balance_transfers, expected_result):
+        df = build_roi(build_balances(EXECUTIONS), balance_transfers)
+        self.assertEqual(df["ROI(%)"].round(3).tolist(), expected_result)
+
+    def test_build_roi_matches_row_wise_roi(self):
+        df = build_balances(EXECUTIONS)
+        previous_balance = df["Wallet Balance"].shift(1)
+        expected_result = [-100 + ((profit + balance) * 100.0) / balance if np.isnan(previous) else
+                           (profit * 100.0) / previous for profit, balance, previous in
+                           zip(df["Realized Profit"], df["Wallet Balance"], previous_balance)]
+        self.assertEqual(build_roi(df)["ROI(%)"].tolist(), expected_result)
+
+    def test_get_transfers_between(self):
+        dates = pd.Series(pd.to_datetime([date for date, _, _ in EXECUTIONS]))
+        transfers = get_transfers_between(TRANSFERS, dates)
+        self.assertTrue(np.isnan(transfers[0]))
+        self.assertEqual(transfers[1:].tolist(), [500.0, -200.0])
@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+from src.data.position_matcher import match_trade_groups
+
+class TestPositionMatcher(unittest.TestCase):
+
+    @parameterized.expand([
+        ("open_and_close", [("BTCUSDT", "New Order", "Long", 2.0, 0.0), ("BTCUSDT", "Stop Loss", "Short", 2.0, 2.0)],
+         [1, 1]),
+        ("scaled_in_and_partial_closes", [
+            ("BTCUSDT", "New Order", "Long", 1.0, 0.0), ("BTCUSDT", "New Order", "Long", 1.0, 0.0),
+            ("BTCUSDT", "Take Profit", "Short", 1.0, 1.0), ("BTCUSDT", "Stop Loss", "Short", 1.0, 1.0),
+            ("BTCUSDT", "New Order", "Long", 1.0, 0.0),
+        ], [1, 1, 1, 1, 2]),
+        ("interleaved_symbols_and_sides", [
+            ("BTCUSDT", "New Order", "Long", 1.0, 0.0), ("ETHUSDT", "New Order", "Long", 1.0, 0.0),
+            ("BTCUSDT", "New Order", "Short", 1.0, 0.0), ("ETHUSDT", "Stop Loss", "Short", 1.0, 1.0),
+            ("BTCUSDT", "Take Profit", "Long", 1.0, 1.0), ("BTCUSDT", "Take Profit", "Short", 1.0, 1.0),
+        ], [1, 2, 3, 2, 3, 1]),
+        ("close_without_position", [("BTCUSDT", "Take Profit", "Short", 1.0, 1.0)], [-1]),
+        ("close_of_another_symbol", [("BTCUSDT", "New Order", "Long", 1.0, 0.0),
+                                     ("ETHUSDT", "Stop Loss", "Short", 1.0, 1.0)], [1, -1]),
+        ("unknown_action_and_side", [("BTCUSDT", "Unknown", "Long", 1.0, 0.0),
+                                     ("BTCUSDT", "New Order", "nan", 1.0, 0.0),
+                                     ("BTCUSDT", "Stop Loss", "nan", 1.0, 1.0)], [-1, 1, -1]),
+        ("no_executions", [], []),
+    ])
+    def test_match_trade_groups(self, _, executions, expected_result):
+        columns = list(zip(*executions)) if executions else [[]] * 5
+        trade_groups = match_trade_groups(*[np.array(column, dtype=object) for column in columns])
+        self.assertEqual(trade_groups.tolist(), expected_result)
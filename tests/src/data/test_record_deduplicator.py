@@ -0,0 +1,29 @@
+import unittest
+
+from parameterized import parameterized
+from src.data.record_deduplicator import RecordDeduplicator
+
+class TestRecordDeduplicator(unittest.TestCase):
+
+    def test_constructor_without_key_cols(self):
+        with self.assertRaises(ValueError):
+            RecordDeduplicator([])
+
+    @parameterized.expand([
+        ("no_duplicates", ["execId"], [[{"execId": "1"}, {"execId": "2"}]], ["1", "2"], 0),
+        ("duplicate_within_page", ["execId"], [[{"execId": "1"}, {"execId": "1"}]], ["1"], 1),
+        ("duplicate_across_pages", ["execId"], [[{"execId": "1"}], [{"execId": "1"}, {"execId": "2"}]],
+         ["1", "2"], 1),
+        ("composite_key", ["orderId", "updatedTime"],
+         [[{"orderId": "1", "updatedTime": 1, "execId": "a"}, {"orderId": "1", "updatedTime": 2, "execId": "b"}],
+          [{"orderId": "1", "updatedTime": 2, "execId": "c"}]], ["a", "b"], 1),
+        ("incomplete_keys_kept", ["transactionTime", "id"],
+         [[{"transactionTime": 1, "id": "", "execId": "a"}, {"transactionTime": 1, "id": "", "execId": "b"}]],
+         ["a", "b"], 0),
+    ])
+    def test_filter(self, _, key_cols, pages, expected_ids, expected_dropped):
+        deduplicator = RecordDeduplicator(key_cols)
+        id_col = "execId"
+        records = [record for page in pages for record in deduplicator.filter(page)]
+        self.assertEqual([record[id_col] for record in records], expected_ids)
+        self.assertEqual(deduplicator.dropped, expected_dropped)
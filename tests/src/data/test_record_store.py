@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import pyarrow.parquet as pq
+
+from parameterized import parameterized
+from src.data.record_store import RecordStore, ParquetRecordStore
+
+# 2025-01-01 00:00:00 UTC
+DAY_MS = 86400000
+START = 1735689600000
+
+RECORDS = [
+    {"execId": "1", "execTime": str(START + 1000), "symbol": "BTCUSDT"},
+    {"execId": "2", "execTime": str(START + DAY_MS + 1000), "symbol": "ETHUSDT"},
+    {"execId": "3", "execTime": str(START + 2 * DAY_MS + 1000), "symbol": "BTCUSDT"},
+]
+
+class TestRecordStore(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.store = RecordStore(self.data_dir.name)
+        self.addCleanup(self.data_dir.cleanup)
+
+    def test_constructor_without_data_dir(self):
+        with self.assertRaises(ValueError):
+            RecordStore("")
+
+    @parameterized.expand([
+        ("full_range", START, START + 3 * DAY_MS, ["1", "2", "3"]),
+        ("single_day", START + DAY_MS, START + 2 * DAY_MS, ["2"]),
+        ("end_is_exclusive", START, START + DAY_MS + 1000, ["1"]),
+        ("empty_range", START + 3 * DAY_MS, START + 4 * DAY_MS, []),
+    ])
+    def test_write_read(self, _, start_time, end_time, expected_ids):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        records = self.store.read("transactions", start_time, end_time, "execTime")
+        self.assertEqual([record["execId"] for record in records], expected_ids)
+
+    def test_write_merges_records_with_the_same_key(self):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        updated_record = RECORDS[0] | {"symbol": "SOLUSDT"}
+        self.store.write("transactions", [updated_record], "execTime", ["execId"])
+
+        records = self.store.read("transactions", START, START + 3 * DAY_MS, "execTime")
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]["symbol"], "SOLUSDT")
+
+    @unittest.mock.patch("src.data.record_store.logger")
+    def test_write_skips_records_without_time(self, mock_logger):
+        self.store.write("transactions", [{"execId": "4"}], "execTime", ["execId"])
+        mock_logger.warning.assert_called_once()
+        self.assertEqual(self.store.read("transactions", START, START + 3 * DAY_MS, "execTime"), [])
+
+
+class TestParquetRecordStore(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.store = ParquetRecordStore(self.data_dir.name)
+        self.addCleanup(self.data_dir.cleanup)
+
+    def test_write_partitions_by_day_and_symbol(self):
+        self.store.write("transactions", RECORDS + [{"execId": "4", "execTime": str(START + 2000)}],
+                         "execTime", ["execId"])
+        for day, symbol in [("2025-01-01", "BTCUSDT"), ("2025-01-01", "_"), ("2025-01-02", "ETHUSDT"),
+                            ("2025-01-03", "BTCUSDT")]:
+            self.assertTrue(os.path.isfile(self.store.get_path("transactions", day, symbol)))
+
+    @parameterized.expand([
+        ("full_range", START, START + 3 * DAY_MS, ["1", "2", "3"]),
+        ("single_day", START + DAY_MS, START + 2 * DAY_MS, ["2"]),
+        ("end_is_exclusive", START, START + DAY_MS + 1000, ["1"]),
+        ("empty_range", START + 3 * DAY_MS, START + 4 * DAY_MS, []),
+    ])
+    def test_write_read(self, _, start_time, end_time, expected_ids):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        records = self.store.read("transactions", start_time, end_time, "execTime")
+        self.assertEqual([record["execId"] for record in records], expected_ids)
+        self.assertEqual(records, [record for record in RECORDS if record["execId"] in expected_ids])
+
+    def test_write_merges_records_with_the_same_key(self):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        updated_record = RECORDS[0] | {"execPrice": "100.5"}
+        self.store.write("transactions", [updated_record], "execTime", ["execId"])
+
+        records = self.store.read("transactions", START, START + 3 * DAY_MS, "execTime")
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], updated_record)
+
+    @parameterized.expand([
+        ("projected_columns", ["execId"], ["execId", "execTime"]),
+        ("unknown_columns_are_ignored", ["execId", "orderId"], ["execId", "execTime"]),
+        ("symbol_from_partition", ["symbol"], ["execTime", "symbol"]),
+        ("all_columns", None, ["execId", "execTime", "symbol"]),
+    ])
+    def test_read_frame(self, _, columns, expected_columns):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        records_df = self.store.read_frame("transactions", START, START + 2 * DAY_MS, "execTime", columns)
+        self.assertEqual(sorted(records_df.columns), expected_columns)
+        self.assertEqual(list(records_df["execTime"]), [RECORDS[0]["execTime"], RECORDS[1]["execTime"]])
+
+    def test_read_frame_only_scans_days_in_range(self):
+        self.store.write("transactions", RECORDS, "execTime", ["execId"])
+        with unittest.mock.patch("src.data.record_store.pq.ParquetFile", wraps=pq.ParquetFile) as mock_parquet_file:
+            self.store.read_frame("transactions", START + DAY_MS, START + 2 * DAY_MS, "execTime")
+        mock_parquet_file.assert_called_once_with(self.store.get_path("transactions", "2025-01-02", "ETHUSDT"))
+
+    def test_read_frame_empty(self):
+        records_df = self.store.read_frame("transactions", START, START + DAY_MS, "execTime", ["execId"])
+        self.assertTrue(records_df.empty)
+        self.assertEqual(list(records_df.columns), ["execId", "execTime"])
+
+    def test_build_table_with_mixed_records(self):
+        table = ParquetRecordStore.build_table([{"a": "1", "b": None}, {"a": "2", "c": 3}])
+        self.assertEqual(table.column_names, ["a", "b", "c"])
+        self.assertEqual(str(table.schema.field("b").type), "string")
+        self.assertEqual(table.to_pylist(), [{"a": "1", "b": None, "c": None}, {"a": "2", "b": None, "c": 3}])
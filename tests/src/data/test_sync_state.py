@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+from src.data.sync_state import SyncState
+
+class TestSyncState(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.data_dir.name, "sync_state.json")
+        self.sync_state = SyncState(self.state_path)
+        self.addCleanup(self.data_dir.cleanup)
+
+    def test_constructor_without_state_path(self):
+        with self.assertRaises(ValueError):
+            SyncState("")
+
+    @parameterized.expand([
+        ("no_coverage", None, [(0, 100), (100, 200)], [(0, 100), (100, 200)]),
+        ("fully_covered", (0, 200), [(0, 100), (100, 200)], []),
+        ("delta_past_high_water_mark", (0, 150), [(0, 100), (100, 200)], [(150, 200)]),
+        ("both_ends_missing", (50, 150), [(0, 200)], [(0, 50), (150, 200)]),
+        ("disjoint_coverage", (300, 400), [(0, 100)], [(0, 100)]),
+    ])
+    def test_get_missing_windows(self, _, coverage, windows, expected_result):
+        if coverage:
+            self.sync_state.state["trades"] = {"from": coverage[0], "to": coverage[1]}
+        self.assertEqual(self.sync_state.get_missing_windows("trades", windows), expected_result)
+
+    @parameterized.expand([
+        ("first_sync", None, (100, 200), (100, 200)),
+        ("extends_high_water_mark", (0, 150), (100, 300), (0, 300)),
+        ("adjacent_range", (0, 100), (100, 200), (0, 200)),
+        ("newer_disjoint_range", (0, 100), (300, 400), (300, 400)),
+        ("older_disjoint_range", (300, 400), (0, 100), (300, 400)),
+    ])
+    def test_mark_synced(self, _, coverage, synced_range, expected_result):
+        if coverage:
+            self.sync_state.state["trades"] = {"from": coverage[0], "to": coverage[1]}
+        self.sync_state.mark_synced("trades", *synced_range)
+        self.assertEqual(self.sync_state.get_coverage("trades"), expected_result)
+
+    def test_mark_synced_never_marks_the_sync_lag(self):
+        self.sync_state.mark_synced("trades", 0, 10 ** 15, sync_lag=60)
+        self.assertLess(self.sync_state.get_coverage("trades")[1], 10 ** 15)
+
+    def test_save_load(self):
+        self.sync_state.mark_synced("trades", 100, 200)
+        self.sync_state.save()
+        self.assertEqual(SyncState(self.state_path).get_coverage("trades"), (100, 200))
+
+    def test_save_merges_saved_state(self):
+        # two pipelines syncing the same account, each loaded the state before the other saved it
+        other_sync_state = SyncState(self.state_path)
+        self.sync_state.mark_synced("trades", 100, 200)
+        other_sync_state.mark_synced("trades", 200, 300)
+        other_sync_state.mark_synced("transactions", 100, 200)
+        self.sync_state.save()
+        other_sync_state.save()
+
+        saved_sync_state = SyncState(self.state_path)
+        self.assertEqual(saved_sync_state.get_coverage("trades"), (100, 300))
+        self.assertEqual(saved_sync_state.get_coverage("transactions"), (100, 200))
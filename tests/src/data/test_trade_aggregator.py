@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+from src.data.trade_aggregator import (TRADE_SUMMARY_DTYPE, sum_by_group, round_by_group, build_trade_summary_column,
+                                       build_aggregated_view)
+from src.utils.df_vars import AGGREGATED_VIEW_USABLE_COLUMNS
+
+COLUMNS = ["Trade Group", "Symbol", "Side", "Action", "Size", "Quantity", "Stop Loss", "Take Profit", "Entry Price",
+           "Entry Date", "Closed Size", "Gross Profit", "Realized Profit", "Wallet Balance"]
+
+def build_executions(executions):
+    df = pd.DataFrame(executions, columns=COLUMNS)
+    df["Entry Date"] = pd.to_datetime(df["Entry Date"])
+    return df
+
+class TestTradeAggregator(unittest.TestCase):
+
+    @parameterized.expand([
+        ("short_groups", [0.1, 0.2, 0.3, 1.5, np.nan], [0, 0, 0, 1, 1], None),
+        # 8+ values per group are summed pairwise, like a Series.sum()
+        ("long_groups", [0.1 * index for index in range(1, 30)], [0] * 10 + [1] * 19, None),
+        ("filtered_rows", [0.1, 0.2, 0.3, 0.4], [0, 0, 1, 1], [True, False, True, True]),
+    ])
+    def test_sum_by_group(self, _, values, group_codes, rows_filter):
+        values, group_codes = np.array(values), np.array(group_codes)
+        rows_filter = np.array(rows_filter) if rows_filter is not None else np.ones(len(values), dtype=bool)
+        expected_result = [pd.Series(values[(group_codes == group) & rows_filter]).sum() for group in [0, 1]]
+        self.assertEqual(sum_by_group(values, group_codes, 2, rows_filter).tolist(), expected_result)
+
+    def test_sum_by_group_without_rows(self):
+        self.assertEqual(sum_by_group(np.array([1.0]), np.array([1]), 3).tolist(), [0.0, 1.0, 0.0])
+
+    def test_round_by_group(self):
+        self.assertEqual(round_by_group(np.array([1.23456, 1.23456, 1.5]), np.array([1, 3, 0])).tolist(),
+                         [1.2, 1.235, 2.0])
+
+    @parameterized.expand([
+        ("always_set", None, [1.5, 2.5], "float64"),
+        ("set_on_every_trade", "risk_set", [1.5, 2.5], "float64"),
+        ("set_on_some_trades", "exit_price_set", [1.5, ''], "object"),
+    ])
+    def test_build_trade_summary_column(self, _, set_field, expected_result, expected_dtype):
+        trade_summaries = np.zeros(2, dtype=TRADE_SUMMARY_DTYPE)
+        trade_summaries["risk"] = trade_summaries["exit_price"] = [1.5, 2.5]
+        trade_summaries["risk_set"] = trade_summaries["exit_price_set"] = [True, set_field != "exit_price_set"]
+        column = build_trade_summary_column(trade_summaries, "exit_price" if set_field == "exit_price_set" else "risk",
+                                            set_field, '')
+        self.assertEqual(column.tolist(), expected_result)
+        self.assertEqual(column.dtype, expected_dtype)
+
+    def test_build_aggregated_view(self):
+        df = build_executions([
+            (1, "BTCUSDT", "Long", "New Order", "2", 2.0, "95.5", "", 100.5, "2025-01-01 10:00:00", 0.0, 0.0, -0.1, 1000.0),
+            (2, "ETHUSDT", "Short", "New Order", "1", 1.0, "", "", 10.0, "2025-01-01 10:30:00", 0.0, 0.0, -0.1, 999.9),
+            (1, "BTCUSDT", "Short", "Take Profit", "1", 1.0, "", "", 110.5, "2025-01-01 11:00:00", 1.0, 10.0, 9.9, 1009.8),
+            (1, "BTCUSDT", "Short", "Stop Loss", "0", 1.0, "", "", 95.5, "2025-01-01 12:00:00", 1.0, -5.0, -5.1, 1004.7),
+        ])
+        aggregated_df = build_aggregated_view(df)
+
+        self.assertEqual(aggregated_df.columns.tolist(), AGGREGATED_VIEW_USABLE_COLUMNS)
+        closed_trade, open_trade = aggregated_df.to_dict("records")
+        self.assertEqual({colname: closed_trade[colname] for colname in [
+            "Symbol", "Side", "Closed", "Status", "Quantity", "Entry Price", "Exit Price (Avg.)", "Preset SL",
+            "Stopped At", "Stopped Out", "Take Profits", "Risk", "Risk Managed", "Gross Profit", "Realized Profit",
+            "Closed Date", "Duration"]}, {
+            "Symbol": "BTCUSDT", "Side": "Long", "Closed": True, "Status": 1, "Quantity": 2.0, "Entry Price": 100.5,
+            "Exit Price (Avg.)": 103.0, "Preset SL": 95.5, "Stopped At": 95.5, "Stopped Out": True,
+            "Take Profits": "110.5", "Risk": 0.01, "Risk Managed": True, "Gross Profit": 5.0, "Realized Profit": 4.7,
+            "Closed Date": pd.Timestamp("2025-01-01 12:00:00"), "Duration": pd.Timedelta(hours=2)})
+
+        self.assertFalse(open_trade["Closed"])
+        self.assertEqual(open_trade["Closed Date"], '')
+        self.assertEqual(open_trade["Exit Price (Avg.)"], '')
+        self.assertEqual(open_trade["Take Profits"], '')
+        self.assertTrue(pd.isna(open_trade["Preset SL"]))
+        self.assertTrue(pd.isna(open_trade["Risk"]))
+        self.assertFalse(open_trade["Stopped Out"])
+
+    def test_build_aggregated_view_without_new_order(self):
+        df = build_executions([
+            (1, "BTCUSDT", "Short", "Stop Loss", "0", 1.0, "", "", 95.5, "2025-01-01 12:00:00", 1.0, -5.0, -5.1, 1004.7),
+        ])
+        aggregated_df = build_aggregated_view(df)
+        self.assertTrue(aggregated_df.empty)
+        self.assertEqual(aggregated_df.columns.tolist(), AGGREGATED_VIEW_USABLE_COLUMNS)
@@ -1,11 +1,19 @@
+import gzip
+import json
+import os
+import tempfile
 import unittest
 import logging
+from unittest.mock import patch
+from parameterized import parameterized
 from src.logging.logger import Logger
 
 class TestLogger(unittest.TestCase):
 
     def setUp(self):
         self.logger = Logger(name="TestLogger")
+        self.addCleanup(self.logger.set_payload_dump)
+        self.addCleanup(self.logger.set_log_level, self.logger.logger.level)
 
     def test_singleton_instance(self):
         logger1 = Logger(name="Logger1")
@@ -14,4 +22,32 @@ class TestLogger(unittest.TestCase):
 
     def test_set_log_level(self):
         self.logger.set_log_level(logging.DEBUG)
-        self.assertEqual(self.logger.logger.level, logging.DEBUG, "Log level should be DEBUG.")
\ No newline at end of file
+        self.assertEqual(self.logger.logger.level, logging.DEBUG, "Log level should be DEBUG.")
+
+    @parameterized.expand([
+        ("disabled", False, logging.DEBUG, False),
+        ("not_in_debug", True, logging.INFO, False),
+        ("enabled", True, logging.DEBUG, True),
+    ])
+    def test_dump_payload(self, _, dump_payloads, log_level, expected_result):
+        self.logger.set_log_level(log_level)
+        self.logger.set_payload_dump(dump_payloads=dump_payloads, sample_size=2)
+        records = [{"execId": str(index)} for index in range(5)]
+        with patch.object(self.logger.logger, "debug") as mock_debug:
+            self.logger.dump_payload("transactions", records)
+
+        self.assertEqual(mock_debug.called, expected_result)
+        if expected_result:
+            # large payloads are only sampled
+            self.assertIn('"execId": "1"', mock_debug.call_args.args[0])
+            self.assertNotIn('"execId": "2"', mock_debug.call_args.args[0])
+
+    def test_dump_payload_to_file(self):
+        records = [{"execId": str(index)} for index in range(5)]
+        with tempfile.TemporaryDirectory() as log_dir:
+            self.logger.set_payload_dump(dump_payloads=True, dump_to_file=True, log_dir=log_dir)
+            self.logger.dump_payload("transactions", records)
+
+            dump_files = os.listdir(os.path.join(log_dir, "payloads"))
+            with gzip.open(os.path.join(log_dir, "payloads", dump_files[0]), "rt", encoding="utf-8") as file:
+                self.assertEqual(json.load(file), records)
@@ -5,11 +5,20 @@ from unittest.mock import patch, MagicMock, AsyncMock, create_autospec
 import pandas as pd
 
 from src.journal_pipeline import JournalPipeline
+from src.api.request_coalescer import RequestCoalescer
+from src.api.request_handler import IncompleteResponseError
+from src.api.request_scheduler import RequestScheduler
+from src.api.response_cache import ResponseCache
+from src.api.window_planner import WindowPlanner
+from src.data.record_store import ParquetRecordStore
+from src.data.sync_state import SyncState
 import src.utils.config_vars as vars
 from parameterized import parameterized
 from src.config.config_loader import TOMLConfigLoader
 from src.utils.config import Config
 import asyncio
+import os
+import tempfile
 
 DEFAULT_PARAMS = {'api': {
             'Bybit': {'base_url': 'https://api-testnet.bybit.com', 'execution_list_endpoint': '/v5/execution/list',
@@ -36,11 +45,29 @@ class StubTOMLConfigLoader:
 
 class StubRequestHandler:
     def __init__(self, api_key: str = "", api_secret: str ="", *args, **kwargs):
+        self.connection_stats = {"requests": 0, "created": 0, "reused": 0}
+        self.response_cache = ResponseCache({"enabled": False})
+
+    async def open_session(self, use_async=True):
+        pass
+
+    async def close_session(self):
         pass
 
+    def get_connection_reuse_ratio(self):
+        return 0.0
+
     async def get_paginated_response(self, endpoint, additional_params, date, day_count, use_async):
         return [f"mock_data_{endpoint}_{date}_{day_count}"]
 
+    async def iter_paginated_response(self, endpoint, additional_params, date, day_count, use_async,
+                                      with_cursors=False):
+        page = await self.get_paginated_response(endpoint, additional_params, date, day_count, use_async)
+        yield ("", "", page) if with_cursors else page
+
+    async def get_first_page(self, endpoint, additional_params, use_async):
+        return [], False
+
 class TestJournalPipeline(IsolatedAsyncioTestCase):
 
     def setUp(self):
@@ -68,9 +95,14 @@ class TestJournalPipeline(IsolatedAsyncioTestCase):
             config_type=vars.TOML_CONFIG_TYPE
         )
 
+        # checkpoint logs are kept out of the working directory
+        checkpoint_dir = tempfile.TemporaryDirectory()
+        self.pipeline.checkpoint_params = self.pipeline.checkpoint_params | {"checkpoint_dir": checkpoint_dir.name}
+
         # cleanup for patches to stop after tests
         self.addCleanup(toml_loader_patch.stop)
         self.addCleanup(logger_patch.stop)
+        self.addCleanup(checkpoint_dir.cleanup)
 
     @parameterized.expand([
         ("valid_test", "path/to/config.toml", "2025-01-01", "daily", "toml", True, None),
@@ -138,7 +170,12 @@ class TestJournalPipeline(IsolatedAsyncioTestCase):
     @patch("src.journal_pipeline.asyncio.gather", new_callable=AsyncMock)
     async def test_fetch_data(self, _, use_async, mock_asyncio_gather, mock_request_handler,
                               mock_environ_get, mock_paginate_date, mock_flatten_list, mock_urljoin):
-        mock_asyncio_gather.return_value = [("dataset1", ["data1"]), ("dataset2", ["data2"])]
+        def gather(*coroutines, **kwargs):
+            # the coroutines handed over never run, they're closed so none is left un-awaited
+            for coroutine in coroutines:
+                coroutine.close()
+            return [("dataset1", ["data1"]), ("dataset2", ["data2"])]
+        mock_asyncio_gather.side_effect = gather
 
 
         mock_paginate_date.side_effect = lambda date, tf: [('2025-01-01', 6), ('2025-01-07', 3)]
@@ -149,6 +186,381 @@ class TestJournalPipeline(IsolatedAsyncioTestCase):
 
         self.assertEqual(data, {"dataset1": ["data1"], "dataset2": ["data2"]})
 
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_incremental_sync(self, mock_request_handler, mock_environ_get):
+        requested_windows = []
+
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            requested_windows.append((endpoint, additional_params["startTime"], additional_params["endTime"]))
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            return [{time_col: str(additional_params["startTime"] + 1000), "id": "1", "execId": "1",
+                     "orderId": "1", "updatedTime": "1"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.pipeline.storage_params = self.pipeline.storage_params | {"data_dir": data_dir}
+            first_data = await self.pipeline.fetch_data()
+            first_request_count = len(requested_windows)
+            # the whole (past) timeframe is now synced, nothing should be requested again
+            second_data = await self.pipeline.fetch_data()
+
+        self.assertEqual(first_request_count, len(self.pipeline.endpoints))
+        self.assertEqual(len(requested_windows), first_request_count)
+        for dataset_type, records_df in second_data.items():
+            pd.testing.assert_frame_equal(first_data[dataset_type], records_df)
+        self.assertTrue(all(len(records) == 1 for records in second_data.values()))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_stores_each_window(self, mock_request_handler, mock_environ_get):
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            start_time = additional_params["startTime"]
+            return [{time_col: str(start_time + 1000), "id": str(start_time), "execId": str(start_time),
+                     "orderId": str(start_time), "updatedTime": "1"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.window_planner_params = {"enabled": False}
+        with tempfile.TemporaryDirectory() as data_dir, \
+                patch("src.journal_pipeline.paginate_date", return_value=[("2023-01-01", 6), ("2023-01-07", 3)]), \
+                patch.object(ParquetRecordStore, "write", autospec=True,
+                             side_effect=ParquetRecordStore.write) as mock_write:
+            self.pipeline.storage_params = self.pipeline.storage_params | {"data_dir": data_dir}
+            data = await self.pipeline.fetch_data()
+
+        # windows are written as soon as they're fetched, never held until the whole dataset is
+        self.assertEqual(mock_write.call_count, 2 * len(self.pipeline.endpoints))
+        self.assertTrue(all(len(call.args[2]) == 1 for call in mock_write.call_args_list))
+        self.assertTrue(all(len(records_df) == 2 for records_df in data.values()))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_reads_store_once(self, mock_request_handler, mock_environ_get):
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            return [{time_col: str(additional_params["startTime"] + 1000), "id": "1", "execId": "1",
+                     "orderId": "1", "updatedTime": "1", "symbol": "BTCUSDT"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.sharding_params = self.pipeline.sharding_params | {"enabled": True}
+        with tempfile.TemporaryDirectory() as data_dir, \
+                patch.object(ParquetRecordStore, "read_frame", autospec=True,
+                             side_effect=ParquetRecordStore.read_frame) as mock_read_frame:
+            self.pipeline.storage_params = self.pipeline.storage_params | {"data_dir": data_dir}
+            data = await self.pipeline.fetch_data()
+
+        # the symbols the sharding needs, then every dataset's projected columns, once
+        read_columns = [(call.args[1], call.kwargs.get("columns")) for call in mock_read_frame.call_args_list]
+        self.assertEqual(read_columns, [(vars.TRADES_DATASET, ["symbol"])] + [
+            (dataset_type, self.pipeline.get_projected_columns(dataset_type)) for dataset_type in self.pipeline.endpoints
+        ])
+        self.assertTrue(all(isinstance(records_df, pd.DataFrame) and len(records_df) == 1
+                            for records_df in data.values()))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_refetches_incomplete_windows(self, mock_request_handler, mock_environ_get):
+        requested_windows = []
+        failing_endpoints = ["https://api-testnet.bybit.com/v5/order/history"]
+
+        async def iter_paginated_response(endpoint, additional_params, date, day_count, use_async,
+                                          with_cursors=False):
+            requested_windows.append((endpoint, additional_params["startTime"], additional_params["endTime"]))
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            yield "", "cursor1", [{time_col: str(additional_params["startTime"]), "id": "1", "execId": "1",
+                                   "orderId": "1", "updatedTime": "1"}]
+            # the order history's follow-up page comes back with a non retryable code
+            if endpoint in failing_endpoints:
+                raise IncompleteResponseError(10002, "invalid request")
+            yield "cursor1", "", [{time_col: str(additional_params["startTime"] + 1), "id": "2", "execId": "2",
+                                   "orderId": "2", "updatedTime": "2"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.iter_paginated_response = iter_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.pipeline.storage_params = self.pipeline.storage_params | {"data_dir": data_dir}
+            first_data = await self.pipeline.fetch_data()
+            requested_windows.clear()
+            failing_endpoints.clear()
+            second_data = await self.pipeline.fetch_data()
+
+        # the records fetched before the failed page are kept, only the incomplete window is requested again
+        self.assertEqual(len(first_data[vars.ORDER_HISTORY_DATASET]), 1)
+        self.assertEqual([endpoint for endpoint, _, _ in requested_windows],
+                         ["https://api-testnet.bybit.com/v5/order/history"])
+        self.assertTrue(all(len(records) == 2 for records in second_data.values()))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_resumes_from_checkpoints(self, mock_request_handler, mock_environ_get):
+        requested_pages = []
+
+        async def iter_paginated_response(endpoint, additional_params, date, day_count, use_async,
+                                          with_cursors=False):
+            cursor = additional_params.get("cursor", "")
+            requested_pages.append((endpoint, cursor))
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            # two pages per window, the connection drops right after the first page of the order history
+            if not cursor:
+                yield "", "cursor1", [{time_col: str(additional_params["startTime"]), "id": "1", "execId": "1",
+                                       "orderId": "1", "updatedTime": "1"}]
+            if "order" in endpoint and not self.pipeline.resume:
+                raise ConnectionError("Connection reset by peer")
+            yield "cursor1", "", [{time_col: str(additional_params["startTime"] + 1), "id": "2", "execId": "2",
+                                   "orderId": "2", "updatedTime": "2"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.iter_paginated_response = iter_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.storage_params = self.pipeline.storage_params | {"enabled": False}
+        self.pipeline.window_planner_params = {"enabled": False}
+        with self.assertRaises(Exception):
+            await self.pipeline.fetch_data()
+        requested_pages.clear()
+
+        self.pipeline.resume = True
+        data = await self.pipeline.fetch_data()
+
+        # only the order history's second page was missing
+        self.assertEqual(requested_pages, [("https://api-testnet.bybit.com/v5/order/history", "cursor1")])
+        self.assertTrue(all(len(records) == 2 for records in data.values()))
+        self.assertFalse(os.listdir(self.pipeline.checkpoint_params.get("checkpoint_dir")))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_plan_requests(self, mock_request_handler, mock_environ_get):
+        stub_handler = StubRequestHandler()
+        # every window is probed, its first page tells there's (about) 2 pages worth of records
+        stub_handler.get_first_page = AsyncMock(side_effect=lambda endpoint, additional_params, use_async: (
+            [{"transactionTime": str(additional_params["startTime"] + 43200000),
+              "execTime": str(additional_params["startTime"] + 43200000),
+              "createdTime": str(additional_params["startTime"] + 43200000)}], True))
+        stub_handler.count_cached_pages = MagicMock(return_value=(1, False))
+        stub_handler.get_paginated_response = AsyncMock()
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.storage_params = self.pipeline.storage_params | {"enabled": False}
+        request_budget = await self.pipeline.plan_requests()
+
+        stub_handler.get_paginated_response.assert_not_awaited()
+        self.assertEqual(request_budget.probes, len(self.pipeline.endpoints))
+        self.assertEqual(request_budget.get_request_count(), len(self.pipeline.endpoints))
+        self.assertEqual(request_budget.get_cache_hit_ratio(), 0.5)
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_drops_boundary_duplicates(self, mock_request_handler, mock_environ_get):
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            # the record sitting on the boundary of both windows is returned twice
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            return [{time_col: str(additional_params["startTime"]), "id": str(additional_params["startTime"]),
+                     "execId": str(additional_params["startTime"]), "orderId": "1",
+                     "updatedTime": str(additional_params["startTime"])},
+                    {time_col: "1000", "id": "boundary", "execId": "boundary", "orderId": "boundary",
+                     "updatedTime": "1000"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.storage_params = self.pipeline.storage_params | {"enabled": False}
+        self.pipeline.window_planner_params = {"enabled": False}
+        with patch("src.journal_pipeline.paginate_date", return_value=[("2023-01-01", 6), ("2023-01-07", 3)]):
+            data = await self.pipeline.fetch_data()
+
+        self.assertTrue(all(len(records) == 3 for records in data.values()))
+        self.mock_logger.info.assert_any_call("Dropped 1 duplicate 'transactions' record(s)")
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_sharded_by_symbol(self, mock_request_handler, mock_environ_get):
+        requested_symbols = []
+
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            start_time = additional_params["startTime"]
+            if "transaction-log" in endpoint:
+                return [{"transactionTime": str(start_time + 1000), "id": str(index), "symbol": symbol}
+                        for index, symbol in enumerate(["SOLUSDT", "BTCUSDT", "SOLUSDT", ""])]
+
+            symbol = additional_params.get("symbol")
+            requested_symbols.append((endpoint, symbol))
+            time_col = "execTime" if "execution" in endpoint else "createdTime"
+            # later symbols hold earlier records, so the merged result must be reordered
+            offset = 2000 if symbol == "BTCUSDT" else 1000
+            return [{time_col: str(start_time + offset), "execId": symbol, "orderId": symbol, "updatedTime": "1",
+                     "symbol": symbol}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        self.pipeline.storage_params = self.pipeline.storage_params | {"enabled": False}
+        self.pipeline.sharding_params = self.pipeline.sharding_params | {"enabled": True}
+        data = await self.pipeline.fetch_data()
+
+        self.assertEqual(sorted(requested_symbols), sorted([
+            (f"https://api-testnet.bybit.com{endpoint}", symbol)
+            for endpoint in ["/v5/execution/list", "/v5/order/history"] for symbol in ["BTCUSDT", "SOLUSDT"]
+        ]))
+        for dataset_type in [vars.TRANSACTIONS_DATASET, vars.ORDER_HISTORY_DATASET]:
+            self.assertEqual([record["symbol"] for record in data[dataset_type]], ["SOLUSDT", "BTCUSDT"])
+        self.assertEqual(len(data[vars.TRADES_DATASET]), 4)
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_coalesced_timeframes(self, mock_request_handler, mock_environ_get):
+        requested_windows = []
+
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            requested_windows.append((endpoint, additional_params["startTime"], additional_params["endTime"]))
+            return []
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        request_coalescer = RequestCoalescer()
+        pipelines = [
+            JournalPipeline(config_file_path="config_path", start_date="2023-01-02", timeframe=timeframe,
+                            config_type=vars.TOML_CONFIG_TYPE, request_coalescer=request_coalescer)
+            for timeframe in ["daily", "weekly"]
+        ]
+        for pipeline in pipelines:
+            pipeline.storage_params = pipeline.storage_params | {"enabled": False}
+            pipeline.checkpoint_params = self.pipeline.checkpoint_params
+        await asyncio.gather(*[pipeline.fetch_data() for pipeline in pipelines])
+
+        # the daily window is contained in the weekly one, every endpoint gets requested once per distinct piece
+        self.assertEqual(len(requested_windows), len(set(requested_windows)))
+        self.assertEqual(request_coalescer.stats.get("shared"), len(pipelines[0].endpoints))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_all_shares_request_handler(self, mock_request_handler, mock_environ_get):
+        rate_limit_params = {"max_in_flight": 2, "max_in_flight_per_endpoint": 2, "requests_per_second": 1000}
+        in_flight = {"current": 0, "max": 0}
+        request_handlers = []
+
+        def build_request_handler(*args, **kwargs):
+            stub_handler = StubRequestHandler()
+            scheduler = RequestScheduler(rate_limit_params)
+
+            async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+                async with scheduler.slot(endpoint):
+                    in_flight["current"] += 1
+                    in_flight["max"] = max(in_flight.get("max"), in_flight.get("current"))
+                    await asyncio.sleep(0.01)
+                    in_flight["current"] -= 1
+                return []
+
+            stub_handler.get_paginated_response = get_paginated_response
+            stub_handler.open_session = AsyncMock()
+            stub_handler.close_session = AsyncMock()
+            request_handlers.append(stub_handler)
+            return stub_handler
+
+        mock_request_handler.side_effect = build_request_handler
+
+        request_coalescer = RequestCoalescer()
+        pipelines = [
+            JournalPipeline(config_file_path="config_path", start_date="2023-01-02", timeframe=timeframe,
+                            config_type=vars.TOML_CONFIG_TYPE, request_coalescer=request_coalescer)
+            for timeframe in ["daily", "weekly"]
+        ]
+        for pipeline in pipelines:
+            pipeline.storage_params = pipeline.storage_params | {"enabled": False}
+            pipeline.checkpoint_params = self.pipeline.checkpoint_params
+        results = await JournalPipeline.fetch_all(pipelines)
+
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        # both pipelines go through a single scheduler, opened and closed once
+        self.assertEqual(len(request_handlers), 1)
+        request_handlers[0].open_session.assert_awaited_once()
+        request_handlers[0].close_session.assert_awaited_once()
+        self.assertLessEqual(in_flight.get("max"), rate_limit_params.get("max_in_flight"))
+        self.assertTrue(all(pipeline.request_handler is None for pipeline in pipelines))
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_fetch_data_coalesced_timeframes_keep_account_state(self, mock_request_handler, mock_environ_get):
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = AsyncMock(return_value=[])
+        mock_request_handler.return_value = stub_handler
+
+        request_coalescer = RequestCoalescer()
+        pipelines = [
+            JournalPipeline(config_file_path="config_path", start_date="2023-01-02", timeframe=timeframe,
+                            config_type=vars.TOML_CONFIG_TYPE, request_coalescer=request_coalescer)
+            for timeframe in ["daily", "weekly"]
+        ]
+        with tempfile.TemporaryDirectory() as data_dir:
+            for pipeline in pipelines:
+                pipeline.storage_params = pipeline.storage_params | {"data_dir": data_dir}
+                pipeline.checkpoint_params = self.pipeline.checkpoint_params
+            await asyncio.gather(*[pipeline.fetch_data() for pipeline in pipelines])
+            account_dir = os.path.join(data_dir, os.listdir(data_dir)[0])
+            sync_state = SyncState(os.path.join(account_dir, "sync_state.json"))
+            page_stats = WindowPlanner(stats_path=os.path.join(account_dir, "page_stats.json")).stats
+
+        # the daily piece was fetched (and observed) by the daily pipeline, the rest of the week by the weekly one.
+        # Both pipelines save the same account's files, neither overwrites the other
+        week_start, week_end = 1672617600000, 1673222400000
+        for dataset_type in pipelines[0].endpoints:
+            self.assertEqual(sync_state.get_coverage(dataset_type), (week_start, week_end))
+            self.assertEqual([observation[:2] for observation in sorted(page_stats[dataset_type])],
+                             [[week_start, week_start + 86400000], [week_start + 86400000, week_end]])
+
+    @patch("os.environ.get", return_value="api_key")
+    @patch("src.journal_pipeline.RequestHandler")
+    async def test_load_data(self, mock_request_handler, mock_environ_get):
+        async def get_paginated_response(endpoint, additional_params, date, day_count, use_async):
+            time_col = "transactionTime" if "transaction-log" in endpoint else \
+                "execTime" if "execution" in endpoint else "createdTime"
+            return [{time_col: str(additional_params["startTime"] + 1000), "id": "1", "execId": "1",
+                     "orderId": "1", "updatedTime": "1", "symbol": "BTCUSDT", "unusedCol": "1"}]
+
+        stub_handler = StubRequestHandler()
+        stub_handler.get_paginated_response = get_paginated_response
+        mock_request_handler.return_value = stub_handler
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            self.pipeline.storage_params = self.pipeline.storage_params | {"data_dir": data_dir}
+            await self.pipeline.fetch_data()
+            data = self.pipeline.load_data()
+            projected_data = self.pipeline.load_data({dataset_type: ["orderId"] for dataset_type in data})
+
+        self.assertEqual(set(data.keys()), set(self.pipeline.endpoints.keys()))
+        for dataset_type, records_df in data.items():
+            time_col = Config.DataMarshaller.Bybit.DATASET_TO_TRANSACTION_DATE_COL_MAP.get(dataset_type)
+            self.assertEqual(len(records_df), 1)
+            self.assertIn("symbol", records_df.columns)
+            self.assertNotIn("unusedCol", records_df.columns)
+            self.assertEqual(sorted(projected_data[dataset_type].columns), sorted(["orderId", time_col]))
+
+    @patch("os.environ.get", return_value="")
+    def test_load_data_without_store(self, mock_environ_get):
+        with self.assertRaises(ValueError):
+            self.pipeline.load_data()
+
     @parameterized.expand([
         # incomplete (replicated) datasets
         ("valid_bybit_test", {
@@ -0,0 +1,48 @@
+import unittest
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from parameterized import parameterized
+from src.utils.session_tagger import tag_sessions, build_session_table, get_session_labels
+from src.utils.session_vars import TRADE_SESSION_BITS
+
+UTC = ZoneInfo("UTC")
+
+class TestSessionTagger(unittest.TestCase):
+
+    @parameterized.expand([
+        ("winter_overlap", "2025-01-15 15:00:30", UTC, ["London", "New York"]),
+        ("winter_new_york_closed", "2025-01-15 13:45:00", UTC, ["London"]),
+        # new york opens (and london closes) an hour earlier in UTC during the summer
+        ("summer_new_york_open", "2025-07-15 13:45:00", UTC, ["London", "New York"]),
+        ("summer_london_closed", "2025-07-15 16:30:00", UTC, ["New York"]),
+        ("winter_sydney_open", "2025-07-15 23:30:00", UTC, ["Sydney"]),
+        ("summer_sydney_open", "2025-01-15 22:30:00", UTC, ["Sydney"]),
+        ("midnight_span", "2025-01-15 05:00:30", UTC, ["Sydney", "Tokyo"]),
+        ("no_session", "2025-01-15 21:00:00", UTC, []),
+        # 15:00 in Lisbon is 14:00 UTC during the summer
+        ("local_timezone", "2025-07-15 15:00:00", ZoneInfo("Europe/Lisbon"), ["London", "New York"]),
+    ])
+    def test_tag_sessions(self, _, date, local_timezone, expected_result):
+        session_masks = tag_sessions([date], local_timezone)
+        self.assertEqual(session_masks.dtype, np.uint8)
+        self.assertEqual(get_session_labels(session_masks[0]), expected_result)
+
+    def test_tag_sessions_without_date(self):
+        self.assertEqual(tag_sessions([None, "2025-01-15 15:00:30"], UTC).tolist(),
+                         [0, TRADE_SESSION_BITS["London"] | TRADE_SESSION_BITS["New York"]])
+
+    def test_build_session_table(self):
+        session_table = build_session_table(["2025-01-15", "2025-07-15"])
+        self.assertEqual(session_table.shape, (2, 24 * 60))
+        # london opens at 08:00 UTC during the winter, 07:00 UTC during the summer
+        london_bit = TRADE_SESSION_BITS["London"]
+        self.assertEqual([bool(session_table[day, 7 * 60] & london_bit) for day in [0, 1]], [False, True])
+
+    @parameterized.expand([
+        ("no_sessions", 0, []),
+        ("several_sessions", TRADE_SESSION_BITS["Sydney"] | TRADE_SESSION_BITS["Tokyo"], ["Sydney", "Tokyo"]),
+        ("missing", np.nan, []),
+    ])
+    def test_get_session_labels(self, _, session_mask, expected_result):
+        self.assertEqual(get_session_labels(session_mask), expected_result)
@@ -1,11 +1,11 @@
 import unittest
-from datetime import time, datetime
+from datetime import datetime
 
 from parameterized import parameterized
 from src.utils.utils import format_ini_table_names, unpack_ini_list_value, unwrap_css_classes, remove_matched_elements, \
-    extract_format_arguments, filter_nas_in_series, get_decimal_cases, date_difference, get_sessions_in_date, \
+    extract_format_arguments, filter_nas_in_series, get_decimal_cases, \
     underscore_format_table_name, replace_occurrences, get_month_start_end, paginate_list, paginate_date, flatten_list, \
-    validate_date_format
+    validate_date_format, get_date_timestamps, get_account_id, humanize_durations
 import pandas as pd
 
 class TestUtils(unittest.TestCase):
@@ -17,17 +17,6 @@ class TestUtils(unittest.TestCase):
             "Monthly": lambda date_str: get_month_start_end(date_str),
         }"""
 
-        self.session_timezones = {
-    # actual ? sydney 10 pm to 7 am
-    "Sydney": (time(22, 0), time(8, 0)),
-    # actual ? tokyo 12 am to 9 am
-    "Tokyo": (time(0, 0), time(8, 0)),
-    # actual ? london 8 am to 5 pm
-    "London": (time(8, 0), time(17, 0)),
-    # actual ? new york 1 pm to 10 pm
-    "New York": (time(14, 30), time(20, 0)),
-}
-
 
     @parameterized.expand([
         ("valid_test", ["test_name_table", "another_random_example"], True, ["Test Name", "Another Random Example"]),
@@ -161,39 +150,17 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(expected_result, result)
 
     @parameterized.expand([
-        ("valid_test_1", "2025-04-02 15:00:30", "2025-04-02 15:02:00", True, "1 minute and 30 seconds"),
-        ("valid_test_2", "2025-04-02 15:01:00", "2025-04-02 15:02:00", True, "1 minute"),
-        ("valid_test_3", "2025-04-02 15:30:30", "2025-04-02 16:35:50", True, "1 hour, 5 minutes and 20 seconds"),
-        ("valid_test_4", "", "2025-04-02 15:02:00", True, ""),
-        ("valid_test_5", "2025-04-02 15:00:30", None, True, ""),
-        ("invalid_test_1_date_init_bigger", "2025-04-02 15:02:00", "2025-04-02 15:00:30", False, ValueError),
-        ("invalid_test_2_bad_data_type", 123, [1, 2, 3], False, TypeError),
-        ("invalid_test_3_unformattable_date", "2025-04", "2025", False, ValueError),
-    ])
-    def test_date_difference(self, _, date_init, date_end, is_valid, expected_result):
-        if not is_valid:
-            with self.assertRaises(expected_result):
-                date_difference(date_init, date_end)
-            return
-
-        result = date_difference(date_init, date_end)
-        self.assertEqual(expected_result, result)
-
-    @parameterized.expand([
-        ("valid_test_1", "2025-04-02 15:00:30", True, ["London", "New York"]),
-        ("valid_test_2", "2025-04-02 21:00:00", True, []),
-        ("valid_test_3", "2025-04-02 05:00:30", True, ["Sydney", "Tokyo"]),
-        ("invalid_test_4", "2025-04", False, ValueError),
-        ("invalid_test_5", "", False, ValueError),
+        ("valid_test_1", ["90s", "1min", "1h5min20s"], ["1 minute and 30 seconds", "1 minute", "1 hour, 5 minutes and 20 seconds"]),
+        ("valid_test_2", ["2D3h5min", "1D1s", "0s", "500ms"], ["2 days, 3 hours and 5 minutes", "1 day and 1 second", "0 seconds", "0 seconds"]),
+        ("valid_test_3", [None, "2h"], ["", "2 hours"]),
+        ("valid_test_4", [], []),
+        ("valid_test_5_date_differences", [pd.Timestamp("2025-04-02 15:02:00") - pd.Timestamp("2025-04-02 15:00:30"),
+                                           pd.Timestamp("2025-04-02 16:35:50") - pd.Timestamp("2025-04-02 15:30:30"),
+                                           pd.NaT], ["1 minute and 30 seconds", "1 hour, 5 minutes and 20 seconds", ""]),
     ])
-    def test_get_sessions_in_date(self, _, date, is_valid, expected_result):
-        if not is_valid:
-            with self.assertRaises(expected_result):
-                get_sessions_in_date(date, self.session_timezones)
-            return
-
-        result = get_sessions_in_date(date, self.session_timezones)
-        self.assertEqual(expected_result, result)
+    def test_humanize_durations(self, _, durations, expected_result):
+        result = humanize_durations(pd.to_timedelta(pd.Series(durations, dtype=object)))
+        self.assertEqual(expected_result, result.tolist())
 
     @parameterized.expand([
         ("valid_test_1", "should split this table", True, "should_split_this_table"),
@@ -333,4 +300,33 @@ class TestUtils(unittest.TestCase):
             return
 
         result = validate_date_format(date_str)
-        self.assertEqual(expected_result, result)
\ No newline at end of file
+        self.assertEqual(expected_result, result)
+
+    @parameterized.expand([
+        ("valid_test", "2025-01-01", 1, True, None),
+        ("valid_test_multiple_days", "2025-01-01", 6, True, None),
+        ("missing_date", "", 1, False, ValueError),
+        ("invalid_day_count", "2025-01-01", 0, False, ValueError),
+    ])
+    def test_get_date_timestamps(self, _, date, day_count, is_valid, expected_result):
+        if not is_valid:
+            with self.assertRaises(expected_result):
+                get_date_timestamps(date, day_count)
+            return
+        start_time, end_time = get_date_timestamps(date, day_count)
+        self.assertEqual(start_time, int(datetime.strptime(date, "%Y-%m-%d").timestamp()) * 1000)
+        self.assertEqual(end_time - start_time, day_count * 86400000)
+
+    @parameterized.expand([
+        ("valid_test", "api_key", True, None),
+        ("missing_api_key", "", False, ValueError),
+    ])
+    def test_get_account_id(self, _, api_key, is_valid, expected_result):
+        if not is_valid:
+            with self.assertRaises(expected_result):
+                get_account_id(api_key)
+            return
+        account_id = get_account_id(api_key)
+        self.assertEqual(len(account_id), 16)
+        self.assertNotIn(api_key, account_id)
+        self.assertEqual(account_id, get_account_id(api_key))